@@ -0,0 +1,47 @@
+"""Compare aggregate instructions per second between `BatchEngine` and `FastEngine`."""
+
+import time
+
+from chip8.batch import BatchEngine, opcode_classes
+from chip8.cartridge import Cartridge
+from chip8.fastcore import FastEngine
+from chip8.quirks import QuirksMode
+
+from engine import ALU_PROGRAM, DRAW_PROGRAM, FRAMES, run
+
+INSTANCE_COUNTS = (100, 1000, 4000)
+
+
+def run_batch(count: int, program: bytes) -> float:
+    batch = BatchEngine(count, instructions_per_step=100)
+    batch.quirks.apply_mode(QuirksMode.SuperChipModern)
+    batch.load_cartridge(Cartridge(program))
+
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        batch.step()
+        batch.step_timers()
+    elapsed = time.perf_counter() - start
+
+    return batch.ticks.sum() / elapsed
+
+
+def main() -> None:
+    # Decoded once per process
+    opcode_classes()
+
+    for name, program in (("alu", ALU_PROGRAM), ("draw", DRAW_PROGRAM)):
+        fast_engine_ips = run(FastEngine(), program)
+
+        print(f"[{name}]")
+        print(f"  FastEngine:           {fast_engine_ips:12,.0f} instructions/s")
+        for count in INSTANCE_COUNTS:
+            batch_ips = run_batch(count, program)
+            print(
+                f"  BatchEngine ({count:>4}): {batch_ips:12,.0f} instructions/s"
+                f" ({batch_ips / fast_engine_ips:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
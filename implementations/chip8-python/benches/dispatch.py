@@ -0,0 +1,53 @@
+"""Measure the opcode dispatch cost, per opcode position in the handler table.
+
+Each opcode goes through `Engine._process_opcode` with every handler
+replaced by a no-op, so only the dispatch itself is timed: it should not
+depend on where the opcode sits in the table.
+"""
+
+import timeit
+
+from chip8 import opcodes
+from chip8.engine import Engine
+from chip8.types import Address, Byte, Register
+
+ITERATIONS = 100_000
+REPEAT = 7
+
+OPCODES = [
+    opcodes.SYS(address=Address(0x123)),
+    opcodes.PLN(mask=Byte(1)),
+    opcodes.JP(address=Address(0x123)),
+    opcodes.LDB(register=Register(0x1), byte=Byte(0x23)),
+    opcodes.SHL(register1=Register(0x1), register2=Register(0x2)),
+    opcodes.LDI(address=Address(0x300)),
+    opcodes.DRW(register_x=Register(0x1), register_y=Register(0x2), height=Byte(5)),
+    opcodes.SDRW(register_x=Register(0x1), register_y=Register(0x2)),
+    opcodes.LDK(register=Register(0x1)),
+    opcodes.LDF(register=Register(0x1)),
+    opcodes.LRGF(max_register=Register(0x0)),
+]
+
+
+def main() -> None:
+    engine = Engine()
+    positions = {cls: idx for idx, cls in enumerate(engine._handlers)}
+    engine._handlers = {cls: lambda opcode: None for cls in engine._handlers}
+
+    print(f"{'opcode':>8} {'position':>8} {'dispatch (ns)':>14}")
+    for opcode in OPCODES:
+        elapsed = min(
+            timeit.repeat(
+                lambda: engine._process_opcode(opcode),
+                number=ITERATIONS,
+                repeat=REPEAT,
+            )
+        )
+
+        name = type(opcode).__name__
+        position = positions[type(opcode)]
+        print(f"{name:>8} {position:>8} {elapsed / ITERATIONS * 1e9:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
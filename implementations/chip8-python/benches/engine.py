@@ -0,0 +1,69 @@
+"""Compare instructions per second between `Engine` modes and `FastEngine`."""
+
+import time
+
+from chip8.cartridge import Cartridge
+from chip8.engine import Engine, StepResult
+from chip8.fastcore import FastEngine
+from chip8.quirks import QuirksMode
+
+FRAMES = 200
+
+# Endless counter loop, without any sprite draw.
+ALU_PROGRAM = bytes.fromhex(
+    "6000"  # 200: LDB V0, 0
+    "6105"  # 202: LDB V1, 5
+    "8104"  # 204: ADD V1, V0
+    "8205"  # 206: SUB V2, V0
+    "8316"  # 208: SHR V3, V1
+    "A300"  # 20A: LDI 0x300
+    "F133"  # 20C: LDBCD V1
+    "F265"  # 20E: LRG V2
+    "8010"  # 210: LD V0, V1
+    "7001"  # 212: ADDB V0, 1
+    "4010"  # 214: SNEB V0, 0x10
+    "6000"  # 216: LDB V0, 0
+    "1204"  # 218: JP 0x204
+)
+
+# Same loop, with a sprite draw on each iteration.
+DRAW_PROGRAM = ALU_PROGRAM.replace(bytes.fromhex("8010"), bytes.fromhex("D015"))
+
+
+def run(engine: Engine | FastEngine, program: bytes) -> float:
+    engine.quirks.apply_mode(QuirksMode.SuperChipModern)
+    engine.set_instructions_per_step(100)
+    engine.load_cartridge(Cartridge(program))
+
+    start = time.perf_counter()
+    for _ in range(FRAMES):
+        assert engine.step() == StepResult.Success
+        engine.step_timers()
+    elapsed = time.perf_counter() - start
+
+    return engine._ticks / elapsed
+
+
+def main() -> None:
+    for name, program in (("alu", ALU_PROGRAM), ("draw", DRAW_PROGRAM)):
+        block_engine = Engine()
+        block_engine.set_block_execution(True)
+
+        engine_ips = run(Engine(), program)
+        block_engine_ips = run(block_engine, program)
+        fast_engine_ips = run(FastEngine(), program)
+
+        print(f"[{name}]")
+        print(f"  Engine:          {engine_ips:12,.0f} instructions/s")
+        print(
+            f"  Engine (blocks): {block_engine_ips:12,.0f} instructions/s"
+            f" ({block_engine_ips / engine_ips:.1f}x)"
+        )
+        print(
+            f"  FastEngine:      {fast_engine_ips:12,.0f} instructions/s"
+            f" ({fast_engine_ips / engine_ips:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import hashlib
+import importlib.machinery
+import importlib.util
+import logging
+import os
+import py_compile
+import sys
+from pathlib import Path
+from types import ModuleType
+from typing import TYPE_CHECKING
+
+from .blocks import BlockCache, BlockFactory, Instruction
+from .memory import Memory
+from .types import Address
+from . import opcodes
+
+if TYPE_CHECKING:
+    from .engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Bump when the generated modules change
+FORMAT_VERSION = 3
+
+CACHE_DIRECTORY_ENV = "CHIP8_AOT_CACHE"
+
+
+def default_cache_directory() -> Path:
+    if directory := os.environ.get(CACHE_DIRECTORY_ENV):
+        return Path(directory)
+    return Path.home() / ".cache" / "chip8" / "aot"
+
+
+class TranslationCache:
+    """Ahead-of-time translations of cartridges, stored as Python modules.
+
+    A cartridge is translated by walking its reachable code from the
+    cartridge start location, and the generated block factories are
+    written to a module, named after a hash of the cartridge data, the
+    quirks, the emulation mode and the block length limit. The module is
+    compiled once to a .pyc next to it, which later loads import without
+    compiling anything, and its block factories are bound to the engine
+    as they are.
+    """
+
+    _directory: Path
+    # Imported modules, by key
+    _modules: dict[str, ModuleType]
+
+    def __init__(self, directory: Path) -> None:
+        self._directory = directory
+        self._modules = {}
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    def key(self, data: bytes, engine: "Engine") -> str:
+        digest = hashlib.sha256()
+        digest.update(f"v{FORMAT_VERSION}".encode())
+        digest.update(str(engine._emulation_mode).encode())
+        digest.update(bytes(engine.quirks.as_tuple()))
+        if engine._block_cache is not None:
+            digest.update(f"{engine._block_cache.length_limit}".encode())
+        digest.update(data)
+        return f"chip8_aot_{digest.hexdigest()[:32]}"
+
+    def load(
+        self, data: bytes, engine: "Engine"
+    ) -> dict[int, tuple[int, int, BlockFactory]]:
+        """Get the blocks of a loaded cartridge, translating it if needed.
+
+        Blocks are given by start address, as their end address, their
+        length and their factory.
+        """
+        key = self.key(data, engine)
+        module = self._modules.get(key)
+        if module is None:
+            module = self._modules[key] = self._import(key, data, engine)
+
+        return {
+            start: (end, length, factory)
+            for start, (source, end, length, factory) in module.BLOCKS.items()
+            if _read_bytes(engine._memory, start, len(source)) == source
+        }
+
+    def _import(self, key: str, data: bytes, engine: "Engine") -> ModuleType:
+        path = self._directory / f"{key}.py"
+        compiled_path = self._directory / f"{key}.{sys.implementation.cache_tag}.pyc"
+
+        if not path.exists():
+            assert engine._block_cache is not None
+            blocks = translate_cartridge(engine._block_cache, len(data))
+            self._directory.mkdir(parents=True, exist_ok=True)
+
+            # Write then rename, so concurrent runs never read partial modules
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(generate_module(blocks, engine._block_cache))
+            os.replace(tmp_path, path)
+            logger.info(f" [aot] Translated {len(blocks)} blocks to {path}")
+
+        if not compiled_path.exists():
+            # Written atomically as well
+            py_compile.compile(str(path), cfile=str(compiled_path), doraise=True)
+
+        return _import_compiled_module(key, compiled_path)
+
+
+def translate_cartridge(
+    block_cache: BlockCache, size: int
+) -> dict[int, list[Instruction]]:
+    """Translate the code reachable from the cartridge start location.
+
+    Blocks end with the cartridge, and are as long as the cache allows.
+    """
+    start = Memory.CARTRIDGE_START_LOCATION.value
+    end = start + size
+
+    blocks: dict[int, list[Instruction]] = {}
+    visited: set[int] = set()
+    pending = [start]
+
+    while pending:
+        address = pending.pop()
+        if address in visited or not start <= address < end:
+            continue
+        visited.add(address)
+
+        instructions = block_cache.translate(address, end)
+        if instructions:
+            # Continue after the block, with the instruction which ended it
+            blocks[address] = instructions
+            last = instructions[-1]
+            pending.append(last.address + last.size)
+            if isinstance(last.opcode, opcodes.JP):
+                # Blocks can end with a skip followed by a jump
+                pending.append(last.opcode.address.value)
+        else:
+            pending.extend(_branch_targets(block_cache, address))
+
+    return blocks
+
+
+def generate_module(
+    blocks: dict[int, list[Instruction]], block_cache: BlockCache
+) -> str:
+    memory = block_cache._engine._memory
+    lines = [
+        "# Generated by chip8.aot, do not edit.",
+        "from chip8.opcodes import *  # noqa: F403",
+        "from chip8.types import Address, Byte, Register  # noqa: F401",
+        "",
+    ]
+
+    for start, instructions in sorted(blocks.items()):
+        lines.append("")
+        lines.append(block_cache.generate(start, instructions))
+
+    # Blocks by start address: (source bytes, end, length, factory)
+    lines.append("BLOCKS = {")
+    for start, instructions in sorted(blocks.items()):
+        last = instructions[-1]
+        end = last.address + last.size
+        source = _read_bytes(memory, start, end - start)
+        lines.append(
+            f"    {start:#06x}: ({source!r}, {end:#06x}, {len(instructions)},"
+            f" block_{start:#06x}),"
+        )
+    lines.append("}")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def _branch_targets(block_cache: BlockCache, address: int) -> list[int]:
+    """Get the addresses an instruction executed alone can continue to."""
+    memory = block_cache._engine._memory
+    if address + 1 >= Memory.MEMORY_SIZE:
+        return []
+
+    code = opcodes.DECODE_TABLE[memory.read_opcode(Address(address))]
+    if isinstance(code, opcodes.JP):
+        return [code.address.value]
+
+    elif isinstance(code, opcodes.CALL):
+        return [code.address.value, address + 2]
+
+    elif isinstance(
+        code,
+        (
+            opcodes.SEB,
+            opcodes.SNEB,
+            opcodes.SE,
+            opcodes.SNE,
+            opcodes.SKP,
+            opcodes.SKNP,
+        ),
+    ):
+        return [address + 2, address + 4]
+
+    elif isinstance(code, (opcodes.LDK, opcodes.DRW, opcodes.SDRW)):
+        return [address + 2]
+
+    # RET, EXIT, JPOFST (unknown target), or bad opcodes
+    return []
+
+
+def _read_bytes(memory: Memory, start: int, count: int) -> bytes:
+    return bytes(memory.read_memory(Address(start), count))
+
+
+def _import_compiled_module(name: str, path: Path) -> ModuleType:
+    loader = importlib.machinery.SourcelessFileLoader(name, str(path))
+    spec = importlib.util.spec_from_loader(name, loader)
+    assert spec is not None
+
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
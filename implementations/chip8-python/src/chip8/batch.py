@@ -0,0 +1,610 @@
+"""Lockstep execution of many CHIP-8 machines, as NumPy arrays.
+
+NumPy is an optional dependency, only needed by this module.
+"""
+
+import enum
+import functools
+from typing import Callable
+
+import numpy as np
+
+from . import opcodes
+from .cartridge import Cartridge
+from .font import Font
+from .keypad import Keypad
+from .memory import Memory
+from .quirks import Quirks, QuirksMode
+from .registers import Registers
+from .stack import Stack
+from .types import Address
+
+
+class BatchStatus(enum.IntEnum):
+    Running = 0
+    # Same as StepResult.Loop: the program jumped to itself
+    Loop = 1
+    BadOpCode = 2
+    # A valid SUPER-CHIP or XO-CHIP opcode
+    Unsupported = 3
+    # Where `Engine` raises: stack overflow or underflow, bad key value
+    Error = 4
+
+
+class _OpClass(enum.IntEnum):
+    BadOpCode = 0
+    Unsupported = 1
+    SYS = enum.auto()
+    CLS = enum.auto()
+    RET = enum.auto()
+    JP = enum.auto()
+    CALL = enum.auto()
+    SEB = enum.auto()
+    SNEB = enum.auto()
+    SE = enum.auto()
+    LDB = enum.auto()
+    ADDB = enum.auto()
+    LD = enum.auto()
+    OR = enum.auto()
+    AND = enum.auto()
+    XOR = enum.auto()
+    ADD = enum.auto()
+    SUB = enum.auto()
+    SHR = enum.auto()
+    SUBN = enum.auto()
+    SHL = enum.auto()
+    SNE = enum.auto()
+    LDI = enum.auto()
+    JPOFST = enum.auto()
+    RND = enum.auto()
+    DRW = enum.auto()
+    SKP = enum.auto()
+    SKNP = enum.auto()
+    LDLY = enum.auto()
+    LDK = enum.auto()
+    SDLY = enum.auto()
+    SSND = enum.auto()
+    ADDI = enum.auto()
+    LDF = enum.auto()
+    LDBCD = enum.auto()
+    SRG = enum.auto()
+    LRG = enum.auto()
+
+
+@functools.cache
+def opcode_classes() -> np.ndarray:
+    """Get the class of each 16-bit opcode, as decoded by `opcodes`.
+
+    DXY0 decodes as SDRW, so it is unsupported like the other SUPER-CHIP
+    opcodes.
+    """
+    table = np.full(0x10000, _OpClass.Unsupported, dtype=np.uint8)
+    for value in range(0x10000):
+        code = opcodes.parse_opcode(Address(value))
+        if code is None:
+            table[value] = _OpClass.BadOpCode
+        elif type(code).__name__ in _OpClass.__members__:
+            table[value] = _OpClass[type(code).__name__]
+    return table
+
+
+class BatchEngine:
+    """CHIP-8 machines running the same instructions per step, in lockstep.
+
+    The state of every machine is stored in arrays with a leading batch
+    dimension, and each instruction of a step is decoded and executed for
+    all running machines at once, one opcode class at a time. Opcodes run
+    with the same semantics and quirks as `Engine` in CHIP-8 mode, with a
+    few differences:
+
+    - Only CHIP-8 opcodes are supported, in LORES: a machine meeting a
+      SUPER-CHIP or XO-CHIP opcode stops with `BatchStatus.Unsupported`.
+    - Memory is 4 KiB, and addresses wrap around it.
+    - Where `Engine` raises, the machine stops with `BatchStatus.Error`.
+    - Idle loops run until the end of the step, instead of ending it early:
+      the registers are the same, but the PC can stop anywhere in the loop.
+
+    Machines stop on their own, and the others keep running; a machine
+    waiting for a key with LDK skips steps until a key is released on it.
+    """
+
+    MEMORY_SIZE = 0x1000
+    ADDRESS_MASK = MEMORY_SIZE - 1
+    SCREEN_SIZE_X = 64
+    SCREEN_SIZE_Y = 32
+
+    count: int
+    memory: np.ndarray
+    v: np.ndarray
+    i: np.ndarray
+    pc: np.ndarray
+    stack: np.ndarray
+    sp: np.ndarray
+    delay_timer: np.ndarray
+    sound_timer: np.ndarray
+    keys: np.ndarray
+    screen: np.ndarray
+    status: np.ndarray
+    ticks: np.ndarray
+
+    _quirks: Quirks
+    _instructions_per_step: int
+    _rng: np.random.Generator
+    _waiting_for_key: np.ndarray
+    _last_released_key: np.ndarray
+    _last_released_key_ticks: np.ndarray
+    _keypad_ticks: np.ndarray
+    _handlers: dict[_OpClass, Callable[[np.ndarray, np.ndarray], None]]
+
+    def __init__(
+        self,
+        count: int,
+        *,
+        quirks: Quirks | None = None,
+        instructions_per_step: int = 10,
+        seed: int | None = None,
+    ) -> None:
+        self.count = count
+        self.memory = np.zeros((count, self.MEMORY_SIZE), dtype=np.uint8)
+        self.v = np.zeros((count, Registers.GENERAL_REGISTER_COUNT), dtype=np.uint8)
+        self.i = np.zeros(count, dtype=np.int64)
+        self.pc = np.zeros(count, dtype=np.int64)
+        self.stack = np.zeros((count, Stack.STACK_SIZE), dtype=np.int64)
+        self.sp = np.zeros(count, dtype=np.int64)
+        self.delay_timer = np.zeros(count, dtype=np.uint8)
+        self.sound_timer = np.zeros(count, dtype=np.uint8)
+        self.keys = np.zeros((count, Keypad.KEYS_COUNT), dtype=bool)
+        self.screen = np.zeros(
+            (count, self.SCREEN_SIZE_Y, self.SCREEN_SIZE_X), dtype=np.uint8
+        )
+        self.status = np.zeros(count, dtype=np.uint8)
+        self.ticks = np.zeros(count, dtype=np.int64)
+
+        if quirks is None:
+            quirks = Quirks()
+            quirks.apply_mode(QuirksMode.Chip8)
+        self._quirks = quirks
+        self._instructions_per_step = instructions_per_step
+        self._rng = np.random.default_rng(seed)
+        self._waiting_for_key = np.zeros(count, dtype=bool)
+        self._last_released_key = np.zeros(count, dtype=np.int64)
+        self._last_released_key_ticks = np.zeros(count, dtype=np.int64)
+        self._keypad_ticks = np.zeros(count, dtype=np.int64)
+
+        self._handlers = {
+            _OpClass.SYS: self._process_sys,
+            _OpClass.CLS: self._process_cls,
+            _OpClass.RET: self._process_ret,
+            _OpClass.JP: self._process_jp,
+            _OpClass.CALL: self._process_call,
+            _OpClass.SEB: self._process_seb,
+            _OpClass.SNEB: self._process_sneb,
+            _OpClass.SE: self._process_se,
+            _OpClass.LDB: self._process_ldb,
+            _OpClass.ADDB: self._process_addb,
+            _OpClass.LD: self._process_ld,
+            _OpClass.OR: self._process_or,
+            _OpClass.AND: self._process_and,
+            _OpClass.XOR: self._process_xor,
+            _OpClass.ADD: self._process_add,
+            _OpClass.SUB: self._process_sub,
+            _OpClass.SHR: self._process_shr,
+            _OpClass.SUBN: self._process_subn,
+            _OpClass.SHL: self._process_shl,
+            _OpClass.SNE: self._process_sne,
+            _OpClass.LDI: self._process_ldi,
+            _OpClass.JPOFST: self._process_jpofst,
+            _OpClass.RND: self._process_rnd,
+            _OpClass.DRW: self._process_drw,
+            _OpClass.SKP: self._process_skp,
+            _OpClass.SKNP: self._process_sknp,
+            _OpClass.LDLY: self._process_ldly,
+            _OpClass.LDK: self._process_ldk,
+            _OpClass.SDLY: self._process_sdly,
+            _OpClass.SSND: self._process_ssnd,
+            _OpClass.ADDI: self._process_addi,
+            _OpClass.LDF: self._process_ldf,
+            _OpClass.LDBCD: self._process_ldbcd,
+            _OpClass.SRG: self._process_srg,
+            _OpClass.LRG: self._process_lrg,
+        }
+
+        self.reset()
+
+    def reset(self, instances: np.ndarray | slice = slice(None)) -> None:
+        """Reset machines, all of them by default."""
+        memory = self.memory[instances]
+        memory[...] = 0
+        font = Font.get_default()._data
+        super_font = Font.get_super_default()._data
+        start = Memory.FONT_START_LOCATION.value
+        memory[:, start : start + len(font)] = np.frombuffer(font, dtype=np.uint8)
+        start = Memory.SUPER_FONT_START_LOCATION.value
+        memory[:, start : start + len(super_font)] = np.frombuffer(
+            super_font, dtype=np.uint8
+        )
+        self.memory[instances] = memory
+
+        self.v[instances] = 0
+        self.i[instances] = 0
+        self.pc[instances] = Registers.INITIAL_PC.value
+        self.stack[instances] = 0
+        self.sp[instances] = 0
+        self.delay_timer[instances] = 0
+        self.sound_timer[instances] = 0
+        self.keys[instances] = False
+        self.screen[instances] = 0
+        self.status[instances] = BatchStatus.Running
+        self.ticks[instances] = 0
+        self._waiting_for_key[instances] = False
+        self._last_released_key[instances] = -1
+        self._last_released_key_ticks[instances] = 0
+        self._keypad_ticks[instances] = 0
+
+    def load_cartridge(
+        self, cartridge: Cartridge, instances: np.ndarray | slice = slice(None)
+    ) -> None:
+        """Load a cartridge on machines, all of them by default."""
+        start = Memory.CARTRIDGE_START_LOCATION.value
+        data = cartridge._data
+        if start + len(data) > self.MEMORY_SIZE:
+            raise RuntimeError("Memory buffer overflow")
+
+        self.memory[instances, start : start + len(data)] = np.frombuffer(
+            data, dtype=np.uint8
+        )
+
+    @property
+    def quirks(self) -> Quirks:
+        return self._quirks
+
+    @property
+    def instructions_per_step(self) -> int:
+        return self._instructions_per_step
+
+    def set_instructions_per_step(self, value: int) -> None:
+        self._instructions_per_step = value
+
+    @property
+    def beeping(self) -> np.ndarray:
+        return self.sound_timer > 0
+
+    @property
+    def waiting_for_key(self) -> np.ndarray:
+        """Whether each machine has an LDK parked until a key is released."""
+        return self._waiting_for_key.copy()
+
+    def set_kx(
+        self, key: int, value: bool, instances: np.ndarray | slice = slice(None)
+    ) -> None:
+        """Set a key on machines, all of them by default, like `Keypad.set_kx`."""
+        if key < 0 or key > 15:
+            raise RuntimeError("Unsupported key value")
+
+        self.keys[instances, key] = value
+        if not value:
+            self._last_released_key[instances] = key
+            self._last_released_key_ticks[instances] = self._keypad_ticks[instances]
+            # Run the parked LDK again on next step, to read the released key
+            self._waiting_for_key[instances] = False
+
+    def step(self) -> np.ndarray:
+        """Run the instructions of a frame on running machines.
+
+        Returns the status of each machine.
+        """
+        classes_table = opcode_classes()
+        memory = self.memory
+        display_wait = self._quirks.display_wait
+        # Machines done with this step
+        done = self._waiting_for_key.copy()
+
+        for idx in range(self._instructions_per_step):
+            active = np.flatnonzero((self.status == BatchStatus.Running) & ~done)
+            if active.size == 0:
+                break
+
+            pc = self.pc[active]
+            code = (memory[active, pc & self.ADDRESS_MASK].astype(np.int64) << 8) | (
+                memory[active, (pc + 1) & self.ADDRESS_MASK]
+            )
+            classes = classes_table[code]
+
+            # Check infinite loop
+            stopped = (classes == _OpClass.JP) & ((code & 0xFFF) == pc)
+            self.status[active[stopped]] = BatchStatus.Loop
+
+            # Check display wait
+            if display_wait and idx > 0:
+                wait = classes == _OpClass.DRW
+                done[active[wait]] = True
+                stopped |= wait
+
+            active = active[~stopped]
+            code = code[~stopped]
+            classes = classes[~stopped]
+
+            for op_class in np.unique(classes):
+                selected = classes == op_class
+                instances = active[selected]
+                if op_class == _OpClass.BadOpCode:
+                    self.status[instances] = BatchStatus.BadOpCode
+                elif op_class == _OpClass.Unsupported:
+                    self.status[instances] = BatchStatus.Unsupported
+                else:
+                    self._handlers[_OpClass(op_class)](instances, code[selected])
+                    self.ticks[instances] += 1
+
+            done |= self._waiting_for_key
+
+        return self.status.copy()
+
+    def step_timers(self) -> None:
+        # Keypad
+        expired = (self._last_released_key >= 0) & (
+            self._keypad_ticks - self._last_released_key_ticks > Keypad.RELEASE_TICKS
+        )
+        self._last_released_key[expired] = -1
+        self._keypad_ticks += 1
+
+        # Timers
+        self.delay_timer[self.delay_timer > 0] -= 1
+        self.sound_timer[self.sound_timer > 0] -= 1
+
+    def frame_bytes(self) -> np.ndarray:
+        """Get the frame of each machine, laid out as `Display.frame_bytes`."""
+        return self.screen.repeat(2, axis=1).repeat(2, axis=2)
+
+    def _fail(self, instances: np.ndarray, failed: np.ndarray) -> np.ndarray:
+        """Stop failed machines with an error, and get the others."""
+        self.status[instances[failed]] = BatchStatus.Error
+        return instances[~failed]
+
+    def _skip_if(self, instances: np.ndarray, condition: np.ndarray) -> None:
+        self.pc[instances] += np.where(condition, 4, 2)
+
+    def _process_sys(self, instances: np.ndarray, code: np.ndarray) -> None:
+        self.pc[instances] += 2
+
+    def _process_cls(self, instances: np.ndarray, code: np.ndarray) -> None:
+        self.screen[instances] = 0
+        self.pc[instances] += 2
+
+    def _process_ret(self, instances: np.ndarray, code: np.ndarray) -> None:
+        instances = self._fail(instances, self.sp[instances] == 0)
+        self.sp[instances] -= 1
+        self.pc[instances] = self.stack[instances, self.sp[instances]] + 2
+
+    def _process_jp(self, instances: np.ndarray, code: np.ndarray) -> None:
+        self.pc[instances] = code & 0xFFF
+
+    def _process_call(self, instances: np.ndarray, code: np.ndarray) -> None:
+        full = self.sp[instances] == Stack.STACK_SIZE
+        code = code[~full]
+        instances = self._fail(instances, full)
+        self.stack[instances, self.sp[instances]] = self.pc[instances]
+        self.sp[instances] += 1
+        self.pc[instances] = code & 0xFFF
+
+    def _process_seb(self, instances: np.ndarray, code: np.ndarray) -> None:
+        vx = self.v[instances, (code >> 8) & 0xF]
+        self._skip_if(instances, vx == code & 0xFF)
+
+    def _process_sneb(self, instances: np.ndarray, code: np.ndarray) -> None:
+        vx = self.v[instances, (code >> 8) & 0xF]
+        self._skip_if(instances, vx != code & 0xFF)
+
+    def _process_se(self, instances: np.ndarray, code: np.ndarray) -> None:
+        vx = self.v[instances, (code >> 8) & 0xF]
+        vy = self.v[instances, (code >> 4) & 0xF]
+        self._skip_if(instances, vx == vy)
+
+    def _process_sne(self, instances: np.ndarray, code: np.ndarray) -> None:
+        vx = self.v[instances, (code >> 8) & 0xF]
+        vy = self.v[instances, (code >> 4) & 0xF]
+        self._skip_if(instances, vx != vy)
+
+    def _process_ldb(self, instances: np.ndarray, code: np.ndarray) -> None:
+        self.v[instances, (code >> 8) & 0xF] = code & 0xFF
+        self.pc[instances] += 2
+
+    def _process_addb(self, instances: np.ndarray, code: np.ndarray) -> None:
+        x = (code >> 8) & 0xF
+        self.v[instances, x] = (self.v[instances, x] + (code & 0xFF)) & 0xFF
+        self.pc[instances] += 2
+
+    def _process_alu(
+        self,
+        instances: np.ndarray,
+        code: np.ndarray,
+        operation: Callable[[np.ndarray, np.ndarray], tuple[np.ndarray, np.ndarray]],
+    ) -> None:
+        """Run an 8XYN opcode, from VX and VY to the result and VF."""
+        x = (code >> 8) & 0xF
+        vx = self.v[instances, x].astype(np.int64)
+        vy = self.v[instances, (code >> 4) & 0xF].astype(np.int64)
+        result, flag = operation(vx, vy)
+        # VF is set after VX, so it wins when X is F
+        self.v[instances, x] = result & 0xFF
+        self.v[instances, 0xF] = flag
+        self.pc[instances] += 2
+
+    def _process_ld(self, instances: np.ndarray, code: np.ndarray) -> None:
+        self.v[instances, (code >> 8) & 0xF] = self.v[instances, (code >> 4) & 0xF]
+        self.pc[instances] += 2
+
+    def _process_logic(
+        self, instances: np.ndarray, code: np.ndarray, result: np.ndarray
+    ) -> None:
+        self.v[instances, (code >> 8) & 0xF] = result
+        if self._quirks.vf_reset:
+            self.v[instances, 0xF] = 0
+        self.pc[instances] += 2
+
+    def _process_or(self, instances: np.ndarray, code: np.ndarray) -> None:
+        vx = self.v[instances, (code >> 8) & 0xF]
+        vy = self.v[instances, (code >> 4) & 0xF]
+        self._process_logic(instances, code, vx | vy)
+
+    def _process_and(self, instances: np.ndarray, code: np.ndarray) -> None:
+        vx = self.v[instances, (code >> 8) & 0xF]
+        vy = self.v[instances, (code >> 4) & 0xF]
+        self._process_logic(instances, code, vx & vy)
+
+    def _process_xor(self, instances: np.ndarray, code: np.ndarray) -> None:
+        vx = self.v[instances, (code >> 8) & 0xF]
+        vy = self.v[instances, (code >> 4) & 0xF]
+        self._process_logic(instances, code, vx ^ vy)
+
+    def _process_add(self, instances: np.ndarray, code: np.ndarray) -> None:
+        self._process_alu(instances, code, lambda vx, vy: (vx + vy, vx + vy > 0xFF))
+
+    def _process_sub(self, instances: np.ndarray, code: np.ndarray) -> None:
+        self._process_alu(instances, code, lambda vx, vy: (vx - vy, vx >= vy))
+
+    def _process_subn(self, instances: np.ndarray, code: np.ndarray) -> None:
+        self._process_alu(instances, code, lambda vx, vy: (vy - vx, vx <= vy))
+
+    def _process_shr(self, instances: np.ndarray, code: np.ndarray) -> None:
+        if self._quirks.shift_y:
+            self._process_alu(instances, code, lambda vx, vy: (vy >> 1, vy & 1))
+        else:
+            self._process_alu(instances, code, lambda vx, vy: (vx >> 1, vx & 1))
+
+    def _process_shl(self, instances: np.ndarray, code: np.ndarray) -> None:
+        if self._quirks.shift_y:
+            self._process_alu(instances, code, lambda vx, vy: (vy << 1, vy >> 7))
+        else:
+            self._process_alu(instances, code, lambda vx, vy: (vx << 1, vx >> 7))
+
+    def _process_ldi(self, instances: np.ndarray, code: np.ndarray) -> None:
+        self.i[instances] = code & 0xFFF
+        self.pc[instances] += 2
+
+    def _process_jpofst(self, instances: np.ndarray, code: np.ndarray) -> None:
+        if self._quirks.jump_vx:
+            offset = self.v[instances, (code >> 8) & 0xF]
+        else:
+            offset = self.v[instances, 0]
+        self.pc[instances] = (offset + (code & 0xFFF)) & 0xFFFF
+
+    def _process_rnd(self, instances: np.ndarray, code: np.ndarray) -> None:
+        value = self._rng.integers(0, 256, size=len(instances))
+        self.v[instances, (code >> 8) & 0xF] = code & 0xFF & value
+        self.pc[instances] += 2
+
+    def _process_drw(self, instances: np.ndarray, code: np.ndarray) -> None:
+        size_x = self.SCREEN_SIZE_X
+        size_y = self.SCREEN_SIZE_Y
+        vx = self.v[instances, (code >> 8) & 0xF].astype(np.int64)
+        vy = self.v[instances, (code >> 4) & 0xF].astype(np.int64)
+        height = code & 0xF
+
+        # Read sprite lines, and spread their bits
+        lines = np.arange(height.max())
+        addresses = (self.i[instances, None] + lines) & self.ADDRESS_MASK
+        sprite = self.memory[instances[:, None], addresses]
+        sprite[lines >= height[:, None]] = 0
+        bits = np.unpackbits(sprite[:, :, None], axis=2)
+
+        # Disable clipping if initially out of bounds
+        clip = self._quirks.draw_clipping & (vx < size_x) & (vy < size_y)
+        columns = (vx % size_x)[:, None] + np.arange(8)
+        rows = (vy % size_y)[:, None] + lines
+        clipped = (rows >= size_y)[:, :, None] | (columns >= size_x)[:, None, :]
+        bits[clip[:, None, None] & clipped] = 0
+
+        # Sprites are smaller than the screen: wrapped pixels never overlap
+        targets = (
+            (instances * (size_x * size_y))[:, None, None]
+            + ((rows % size_y) * size_x)[:, :, None]
+            + (columns % size_x)[:, None, :]
+        )
+        screen = self.screen.reshape(-1)
+        pixels = screen[targets]
+        screen[targets] = pixels ^ bits
+        self.v[instances, 0xF] = (pixels & bits).any(axis=(1, 2))
+        self.pc[instances] += 2
+
+    def _process_skp(self, instances: np.ndarray, code: np.ndarray) -> None:
+        key = self.v[instances, (code >> 8) & 0xF]
+        bad = key > 15
+        key = key[~bad]
+        instances = self._fail(instances, bad)
+        self._skip_if(instances, self.keys[instances, key])
+
+    def _process_sknp(self, instances: np.ndarray, code: np.ndarray) -> None:
+        key = self.v[instances, (code >> 8) & 0xF]
+        bad = key > 15
+        key = key[~bad]
+        instances = self._fail(instances, bad)
+        self._skip_if(instances, ~self.keys[instances, key])
+
+    def _process_ldly(self, instances: np.ndarray, code: np.ndarray) -> None:
+        self.v[instances, (code >> 8) & 0xF] = self.delay_timer[instances]
+        self.pc[instances] += 2
+
+    def _process_ldk(self, instances: np.ndarray, code: np.ndarray) -> None:
+        key = self._last_released_key[instances]
+        released = key >= 0
+        waiting = instances[~released]
+        self._waiting_for_key[waiting] = True
+
+        instances = instances[released]
+        self.v[instances, (code[released] >> 8) & 0xF] = key[released]
+        self.pc[instances] += 2
+
+    def _process_sdly(self, instances: np.ndarray, code: np.ndarray) -> None:
+        self.delay_timer[instances] = self.v[instances, (code >> 8) & 0xF]
+        self.pc[instances] += 2
+
+    def _process_ssnd(self, instances: np.ndarray, code: np.ndarray) -> None:
+        self.sound_timer[instances] = self.v[instances, (code >> 8) & 0xF]
+        self.pc[instances] += 2
+
+    def _process_addi(self, instances: np.ndarray, code: np.ndarray) -> None:
+        addition = self.i[instances] + self.v[instances, (code >> 8) & 0xF]
+        if self._quirks.add_i_carry:
+            self.v[instances, 0xF] = addition >= 0x1000
+        self.i[instances] = addition & 0xFFFF
+        self.pc[instances] += 2
+
+    def _process_ldf(self, instances: np.ndarray, code: np.ndarray) -> None:
+        # Same as Engine: the font sprite of the register index
+        self.i[instances] = (
+            Memory.FONT_START_LOCATION.value + ((code >> 8) & 0xF) * Font.SPRITE_HEIGHT
+        )
+        self.pc[instances] += 2
+
+    def _process_ldbcd(self, instances: np.ndarray, code: np.ndarray) -> None:
+        value = self.v[instances, (code >> 8) & 0xF]
+        i = self.i[instances]
+        mask = self.ADDRESS_MASK
+        self.memory[instances, i & mask] = value // 100
+        self.memory[instances, (i + 1) & mask] = (value % 100) // 10
+        self.memory[instances, (i + 2) & mask] = value % 10
+        self.pc[instances] += 2
+
+    def _process_srg(self, instances: np.ndarray, code: np.ndarray) -> None:
+        x = (code >> 8) & 0xF
+        i = self.i[instances]
+        for offset in range(x.max() + 1):
+            stored = x >= offset
+            self.memory[instances[stored], (i[stored] + offset) & self.ADDRESS_MASK] = (
+                self.v[instances[stored], offset]
+            )
+        if self._quirks.index_increment:
+            self.i[instances] = (i + x + 1) & 0xFFFF
+        self.pc[instances] += 2
+
+    def _process_lrg(self, instances: np.ndarray, code: np.ndarray) -> None:
+        x = (code >> 8) & 0xF
+        i = self.i[instances]
+        for offset in range(x.max() + 1):
+            loaded = x >= offset
+            self.v[instances[loaded], offset] = self.memory[
+                instances[loaded], (i[loaded] + offset) & self.ADDRESS_MASK
+            ]
+        if self._quirks.index_increment:
+            self.i[instances] = (i + x + 1) & 0xFFFF
+        self.pc[instances] += 2
@@ -0,0 +1,621 @@
+import dataclasses
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable
+
+from .memory import Memory
+from .quirks import Quirks
+from .types import Address, Byte, Register
+from . import opcodes
+
+if TYPE_CHECKING:
+    from .engine import Engine
+
+# Opcodes which may not continue to the next instruction, or need a check
+# from the engine: they are always executed one by one.
+BRANCH_OPCODES = (
+    opcodes.JP,
+    opcodes.CALL,
+    opcodes.RET,
+    opcodes.SEB,
+    opcodes.SNEB,
+    opcodes.SE,
+    opcodes.SNE,
+    opcodes.SKP,
+    opcodes.SKNP,
+    opcodes.JPOFST,
+    opcodes.LDK,
+    opcodes.EXIT,
+)
+
+# Draw opcodes, which have to be executed one by one with the display_wait quirk.
+DRAW_OPCODES = (opcodes.DRW, opcodes.SDRW)
+
+# Opcodes writing to memory, which may modify the code following them.
+STORE_OPCODES = (opcodes.SRG, opcodes.SRGI, opcodes.LDBCD)
+
+# Skip opcodes which can end a block, when followed by a jump.
+SKIP_OPCODES = (opcodes.SEB, opcodes.SNEB, opcodes.SE, opcodes.SNE)
+
+# Longest block translated, in instructions.
+MAX_BLOCK_LENGTH = 64
+
+# Size of the pages used to find the blocks touched by a memory write.
+PAGE_SIZE = Memory.PAGE_SIZE
+
+# Operators of the bitwise opcodes, generated inline.
+BITWISE_OPERATORS = {opcodes.OR: "|", opcodes.AND: "&", opcodes.XOR: "^"}
+
+# Names used by the generated block factories.
+BLOCK_NAMESPACE: dict[str, Any] = {
+    **{cls.__name__: cls for cls in opcodes.OpCode.__subclasses__()},
+    "Address": Address,
+    "Byte": Byte,
+    "Register": Register,
+}
+
+
+@dataclass(frozen=True)
+class Instruction:
+    """Decoded instruction, at a given address."""
+
+    address: int
+    opcode: opcodes.OpCode
+
+    @property
+    def size(self) -> int:
+        return 4 if isinstance(self.opcode, opcodes.LDIL) else 2
+
+
+@dataclass(frozen=True)
+class Fusion:
+    """Opcode sequence generated as a single superinstruction.
+
+    The code of a superinstruction is written by the `_fuse_<name>` method of
+    the block writer. Sequences ending with a jump end their block.
+    """
+
+    name: str
+    pattern: tuple[type[opcodes.OpCode], ...]
+
+    def matches(self, instructions: list[Instruction], start: int = 0) -> bool:
+        """Check whether the instructions from `start` begin with the pattern."""
+        return len(instructions) - start >= len(self.pattern) and all(
+            type(instructions[start + offset].opcode) is opcode
+            for offset, opcode in enumerate(self.pattern)
+        )
+
+
+# Superinstructions, longest first.
+FUSIONS = (
+    Fusion("addb_seb_jp", (opcodes.ADDB, opcodes.SEB, opcodes.JP)),
+    Fusion("addb_sneb_jp", (opcodes.ADDB, opcodes.SNEB, opcodes.JP)),
+    Fusion("addb_se_jp", (opcodes.ADDB, opcodes.SE, opcodes.JP)),
+    Fusion("addb_sne_jp", (opcodes.ADDB, opcodes.SNE, opcodes.JP)),
+    Fusion("seb_jp", (opcodes.SEB, opcodes.JP)),
+    Fusion("sneb_jp", (opcodes.SNEB, opcodes.JP)),
+    Fusion("se_jp", (opcodes.SE, opcodes.JP)),
+    Fusion("sne_jp", (opcodes.SNE, opcodes.JP)),
+    Fusion("ldb_ldb", (opcodes.LDB, opcodes.LDB)),
+    Fusion("ldi_drw", (opcodes.LDI, opcodes.DRW)),
+)
+
+
+# Generated function taking the engine and the fusion counters, returning
+# the function running a block.
+BlockFactory = Callable[["Engine", list[int]], Callable[[], int]]
+
+
+@dataclass(frozen=True)
+class Block:
+    """Straight-line instructions, compiled into a single function.
+
+    Running a block returns the number of executed instructions, which is
+    at most its length.
+    """
+
+    start: int
+    end: int
+    length: int
+    run: Callable[[], int]
+
+
+class BlockCache:
+    """Compiled blocks, indexed by their start address.
+
+    A block runs every instruction from its start address up to the next
+    branch opcode (or up to and including the next memory write), in one
+    generated function. Register loads, ALU opcodes, I loads and skips
+    followed by a jump are generated inline, working on register values
+    directly and writing the PC back only when needed, without the
+    handlers logging. Other opcodes call their engine handler.
+    A skip followed by a jump also ends a block, as a single superinstruction.
+
+    Common opcode sequences are fused into superinstructions (see FUSIONS),
+    and the number of times each one was executed is kept in fusion_stats.
+
+    Blocks are at most as long as the instructions of a step (and
+    MAX_BLOCK_LENGTH), so every block can run from the start of a step.
+
+    Blocks are invalidated when memory they were translated from is written.
+    """
+
+    _engine: "Engine"
+    _quirks_key: tuple[bool, ...]
+    _display_wait: bool
+    _length_limit: int
+    _blocks: dict[int, Block | None]
+    _pages: dict[int, set[int]]
+    _fusion_counts: list[int]
+
+    def __init__(self, engine: "Engine") -> None:
+        self._engine = engine
+        self._quirks_key = engine.quirks.as_tuple()
+        self._display_wait = engine.quirks.display_wait
+        self._length_limit = MAX_BLOCK_LENGTH
+        self._blocks = {}
+        self._pages = {}
+        self._fusion_counts = [0] * len(FUSIONS)
+
+    def __len__(self) -> int:
+        return sum(1 for block in self._blocks.values() if block is not None)
+
+    def fusion_stats(self) -> dict[str, int]:
+        """Get how many times each superinstruction was executed."""
+        return {
+            fusion.name: count
+            for fusion, count in zip(FUSIONS, self._fusion_counts)
+            if count > 0
+        }
+
+    def get(self, address: int) -> Block | None:
+        """Get the block starting at an address, compiling it if needed.
+
+        Returns None if the instruction at this address has to be
+        executed alone.
+        """
+        try:
+            return self._blocks[address]
+        except KeyError:
+            block = self._compile(address, self.translate(address))
+            self._blocks[address] = block
+            if block is not None:
+                self._track(block)
+            return block
+
+    def install(self, start: int, end: int, length: int, factory: BlockFactory) -> None:
+        """Install a block from its factory, generated ahead of time."""
+        if start in self._blocks:
+            return
+
+        block = Block(
+            start=start,
+            end=end,
+            length=length,
+            run=factory(self._engine, self._fusion_counts),
+        )
+        self._blocks[start] = block
+        self._track(block)
+
+    def clear(self) -> None:
+        self._blocks.clear()
+        self._pages.clear()
+        self._quirks_key = self._engine.quirks.as_tuple()
+        self._display_wait = self._engine.quirks.display_wait
+
+    @property
+    def length_limit(self) -> int:
+        return self._length_limit
+
+    def set_length_limit(self, limit: int) -> None:
+        """Limit the length of blocks, dropping them all if the limit changed.
+
+        Blocks longer than the instructions of a step could never run.
+        """
+        limit = min(limit, MAX_BLOCK_LENGTH)
+        if limit != self._length_limit:
+            self._length_limit = limit
+            self.clear()
+
+    def sync_quirks(self) -> None:
+        """Drop every block if quirks changed since they were compiled.
+
+        Blocks are bound to the engine handlers specialized for the quirks,
+        and are split differently with the display_wait quirk.
+        """
+        if self._quirks_key != self._engine.quirks.as_tuple():
+            self.clear()
+
+    def invalidate(self, start: int, count: int) -> None:
+        """Drop blocks translated from memory in (start..start+count)."""
+        end = start + count
+        for page in range(start // PAGE_SIZE, (end - 1) // PAGE_SIZE + 1):
+            starts = self._pages.get(page)
+            if not starts:
+                continue
+
+            for block_start in list(starts):
+                block = self._blocks.get(block_start)
+                if block is None:
+                    starts.discard(block_start)
+                elif block.start < end and start < block.end:
+                    self._drop(block)
+
+        # Instructions which were executed alone may now start a block
+        for address in range(start - 1, end):
+            if self._blocks.get(address, False) is None:
+                del self._blocks[address]
+
+    def translate(
+        self, address: int, end: int = Memory.MEMORY_SIZE
+    ) -> list[Instruction]:
+        """Decode the straight-line instructions starting at an address.
+
+        Decoding stops at the length limit, and before `end`.
+        """
+        memory = self._engine._memory
+        instructions: list[Instruction] = []
+
+        while address + 1 < end and len(instructions) < self._length_limit:
+            code = opcodes.DECODE_TABLE[memory.read_opcode(Address(address))]
+            if isinstance(code, SKIP_OPCODES):
+                if len(instructions) + 2 <= self._length_limit:
+                    instructions.extend(self._translate_skip_jump(address, code, end))
+                break
+
+            if code is None or isinstance(code, BRANCH_OPCODES):
+                break
+
+            if self._display_wait and isinstance(code, DRAW_OPCODES):
+                break
+
+            if isinstance(code, opcodes.LDIL):
+                if address + 3 >= end:
+                    break
+                trailing = memory.read_opcode(Address(address + 2))
+                code = opcodes.LONG_ADDRESS_TABLE[trailing]
+
+            instruction = Instruction(address=address, opcode=code)
+            instructions.append(instruction)
+            address += instruction.size
+
+            if isinstance(code, STORE_OPCODES):
+                break
+
+        return instructions
+
+    def _translate_skip_jump(
+        self, address: int, code: opcodes.OpCode, end: int
+    ) -> list[Instruction]:
+        """Decode a skip followed by a jump, or nothing if it does not match."""
+        if address + 3 >= end:
+            return []
+
+        trailing = self._engine._memory.read_opcode(Address(address + 2))
+        jump = opcodes.DECODE_TABLE[trailing]
+        if not isinstance(jump, opcodes.JP) or jump.address.value == address + 2:
+            # Infinite loops are detected by the engine
+            return []
+
+        return [
+            Instruction(address=address, opcode=code),
+            Instruction(address=address + 2, opcode=jump),
+        ]
+
+    def generate(self, start: int, instructions: list[Instruction]) -> str:
+        """Generate the source of a block factory, for the current quirks.
+
+        The factory is named `block_<start>` and takes the engine and the
+        fusion counters, returning the function running the block. Its
+        source only needs the opcode classes, Address and Byte in scope.
+        """
+        return _BlockWriter(self._engine.quirks, instructions).write(start)
+
+    def _compile(self, start: int, instructions: list[Instruction]) -> Block | None:
+        if not instructions:
+            return None
+
+        namespace = dict(BLOCK_NAMESPACE)
+        source = self.generate(start, instructions)
+        exec(compile(source, f"<block {start:#06x}>", "exec"), namespace)
+        factory: BlockFactory = namespace[f"block_{start:#06x}"]
+
+        last = instructions[-1]
+        return Block(
+            start=start,
+            end=last.address + last.size,
+            length=len(instructions),
+            run=factory(self._engine, self._fusion_counts),
+        )
+
+    def _track(self, block: Block) -> None:
+        for page in range(block.start // PAGE_SIZE, (block.end - 1) // PAGE_SIZE + 1):
+            self._pages.setdefault(page, set()).add(block.start)
+
+    def _drop(self, block: Block) -> None:
+        del self._blocks[block.start]
+        for page in range(block.start // PAGE_SIZE, (block.end - 1) // PAGE_SIZE + 1):
+            self._pages[page].discard(block.start)
+
+
+def opcode_source(opcode: opcodes.OpCode) -> str:
+    """Get the source constructing an opcode, with BLOCK_NAMESPACE in scope."""
+    args = []
+    for field in dataclasses.fields(opcode):
+        value = getattr(opcode, field.name)
+        if isinstance(value, Address):
+            args.append(f"{field.name}=Address({value.value:#x})")
+        elif isinstance(value, Byte):
+            args.append(f"{field.name}=Byte({value.value:#x})")
+        elif isinstance(value, Register):
+            args.append(f"{field.name}=Register({value.value:#x})")
+        else:
+            raise RuntimeError(f"Unsupported opcode field: {field.name}")
+
+    return f"{type(opcode).__name__}({', '.join(args)})"
+
+
+class _BlockWriter:
+    """Source of a block factory, for given quirks.
+
+    The PC is tracked while writing: inline code does not move it, so it is
+    only written back before calling a handler and at the end of the block.
+    """
+
+    _quirks: Quirks
+    _instructions: list[Instruction]
+    # Factory locals: constants, handlers and opcodes
+    _constants: dict[str, str]
+    _body: list[str]
+    # Address the PC register holds at this point of the block
+    _pc: int
+
+    def __init__(self, quirks: Quirks, instructions: list[Instruction]) -> None:
+        self._quirks = quirks
+        self._instructions = instructions
+        self._constants = {}
+        self._body = []
+        self._pc = instructions[0].address
+
+    def write(self, start: int) -> str:
+        instructions = self._instructions
+        idx = 0
+        while idx < len(instructions):
+            fusion_idx = next(
+                (
+                    fusion_idx
+                    for fusion_idx, fusion in enumerate(FUSIONS)
+                    if fusion.matches(instructions, idx)
+                ),
+                None,
+            )
+
+            if fusion_idx is not None:
+                fusion = FUSIONS[fusion_idx]
+                self._body.append(f"counts[{fusion_idx}] += 1")
+                getattr(self, f"_fuse_{fusion.name}")(idx)
+                idx += len(fusion.pattern)
+            elif isinstance(instructions[idx].opcode, SKIP_OPCODES):
+                self._write_skip_jump(idx)
+                idx += 2
+            else:
+                self._write_instruction(idx)
+                idx += 1
+
+        last = instructions[-1]
+        if not isinstance(last.opcode, opcodes.JP):
+            self._sync_pc(last.address + last.size)
+            self._body.append(f"return {len(instructions)}")
+
+        return "\n".join(
+            [
+                f"def block_{start:#06x}(engine, counts):",
+                "    registers = engine._registers",
+                "    v = registers._general",
+                "    handlers = engine._handlers",
+                "    check_idle_loop = engine._check_idle_loop",
+                *(f"    {name} = {value}" for name, value in self._constants.items()),
+                "",
+                "    def run():",
+                *(f"        {line}" for line in self._body),
+                "",
+                "    return run",
+                "",
+            ]
+        )
+
+    def _write_instruction(self, idx: int) -> None:
+        instruction = self._instructions[idx]
+        lines = self._inline(instruction.opcode)
+        if lines is not None:
+            self._body.extend(lines)
+            return
+
+        # Handlers expect the PC on their instruction, and move to the next one
+        self._sync_pc(instruction.address)
+        opcode = instruction.opcode
+        self._constants[f"h{idx}"] = f"handlers[{type(opcode).__name__}]"
+        self._constants[f"o{idx}"] = opcode_source(opcode)
+        self._body.append(f"h{idx}(o{idx})")
+        self._pc = instruction.address + 2
+
+    def _write_skip_jump(self, idx: int, values: dict[int, str] | None = None) -> None:
+        """Write a skip and a jump as one conditional.
+
+        `values` maps registers to local variables already holding their value.
+        """
+        skip = self._instructions[idx]
+        jump = self._instructions[idx + 1]
+        assert isinstance(jump.opcode, opcodes.JP)
+
+        def value(register: int) -> str:
+            return (values or {}).get(register, f"v[{register}].value")
+
+        code = skip.opcode
+        if isinstance(code, (opcodes.SEB, opcodes.SNEB)):
+            left = value(code.register.value)
+            right = f"{code.byte.value:#04x}"
+        else:
+            assert isinstance(code, (opcodes.SE, opcodes.SNE))
+            left = value(code.register1.value)
+            right = value(code.register2.value)
+        operator = "==" if isinstance(code, (opcodes.SEB, opcodes.SE)) else "!="
+
+        target = jump.opcode.address.value
+        self._body.extend(
+            [
+                f"if {left} {operator} {right}:",
+                f"    registers._pc = {self._address(skip.address + 4)}",
+                f"    return {idx + 1}",
+            ]
+        )
+        if target < jump.address:
+            self._body.append(f"check_idle_loop({target:#06x}, {jump.address:#06x})")
+        self._body.extend(
+            [f"registers._pc = {self._address(target)}", f"return {idx + 2}"]
+        )
+
+    def _fuse_skip_jp(self, idx: int) -> None:
+        self._write_skip_jump(idx)
+
+    _fuse_seb_jp = _fuse_sneb_jp = _fuse_se_jp = _fuse_sne_jp = _fuse_skip_jp
+
+    def _fuse_addb_skip_jp(self, idx: int) -> None:
+        # The sum is kept in a local, so the skip does not read it back
+        code = self._instructions[idx].opcode
+        assert isinstance(code, opcodes.ADDB)
+        x = code.register.value
+        self._body.extend(
+            [f"t = (v[{x}].value + {code.byte.value:#04x}) & 0xFF", f"v[{x}] = Byte(t)"]
+        )
+        self._write_skip_jump(idx + 1, {x: "t"})
+
+    _fuse_addb_seb_jp = _fuse_addb_sneb_jp = _fuse_addb_skip_jp
+    _fuse_addb_se_jp = _fuse_addb_sne_jp = _fuse_addb_skip_jp
+
+    def _fuse_ldb_ldb(self, idx: int) -> None:
+        first = self._instructions[idx].opcode
+        second = self._instructions[idx + 1].opcode
+        assert isinstance(first, opcodes.LDB) and isinstance(second, opcodes.LDB)
+        x, y = first.register.value, second.register.value
+        if x == y:
+            self._body.append(f"v[{y}] = {self._byte(second.byte.value)}")
+            return
+        self._body.append(
+            f"v[{x}], v[{y}] = "
+            f"{self._byte(first.byte.value)}, {self._byte(second.byte.value)}"
+        )
+
+    def _fuse_ldi_drw(self, idx: int) -> None:
+        # The sprite address is known, so it is drawn without the DRW handler
+        load = self._instructions[idx].opcode
+        draw = self._instructions[idx + 1]
+        assert isinstance(load, opcodes.LDI) and isinstance(draw.opcode, opcodes.DRW)
+        address = load.address.value
+        height = draw.opcode.height.value
+        x = draw.opcode.register_x.value
+        y = draw.opcode.register_y.value
+        clip = self._quirks.draw_clipping
+
+        self._constants["display"] = "engine._display"
+        self._constants["view"] = "engine._memory._view"
+        self._body.extend(
+            [
+                f"registers._i = {self._address(address)}",
+                "if display._plane_mask == 3:",
+                "    t = display.draw_multiplane(",
+                f"        v[{x}].value, v[{y}].value,"
+                f" view[{address:#06x}:{address + height * 2:#06x}], clip={clip}",
+                "    )",
+                "else:",
+                "    t = display.draw(",
+                f"        v[{x}].value, v[{y}].value,"
+                f" view[{address:#06x}:{address + height:#06x}], clip={clip}",
+                "    )",
+                "v[15] = Byte(t)",
+            ]
+        )
+
+    def _inline(self, code: opcodes.OpCode) -> list[str] | None:
+        """Get inline lines for an opcode, or None to call its handler."""
+        if isinstance(code, opcodes.LDB):
+            x = code.register.value
+            return [f"v[{x}] = {self._byte(code.byte.value)}"]
+
+        elif isinstance(code, opcodes.ADDB):
+            x = code.register.value
+            return [f"v[{x}] = Byte(v[{x}].value + {code.byte.value:#04x})"]
+
+        elif isinstance(code, opcodes.LD):
+            return [f"v[{code.register1.value}] = v[{code.register2.value}]"]
+
+        elif isinstance(code, (opcodes.OR, opcodes.AND, opcodes.XOR)):
+            x, y = code.register1.value, code.register2.value
+            operator = BITWISE_OPERATORS[type(code)]
+            lines = [f"v[{x}] = Byte(v[{x}].value {operator} v[{y}].value)"]
+            if self._quirks.vf_reset:
+                lines.append(f"v[15] = {self._byte(0)}")
+            return lines
+
+        elif isinstance(code, opcodes.ADD):
+            x, y = code.register1.value, code.register2.value
+            return [
+                f"t = v[{x}].value + v[{y}].value",
+                f"v[{x}] = Byte(t)",
+                "v[15] = Byte(t > 0xFF)",
+            ]
+
+        elif isinstance(code, (opcodes.SUB, opcodes.SUBN)):
+            x, y = code.register1.value, code.register2.value
+            if isinstance(code, opcodes.SUB):
+                result, carry = "a - b", "a >= b"
+            else:
+                result, carry = "b - a", "a <= b"
+            return [
+                f"a = v[{x}].value",
+                f"b = v[{y}].value",
+                f"v[{x}] = Byte({result})",
+                f"v[15] = Byte({carry})",
+            ]
+
+        elif isinstance(code, (opcodes.SHR, opcodes.SHL)):
+            x, y = code.register1.value, code.register2.value
+            lines = [f"v[{x}] = v[{y}]"] if self._quirks.shift_y else []
+            if isinstance(code, opcodes.SHR):
+                result, carry = "a >> 1", "a & 1"
+            else:
+                result, carry = "a << 1", "a >> 7"
+            return lines + [
+                f"a = v[{x}].value",
+                f"v[{x}] = Byte({result})",
+                f"v[15] = Byte({carry})",
+            ]
+
+        elif isinstance(code, (opcodes.LDI, opcodes.LDIL)):
+            return [f"registers._i = {self._address(code.address.value)}"]
+
+        elif isinstance(code, opcodes.ADDI):
+            added = f"Address(registers._i.value + v[{code.register.value}].value)"
+            if not self._quirks.add_i_carry:
+                return [f"registers._i = {added}"]
+            return [
+                f"i = {added}",
+                "v[15] = Byte(i.value >= 0x1000)",
+                "registers._i = i",
+            ]
+
+        return None
+
+    def _sync_pc(self, address: int) -> None:
+        if self._pc != address:
+            self._body.append(f"registers._pc = {self._address(address)}")
+            self._pc = address
+
+    def _address(self, value: int) -> str:
+        name = f"a{value:04x}"
+        self._constants[name] = f"Address({value:#06x})"
+        return name
+
+    def _byte(self, value: int) -> str:
+        name = f"b{value:02x}"
+        self._constants[name] = f"Byte({value:#04x})"
+        return name
@@ -1,13 +1,11 @@
 from pathlib import Path
 
-from .types import Byte
-
 
 class Cartridge:
-    _data: list[Byte]
+    _data: bytes
 
     def __init__(self, data: bytes) -> None:
-        self._data = [Byte(d) for d in data]
+        self._data = bytes(data)
 
     @classmethod
     def from_path(cls, path: Path):
@@ -0,0 +1,69 @@
+from dataclasses import dataclass, field
+
+from .aot import TranslationCache, default_cache_directory
+from .engine import Engine
+from .fastcore import FastEngine
+from .mode import EmulationMode
+from .quirks import Quirks, QuirksMode
+
+
+@dataclass
+class EngineConfig:
+    """Options to create an engine, which can be sent to another process.
+
+    Quirks are set from the emulation mode, then overridden one by one
+    with `quirks`, then from `quirks_mode` if given.
+    """
+
+    emulation_mode: EmulationMode = EmulationMode.Chip8
+    quirks_mode: QuirksMode | None = None
+    # Quirk values, by Quirks attribute name
+    quirks: dict[str, bool] = field(default_factory=dict)
+    instructions_per_step: int | None = None
+    fast_core: bool = False
+    block_execution: bool = False
+    aot: bool = False
+
+    def validate(self) -> None:
+        """Check the options, without creating an engine."""
+        if self.fast_core and (self.block_execution or self.aot):
+            raise ValueError(
+                "Block execution and AOT are not supported by the fast core"
+            )
+
+        for name in self.quirks:
+            if name not in Quirks.__annotations__:
+                raise ValueError(f"Unknown quirk: {name}")
+
+    def create_engine(self) -> Engine | FastEngine:
+        self.validate()
+
+        engine = FastEngine() if self.fast_core else Engine()
+        if isinstance(engine, Engine):
+            engine.set_block_execution(self.block_execution)
+            if self.aot:
+                engine.set_translation_cache(
+                    TranslationCache(default_cache_directory())
+                )
+
+        # Apply mode
+        engine.set_emulation_mode(self.emulation_mode)
+
+        # Apply quirks
+        if self.emulation_mode == EmulationMode.Chip8:
+            engine.quirks.apply_mode(QuirksMode.Chip8)
+        elif self.emulation_mode == EmulationMode.SuperChip:
+            engine.quirks.apply_mode(QuirksMode.SuperChipModern)
+        elif self.emulation_mode == EmulationMode.XoChip:
+            engine.quirks.apply_mode(QuirksMode.XoChip)
+
+        for name, value in self.quirks.items():
+            setattr(engine.quirks, name, value)
+
+        if self.quirks_mode is not None:
+            engine.quirks.apply_mode(self.quirks_mode)
+
+        if self.instructions_per_step is not None:
+            engine.set_instructions_per_step(self.instructions_per_step)
+
+        return engine
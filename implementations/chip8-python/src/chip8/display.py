@@ -1,11 +1,77 @@
 import enum
 import logging
+from collections import OrderedDict
+from typing import Sequence
+
 from .types import Byte
 
 logger = logging.getLogger(__name__)
 
 
+def _double_bits(value: int) -> int:
+    doubled = 0
+    for bit in range(8):
+        if value & (1 << bit):
+            doubled |= 0b11 << (bit * 2)
+    return doubled
+
+
+# Sprite bytes with each pixel doubled, for LORES draws
+DOUBLED_BYTES = [_double_bits(value) for value in range(256)]
+
+
+def _spread_bits(value: int) -> int:
+    spread = 0
+    for bit in range(8):
+        if value & (1 << bit):
+            spread |= 1 << (bit * 8)
+    return spread
+
+
+# Bytes with each bit spread to a byte, for the frame buffer
+SPREAD_BYTES = [_spread_bits(value) for value in range(256)]
+
+
+def _double_row(row: int, size_x: int) -> int:
+    doubled = 0
+    for value in row.to_bytes(size_x // 8, "big"):
+        doubled = (doubled << 16) | DOUBLED_BYTES[value]
+    return doubled
+
+
+def _halve_row(row: int, size_x: int) -> int:
+    return int(format(row, f"0{size_x}b")[::2], 2)
+
+
+def _spread_row(row: int, size_x: int) -> int:
+    spread = 0
+    for value in row.to_bytes(size_x // 8, "big"):
+        spread = (spread << 64) | SPREAD_BYTES[value]
+    return spread
+
+
 class Display:
+    """Two-plane display, with each plane stored as rows of bits.
+
+    A row is an integer with its most significant bit as the leftmost
+    pixel, so a sprite row is drawn with a single shift and XOR, and
+    collisions are found with a single AND.
+
+    In LORES mode, rows are stored at the native 64x32 resolution, and
+    only scaled up to 128x64 when read. The display falls back to full
+    resolution rows when LORES content cannot be stored natively (HIRES
+    pixels left when switching to LORES, half-pixel legacy scrolls),
+    until the next clear.
+
+    Both planes are also composited in a frame buffer of 128x64 color
+    indices (plane 0 in bit 0, plane 1 in bit 1), which is updated from the
+    rows written since its last read.
+
+    Each change increments the frame version and extends the dirty row
+    range, so a renderer can skip unchanged frames and only redraw the rows
+    which changed since it last took the dirty rows.
+    """
+
     class Mode(enum.Enum):
         LORES = "lores"
         HIRES = "hires"
@@ -13,149 +79,208 @@ class Display:
     SCREEN_SIZE = (SCREEN_SIZE_X, SCREEN_SIZE_Y) = (128, 64)
     PLANES_COUNT = 2
 
-    _planes: list[list[int]]
+    # Number of expanded sprites kept in the mask cache
+    MASK_CACHE_SIZE = 256
+
+    _rows: list[list[int]]
     _plane_mask: int
     _mode: Mode
+    # 2 when rows are stored at the LORES resolution, 1 otherwise
+    _buffer_scale: int
+    _buffer_size_x: int
+    _buffer_size_y: int
+    _row_mask: int
+    # Placed sprite masks, keyed by sprite bytes, column, width, clipping,
+    # mode and buffer scale
+    _mask_cache: OrderedDict[tuple[bytes, int, int, bool, Mode, int], list[int]]
+    _mask_cache_hits: int
+    _mask_cache_misses: int
+    _frame: bytearray
+    # Screen rows written since the frame buffer was updated
+    _stale_top: int
+    _stale_bottom: int
+    _version: int
+    # Screen rows written since the dirty rows were last taken
+    _dirty_top: int
+    _dirty_bottom: int
 
     def __init__(self) -> None:
-        self._planes = [
-            [0 for _ in range(self.SCREEN_SIZE_X * self.SCREEN_SIZE_Y)]
-            for _ in range(self.PLANES_COUNT)
-        ]
         self._plane_mask = 0b01
         self._mode = self.Mode.LORES
+        self._set_buffer_scale(2)
+        self._rows = [
+            [0 for _ in range(self._buffer_size_y)] for _ in range(self.PLANES_COUNT)
+        ]
+        self._mask_cache = OrderedDict()
+        self._mask_cache_hits = 0
+        self._mask_cache_misses = 0
+        self._frame = bytearray(self.SCREEN_SIZE_X * self.SCREEN_SIZE_Y)
+        self._stale_top = self.SCREEN_SIZE_Y
+        self._stale_bottom = 0
+        self._version = 0
+        self._dirty_top = 0
+        self._dirty_bottom = self.SCREEN_SIZE_Y
+
+    @property
+    def version(self) -> int:
+        """Frame version, incremented on each display change."""
+        return self._version
+
+    def take_dirty_rows(self) -> range:
+        """Get the screen rows changed since the last call, and mark them clean.
+
+        Every row is dirty before the first call.
+        """
+        dirty = range(self._dirty_top, max(self._dirty_top, self._dirty_bottom))
+        self._dirty_top = self.SCREEN_SIZE_Y
+        self._dirty_bottom = 0
+        return dirty
 
     @property
     def planes(self) -> list[list[int]]:
-        return self._planes
+        """Pixels of each plane, as lists of 0 and 1, row after row."""
+        frame = self.frame_bytes()
+        return [
+            [index & 1 for index in frame],
+            [index >> 1 for index in frame],
+        ]
+
+    def frame_bytes(self) -> memoryview:
+        """Get the color index of each pixel, row after row, without copying.
+
+        Indices range from 0 to 3, with plane 0 in bit 0 and plane 1 in
+        bit 1. The view is only up to date until the next display change.
+        """
+        if self._stale_top < self._stale_bottom:
+            self._update_frame()
+        return memoryview(self._frame).toreadonly()
+
+    def mask_cache_stats(self) -> dict[str, int]:
+        """Get the hits and misses of the sprite mask cache."""
+        return {
+            "hits": self._mask_cache_hits,
+            "misses": self._mask_cache_misses,
+            "size": len(self._mask_cache),
+        }
 
     def set_mode(self, mode: Mode) -> None:
         self._mode = mode
+        if mode == self.Mode.HIRES:
+            self._scale_up()
+        else:
+            self._try_scale_down()
 
     def reset(self) -> None:
-        for plane_idx in range(self.PLANES_COUNT):
-            self._clear_plane(plane_idx)
-
         self._plane_mask = 0b1
         self._mode = self.Mode.LORES
+        self._set_buffer_scale(2)
+
+        for plane_idx in range(self.PLANES_COUNT):
+            self._clear_plane(plane_idx)
+        self._mark_stale(0, self.SCREEN_SIZE_Y)
 
     def clear(self) -> None:
         for plane_idx in self._plane_mask_to_indices():
             self._clear_plane(plane_idx)
+        self._mark_stale(0, self.SCREEN_SIZE_Y)
+
+        if self._mode == self.Mode.LORES:
+            self._try_scale_down()
 
     def set_plane_mask(self, mask: Byte) -> None:
         assert mask.value >= 0 and mask.value <= 3
 
         self._plane_mask = mask.value
 
-    def draw(self, x: int, y: int, sprite: list[Byte], *, clip: bool = True) -> bool:
+    def draw(self, x: int, y: int, sprite: Sequence[int], *, clip: bool = True) -> bool:
         collision = False
         for plane_idx in self._plane_mask_to_indices()[:1]:
-            plane = self._planes[plane_idx]
-            if self._draw_plane(plane, x, y, sprite, clip=clip):
+            rows = self._rows[plane_idx]
+            if self._draw_plane(rows, x, y, sprite, clip=clip):
                 collision = True
         return collision
 
     def draw_multiplane(
-        self, x: int, y: int, sprite_dual: list[Byte], *, clip: bool = True
+        self, x: int, y: int, sprite_dual: Sequence[int], *, clip: bool = True
     ) -> bool:
         collision = self._draw_plane(
-            self._planes[0], x, y, sprite_dual[: len(sprite_dual) // 2], clip=clip
+            self._rows[0], x, y, sprite_dual[: len(sprite_dual) // 2], clip=clip
         )
         collision |= self._draw_plane(
-            self._planes[1], x, y, sprite_dual[len(sprite_dual) // 2 :], clip=clip
+            self._rows[1], x, y, sprite_dual[len(sprite_dual) // 2 :], clip=clip
         )
         return collision
 
     def super_draw(
-        self, x: int, y: int, sprite: list[Byte], *, clip: bool = True
+        self, x: int, y: int, sprite: Sequence[int], *, clip: bool = True
     ) -> bool:
         collision = False
         for plane_idx in self._plane_mask_to_indices()[:1]:
-            plane = self._planes[plane_idx]
-            if self._super_draw_plane(plane, x, y, sprite, clip=clip):
+            rows = self._rows[plane_idx]
+            if self._super_draw_plane(rows, x, y, sprite, clip=clip):
                 collision = True
         return collision
 
     def super_draw_multiplane(
-        self, x: int, y: int, sprite_dual: list[Byte], *, clip: bool = True
+        self, x: int, y: int, sprite_dual: Sequence[int], *, clip: bool = True
     ) -> bool:
         collision = self._super_draw_plane(
-            self._planes[0], x, y, sprite_dual[: len(sprite_dual) // 2], clip=clip
+            self._rows[0], x, y, sprite_dual[: len(sprite_dual) // 2], clip=clip
         )
         collision |= self._super_draw_plane(
-            self._planes[1], x, y, sprite_dual[len(sprite_dual) // 2 :], clip=clip
+            self._rows[1], x, y, sprite_dual[len(sprite_dual) // 2 :], clip=clip
         )
         return collision
 
     def scroll_right(self, *, legacy_mode: bool) -> None:
+        count = self._scroll_columns(legacy_mode)
         for plane_idx in self._plane_mask_to_indices():
-            plane = self._planes[plane_idx]
-
-            amount = 4
-            if self._mode == self.Mode.LORES:
-                if not legacy_mode:
-                    amount *= 2
-
-            for y in range(self.SCREEN_SIZE_Y - 1, -1, -1):
-                for x in range(self.SCREEN_SIZE_X - 1, -1, -1):
-                    src_index = self._xy_to_index(x, y)
-                    dst_index = self._xy_to_index(x - amount, y)
-                    plane[src_index] = plane[dst_index] if dst_index >= 0 else 0
+            rows = self._rows[plane_idx]
+            rows[:] = [row >> count for row in rows]
+        self._mark_stale(0, self.SCREEN_SIZE_Y)
 
     def scroll_left(self, *, legacy_mode: bool) -> None:
+        count = self._scroll_columns(legacy_mode)
+        row_mask = self._row_mask
         for plane_idx in self._plane_mask_to_indices():
-            plane = self._planes[plane_idx]
-
-            amount = 4
-            if self._mode == self.Mode.LORES:
-                if not legacy_mode:
-                    amount *= 2
-
-            for y in range(self.SCREEN_SIZE_Y):
-                for x in range(self.SCREEN_SIZE_X):
-                    src_index = self._xy_to_index(x, y)
-                    dst_index = self._xy_to_index(x + amount, y)
-                    plane[src_index] = (
-                        plane[dst_index]
-                        if dst_index < self.SCREEN_SIZE_X * self.SCREEN_SIZE_Y
-                        else 0
-                    )
+            rows = self._rows[plane_idx]
+            rows[:] = [(row << count) & row_mask for row in rows]
+        self._mark_stale(0, self.SCREEN_SIZE_Y)
 
     def scroll_down(self, amount: Byte, *, legacy_mode: bool) -> None:
         assert amount >= 0 and amount < 16
 
-        for plane_idx in self._plane_mask_to_indices():
-            plane = self._planes[plane_idx]
-
-            if self._mode == self.Mode.LORES:
-                if not legacy_mode:
-                    amount *= 2
+        if self._mode == self.Mode.LORES:
+            if not legacy_mode:
+                amount *= 2
 
-            for y in range(self.SCREEN_SIZE_Y - 1, -1, -1):
-                for x in range(self.SCREEN_SIZE_X - 1, -1, -1):
-                    src_index = self._xy_to_index(x, y)
-                    dst_index = self._xy_to_index(x, y - amount.value)
-                    plane[src_index] = plane[dst_index] if dst_index >= 0 else 0
+        count = self._buffer_row_count(amount.value)
+        for plane_idx in self._plane_mask_to_indices():
+            rows = self._rows[plane_idx]
+            rows[:] = [0] * count + rows[: self._buffer_size_y - count]
+        self._mark_stale(0, self.SCREEN_SIZE_Y)
 
     def scroll_up(self, amount: Byte) -> None:
         assert amount >= 0 and amount < 16
 
-        for plane_idx in self._plane_mask_to_indices():
-            plane = self._planes[plane_idx]
+        if self._mode == self.Mode.LORES:
+            amount *= 2
 
-            if self._mode == self.Mode.LORES:
+        count = self._buffer_row_count(amount.value)
+        for plane_idx in self._plane_mask_to_indices():
+            rows = self._rows[plane_idx]
+            rows[:] = rows[count:] + [0] * count
+        self._mark_stale(0, self.SCREEN_SIZE_Y)
+
+    def _scroll_columns(self, legacy_mode: bool) -> int:
+        """Get the amount of buffer columns moved by a horizontal scroll."""
+        amount = 4
+        if self._mode == self.Mode.LORES:
+            if not legacy_mode:
                 amount *= 2
 
-            for y in range(self.SCREEN_SIZE_Y):
-                for x in range(self.SCREEN_SIZE_X):
-                    src_index = self._xy_to_index(x, y)
-                    dst_index = self._xy_to_index(x, y + amount.value)
-                    plane[src_index] = (
-                        plane[dst_index]
-                        if dst_index < self.SCREEN_SIZE_X * self.SCREEN_SIZE_Y
-                        else 0
-                    )
+        # Always a whole number of LORES pixels
+        return amount // self._buffer_scale
 
     def _draw_factor(self) -> int:
         return 2 if self._mode == self.Mode.LORES else 1
@@ -169,108 +294,208 @@ class Display:
             return [0, 1]
 
     def _clear_plane(self, plane_idx: int) -> None:
-        for x in range(len(self._planes[plane_idx])):
-            self._planes[plane_idx][x] = 0
+        self._rows[plane_idx][:] = [0] * self._buffer_size_y
+
+    def _mark_stale(self, top: int, bottom: int) -> None:
+        """Mark screen rows (top..bottom) as changed, in a new frame version."""
+        if top < self._stale_top:
+            self._stale_top = top
+        if bottom > self._stale_bottom:
+            self._stale_bottom = bottom
+        if top < self._dirty_top:
+            self._dirty_top = top
+        if bottom > self._dirty_bottom:
+            self._dirty_bottom = bottom
+
+        self._version += 1
+
+    def _update_frame(self) -> None:
+        """Composite the rows written since the last update in the frame buffer."""
+        size_x = self.SCREEN_SIZE_X
+        scale = self._buffer_scale
+        rows0, rows1 = self._rows
+        for row_y in range(self._stale_top // scale, -(-self._stale_bottom // scale)):
+            row0 = rows0[row_y]
+            row1 = rows1[row_y]
+            if scale == 2:
+                row0 = _double_row(row0, self._buffer_size_x)
+                row1 = _double_row(row1, self._buffer_size_x)
+
+            indices = _spread_row(row0, size_x) | (_spread_row(row1, size_x) << 1)
+            line = indices.to_bytes(size_x, "big")
+            for screen_y in range(row_y * scale, (row_y + 1) * scale):
+                self._frame[screen_y * size_x : (screen_y + 1) * size_x] = line
+
+        self._stale_top = self.SCREEN_SIZE_Y
+        self._stale_bottom = 0
+
+    def _set_buffer_scale(self, scale: int) -> None:
+        self._buffer_scale = scale
+        self._buffer_size_x = self.SCREEN_SIZE_X // scale
+        self._buffer_size_y = self.SCREEN_SIZE_Y // scale
+        self._row_mask = (1 << self._buffer_size_x) - 1
+
+    def _buffer_row_count(self, count: int) -> int:
+        """Convert a count of screen rows to buffer rows, for vertical scrolls."""
+        if count % self._buffer_scale:
+            # Half LORES pixel
+            self._scale_up()
+        return min(count // self._buffer_scale, self._buffer_size_y)
+
+    def _full_rows(self, plane_idx: int) -> list[int]:
+        """Get the rows of a plane, at full resolution."""
+        rows = self._rows[plane_idx]
+        if self._buffer_scale == 1:
+            return rows
+
+        full_rows = []
+        for row in rows:
+            full_row = _double_row(row, self._buffer_size_x)
+            full_rows.append(full_row)
+            full_rows.append(full_row)
+        return full_rows
+
+    def _scale_up(self) -> None:
+        if self._buffer_scale == 1:
+            return
+
+        self._rows = [
+            self._full_rows(plane_idx) for plane_idx in range(self.PLANES_COUNT)
+        ]
+        self._set_buffer_scale(1)
+
+    def _try_scale_down(self) -> None:
+        """Store rows at the LORES resolution, if they are made of LORES pixels."""
+        if self._buffer_scale == 2:
+            return
+
+        size_x = self.SCREEN_SIZE_X
+        native_rows = []
+        for rows in self._rows:
+            native = [_halve_row(row, size_x) for row in rows[::2]]
+            for row_y, row in enumerate(native):
+                full_row = _double_row(row, size_x // 2)
+                if rows[row_y * 2] != full_row or rows[row_y * 2 + 1] != full_row:
+                    return
+            native_rows.append(native)
+
+        self._rows = native_rows
+        self._set_buffer_scale(2)
 
     def _draw_plane(
-        self, plane: list[int], x: int, y: int, sprite: list[Byte], *, clip: bool = True
-    ) -> bool:
-        factor = self._draw_factor()
-
-        if x * factor >= self.SCREEN_SIZE_X or y * factor >= self.SCREEN_SIZE_Y:
-            # Disable clipping if initially out of bounds
-            clip = False
-
-        collision = False
-        for line_idx, line in enumerate(sprite):
-            if self._draw_line(
-                plane,
-                x * factor,
-                y * factor + line_idx * factor,
-                line.value,
-                factor=factor,
-                clip=clip,
-            ):
-                collision = True
-
-        return collision
-
-    def _draw_line(
-        self, plane: list[int], x: int, y: int, value: int, *, factor: int, clip: bool
+        self,
+        rows: list[int],
+        x: int,
+        y: int,
+        sprite: Sequence[int],
+        *,
+        clip: bool = True,
     ) -> bool:
-        line_size = 8
-
-        global_collision = False
-        for i in range(line_size):
-            pixel_value = (value & (0b1 << (line_size - i - 1))) >> (line_size - i - 1)
-            if self._draw_pixel(
-                plane, x + i * factor, y, pixel_value, factor=factor, clip=clip
-            ):
-                global_collision = True
-
-        return global_collision
-
-    def _draw_pixel(
-        self, plane: list[int], x: int, y: int, value: int, *, factor: int, clip: bool
-    ) -> bool:
-        if clip and (x >= self.SCREEN_SIZE_X or y >= self.SCREEN_SIZE_Y):
-            return False
-
-        collision = False
-
-        for oy in range(factor):
-            for ox in range(factor):
-                index = self._xy_to_index(
-                    (x + ox) % self.SCREEN_SIZE_X, (y + oy) % self.SCREEN_SIZE_Y
-                )
-                existing = plane[index]
-                if existing == 1 and value == 1:
-                    collision = True
-
-                plane[index] ^= value
-
-        return collision
+        return self._draw_sprite(rows, x, y, sprite, width=8, clip=clip)
 
     def _super_draw_plane(
-        self, plane: list[int], x: int, y: int, sprite: list[Byte], *, clip: bool = True
+        self,
+        rows: list[int],
+        x: int,
+        y: int,
+        sprite: Sequence[int],
+        *,
+        clip: bool = True,
     ) -> bool:
-        factor = self._draw_factor()
-
-        if x * factor >= self.SCREEN_SIZE_X or y * factor >= self.SCREEN_SIZE_Y:
+        return self._draw_sprite(rows, x, y, sprite, width=16, clip=clip)
+
+    def _draw_sprite(
+        self,
+        rows: list[int],
+        x: int,
+        y: int,
+        sprite: Sequence[int],
+        *,
+        width: int,
+        clip: bool,
+    ) -> bool:
+        """XOR a sprite of a given width on rows, at screen coordinates.
+
+        Each sprite line covers as many rows as the draw factor. Pixels are
+        clipped at the right and bottom edges, except when the sprite starts
+        out of the screen, where clipping is disabled and pixels wrap around.
+        """
+        size_y = self._buffer_size_y
+        factor = self._draw_factor() // self._buffer_scale
+        x *= factor
+        y *= factor
+
+        if x >= self._buffer_size_x or y >= size_y:
+            # Disable clipping if initially out of bounds
             clip = False
 
-        sprite_lines = []
-        current_line = []
-        for line_idx, line in enumerate(sprite):
-            current_line.append(line)
-            if line_idx % 2 == 1:
-                sprite_lines.append(current_line)
-                current_line = []
+        masks = self._sprite_masks(sprite, x, width, clip)
+        bottom = y + len(masks) * factor
+        if bottom <= size_y:
+            self._mark_stale(y * self._buffer_scale, bottom * self._buffer_scale)
+        elif clip:
+            self._mark_stale(y * self._buffer_scale, self.SCREEN_SIZE_Y)
+        else:
+            self._mark_stale(0, self.SCREEN_SIZE_Y)
 
         collision = False
-        for line_idx, line in enumerate(sprite_lines):
-            half_1, half_2 = line
-            if self._draw_line(
-                plane,
-                x * factor,
-                y * factor + line_idx * factor,
-                half_1.value,
-                factor=factor,
-                clip=clip,
-            ):
-                collision = True
-
-            if self._draw_line(
-                plane,
-                x * factor + 8 * factor,
-                y * factor + line_idx * factor,
-                half_2.value,
-                factor=factor,
-                clip=clip,
-            ):
-                collision = True
+        for line_idx, mask in enumerate(masks):
+            if not mask:
+                continue
+
+            for offset_y in range(factor):
+                row_y = y + line_idx * factor + offset_y
+                if clip and row_y >= size_y:
+                    return collision
+                row_y %= size_y
+
+                row = rows[row_y]
+                if row & mask:
+                    collision = True
+                rows[row_y] = row ^ mask
 
         return collision
 
-    def _xy_to_index(self, x: int, y: int) -> int:
-        return x + y * self.SCREEN_SIZE_X
+    def _sprite_masks(
+        self, sprite: Sequence[int], x: int, width: int, clip: bool
+    ) -> list[int]:
+        """Get the row masks of a sprite placed at a buffer column.
+
+        Masks are cached by sprite contents, so the cache stays valid when
+        the memory the sprite was read from is written.
+        """
+        key = (bytes(sprite), x, width, clip, self._mode, self._buffer_scale)
+        masks = self._mask_cache.get(key)
+        if masks is not None:
+            self._mask_cache_hits += 1
+            self._mask_cache.move_to_end(key)
+            return masks
+
+        self._mask_cache_misses += 1
+        data = key[0]
+        factor = self._draw_factor() // self._buffer_scale
+        if width == 8:
+            lines = list(data)
+        else:
+            halves = range(0, len(data) - 1, 2)
+            lines = [(data[idx] << 8) | data[idx + 1] for idx in halves]
+        if factor == 2:
+            lines = [_double_row(line, width) for line in lines]
+            width *= 2
+
+        size_x = self._buffer_size_x
+        masks = []
+        for line in lines:
+            if clip:
+                shift = size_x - width - x
+                mask = line << shift if shift >= 0 else line >> -shift
+            else:
+                # Place the line on two screen widths, then fold them back
+                placed = line << (2 * size_x - width - x % size_x)
+                mask = (placed >> size_x) | (placed & self._row_mask)
+            masks.append(mask)
+
+        self._mask_cache[key] = masks
+        if len(self._mask_cache) > self.MASK_CACHE_SIZE:
+            self._mask_cache.popitem(last=False)
+        return masks
@@ -1,6 +1,8 @@
 import enum
 import logging
 from random import Random
+from types import MethodType
+from typing import Any, Callable, ClassVar
 
 from .mode import EmulationMode
 from .audio import Audio
@@ -15,7 +17,9 @@ from .timers import Timers
 from .cartridge import Cartridge
 from .quirks import Quirks
 from .types import Address, Register, Byte
-from . import opcodes
+from .blocks import BlockCache
+from .aot import TranslationCache
+from . import opcodes, savestate
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +33,7 @@ class StepResult(enum.Enum):
     BadOpCode = enum.auto()
     Exit = enum.auto()
     DisplayWait = enum.auto()
+    Idle = enum.auto()
 
 
 class Engine:
@@ -42,13 +47,26 @@ class Engine:
     _quirks: Quirks
     _keypad: Keypad
     _ticks: int
+    _idle: bool
+    _idle_steps: int
+    _waiting_for_key: bool
     _instructions_per_step: int
     _emulation_mode: EmulationMode
+    _handlers: dict[type[opcodes.OpCode], Callable[[Any], None]]
+    _handlers_key: tuple[bool, ...]
+    _display_wait_opcodes: tuple[type[opcodes.OpCode], ...]
+    _block_cache: BlockCache | None
+    _translation_cache: TranslationCache | None
 
     on_loop: Signal
     on_exit: Signal
     on_audio_update: Signal
 
+    # Handlers specialized for each quirks configuration met so far
+    _handler_sets: ClassVar[
+        dict[tuple[bool, ...], dict[type[opcodes.OpCode], Callable[..., None]]]
+    ] = {}
+
     def __init__(self) -> None:
         self._audio = Audio()
         self._display = Display()
@@ -60,18 +78,76 @@ class Engine:
         self._quirks = Quirks()
         self._timers = Timers()
         self._ticks = 0
+        self._idle = False
+        self._idle_steps = 0
+        self._waiting_for_key = False
         self._instructions_per_step = 10
         self._emulation_mode = EmulationMode.Chip8
+        self._handlers = {}
+        self._handlers_key = ()
+        self._display_wait_opcodes = ()
+        self._sync_quirks()
+        self._block_cache = None
+        self._translation_cache = None
 
         self.on_exit = Signal()
         self.on_loop = Signal()
         self.on_audio_update = Signal()
 
+        self._memory.on_store.connect(self._on_memory_store)
+        self._keypad.on_release.connect(self._on_key_release)
+
         self.reset()
 
     def set_emulation_mode(self, mode: EmulationMode) -> None:
         self._emulation_mode = mode
 
+    def set_block_execution(self, enabled: bool) -> None:
+        """Run straight-line code as compiled blocks instead of one by one."""
+        self._block_cache = BlockCache(self) if enabled else None
+
+    def set_translation_cache(self, cache: TranslationCache | None) -> None:
+        """Use ahead-of-time translations of cartridges, from a cache.
+
+        Enables block execution, with blocks of the loaded cartridges
+        read from the cache (or translated then stored on first load).
+        """
+        self._translation_cache = cache
+        if cache is not None and self._block_cache is None:
+            self.set_block_execution(True)
+
+    def fusion_stats(self) -> dict[str, int]:
+        """Get how many times each superinstruction was executed.
+
+        Superinstructions are only used with block execution.
+        """
+        if self._block_cache is None:
+            return {}
+        return self._block_cache.fusion_stats()
+
+    def save_state(self) -> bytes:
+        """Snapshot the state of the engine, as a binary blob.
+
+        See `savestate` for the format.
+        """
+        return savestate.save_state(self)
+
+    def restore_state(self, data: bytes) -> None:
+        """Restore the state of the engine, from `save_state`."""
+        savestate.restore_state(self, data)
+
+    @classmethod
+    def load_state(cls, data: bytes) -> "Engine":
+        """Create an engine from a state, from `save_state`."""
+        engine = cls()
+        engine.restore_state(data)
+        return engine
+
+    def __reduce__(self) -> tuple[Callable[[bytes], "Engine"], tuple[bytes]]:
+        # Pickled as a state: signal connections and the translation cache
+        # are not sent
+        return (Engine.load_state, (self.save_state(),))
+
     def reset(self) -> None:
         self._audio.reset()
         self._display.reset()
@@ -81,6 +157,12 @@ class Engine:
         self._keypad.reset()
         self._timers.reset()
         self._ticks = 0
+        self._idle = False
+        self._idle_steps = 0
+        self._waiting_for_key = False
+
+        if self._block_cache is not None:
+            self._block_cache.clear()
 
         self._memory.store_font(Font.get_default())
         self._memory.store_super_font(Font.get_super_default())
@@ -88,6 +170,14 @@ class Engine:
     def load_cartridge(self, cartridge: Cartridge) -> None:
         self._memory.store_cartridge(cartridge)
 
+        if self._translation_cache is not None and self._block_cache is not None:
+            self._sync_quirks()
+            self._block_cache.sync_quirks()
+            self._block_cache.set_length_limit(self._get_instructions_count_per_step())
+            blocks = self._translation_cache.load(cartridge._data, self)
+            for start, (end, length, factory) in blocks.items():
+                self._block_cache.install(start, end, length, factory)
+
     def step_timers(self) -> None:
         self._keypad.step()
         self._timers.step()
@@ -107,7 +197,36 @@ class Engine:
     def quirks(self) -> Quirks:
         return self._quirks
 
+    @property
+    def idle_steps(self) -> int:
+        """Number of steps which ended early, on an idle loop or a key wait."""
+        return self._idle_steps
+
+    @property
+    def waiting_for_key(self) -> bool:
+        """Whether an LDK is parked until a key is released."""
+        return self._waiting_for_key
+
     def step(self) -> StepResult:
+        """Run the instructions of a frame.
+
+        Returns StepResult.Idle when the frame ended early, because the
+        program waits for the delay timer or a key: nothing would change
+        until the timers are stepped or keys are set.
+
+        While an LDK waits for a key, steps return right away, until a key
+        is released on the keypad.
+        """
+        if self._waiting_for_key:
+            self._idle_steps += 1
+            return StepResult.Idle
+
+        self._sync_quirks()
+        self._idle = False
+
+        if self._block_cache is not None:
+            return self._step_blocks(self._block_cache)
+
         for idx in range(self._get_instructions_count_per_step()):
             res = self._step_instruction(idx)
             if res == StepResult.DisplayWait:
@@ -119,6 +238,40 @@ class Engine:
 
         return StepResult.Success
 
+    def _step_blocks(self, block_cache: BlockCache) -> StepResult:
+        block_cache.sync_quirks()
+
+        count = self._get_instructions_count_per_step()
+        block_cache.set_length_limit(count)
+        idx = 0
+        # Once a block does not fit in the rest of the step, the rest is run
+        # one by one: blocks starting there would only be parts of that one.
+        blocks = True
+        while idx < count:
+            block = block_cache.get(self._registers.pc.value) if blocks else None
+            if block is not None and block.length <= count - idx:
+                executed = block.run()
+                idx += executed
+                self._ticks += executed
+                if self._idle:
+                    self._idle_steps += 1
+                    return StepResult.Idle
+                continue
+            elif block is not None:
+                blocks = False
+
+            res = self._step_instruction(idx)
+            if res == StepResult.DisplayWait:
+                # Stop here and wait for next frame
+                break
+
+            elif res != StepResult.Success:
+                return res
+
+            idx += 1
+
+        return StepResult.Success
+
     def _get_instructions_count_per_step(self) -> int:
         if self._emulation_mode == EmulationMode.Chip8:
             return self._instructions_per_step
@@ -132,9 +285,11 @@ class Engine:
     def _step_instruction(self, idx: int) -> StepResult:
         # Read opcode
         int_code = self._memory.read_opcode(self._registers.pc)
-        code = opcodes.parse_opcode(int_code)
+        code = opcodes.DECODE_TABLE[int_code]
 
-        logging.info(f" [step] PC={self._registers.pc} int_code={int_code} code={code}")
+        logging.info(
+            f" [step] PC={self._registers.pc} int_code={int_code:04X} code={code}"
+        )
 
         if code is None:
             return StepResult.BadOpCode
@@ -144,7 +299,7 @@ class Engine:
             # Interpret next code as an address
             self._registers.increment_pc()
             address = self._memory.read_opcode(self._registers.pc)
-            code.address = address
+            code = opcodes.LONG_ADDRESS_TABLE[address]
 
         # Check exit
         if isinstance(code, opcodes.EXIT):
@@ -159,408 +314,635 @@ class Engine:
                 return StepResult.Loop
 
         # Check display wait
-        if (
-            self.quirks.display_wait
-            and idx > 0
-            and isinstance(code, (opcodes.DRW, opcodes.SDRW))
-        ):
+        if idx > 0 and isinstance(code, self._display_wait_opcodes):
             return StepResult.DisplayWait
 
-        self._process_opcode(code)
+        self._handlers[type(code)](code)
         self._ticks += 1
 
+        if self._idle:
+            self._idle_steps += 1
+            return StepResult.Idle
+
         return StepResult.Success
 
+    def _on_key_release(self, key: Byte) -> None:
+        # Run the parked LDK again on next step, to read the released key
+        self._waiting_for_key = False
+
+    def _on_memory_store(self, start: int, count: int) -> None:
+        if self._block_cache is not None:
+            self._block_cache.invalidate(start, count)
+
+    def _sync_quirks(self) -> None:
+        """Switch to the handlers specialized for the current quirks.
+
+        Quirks are resolved once when selecting the handlers, so handlers
+        never check them while running.
+        """
+        key = self._quirks.as_tuple()
+        if key == self._handlers_key:
+            return
+
+        handler_set = Engine._handler_sets.get(key)
+        if handler_set is None:
+            handler_set = Engine._select_handlers(self._quirks)
+            Engine._handler_sets[key] = handler_set
+
+        self._handlers = {
+            cls: MethodType(handler, self) for cls, handler in handler_set.items()
+        }
+        self._handlers_key = key
+        self._display_wait_opcodes = (
+            (opcodes.DRW, opcodes.SDRW) if self._quirks.display_wait else ()
+        )
+
+    @staticmethod
+    def _select_handlers(
+        quirks: Quirks,
+    ) -> dict[type[opcodes.OpCode], Callable[..., None]]:
+        return {
+            opcodes.SYS: Engine._process_sys,
+            opcodes.CLS: Engine._process_cls,
+            opcodes.LORES: Engine._process_lores,
+            opcodes.HIRES: Engine._process_hires,
+            opcodes.SCRLLFT: (
+                Engine._process_scrllft_legacy
+                if quirks.legacy_scrolling
+                else Engine._process_scrllft
+            ),
+            opcodes.SCRLRGHT: (
+                Engine._process_scrlrght_legacy
+                if quirks.legacy_scrolling
+                else Engine._process_scrlrght
+            ),
+            opcodes.SCRLDWN: (
+                Engine._process_scrldwn_legacy
+                if quirks.legacy_scrolling
+                else Engine._process_scrldwn
+            ),
+            opcodes.SCRLUP: Engine._process_scrlup,
+            opcodes.SRGI: Engine._process_srgi,
+            opcodes.LRGI: Engine._process_lrgi,
+            opcodes.LDIL: Engine._process_ldil,
+            opcodes.PLN: Engine._process_pln,
+            opcodes.AUD: Engine._process_aud,
+            opcodes.PTCH: Engine._process_ptch,
+            opcodes.RET: Engine._process_ret,
+            opcodes.JP: Engine._process_jp,
+            opcodes.CALL: Engine._process_call,
+            opcodes.SEB: Engine._process_seb,
+            opcodes.SNEB: Engine._process_sneb,
+            opcodes.SE: Engine._process_se,
+            opcodes.LDB: Engine._process_ldb,
+            opcodes.ADDB: Engine._process_addb,
+            opcodes.LD: Engine._process_ld,
+            opcodes.OR: (
+                Engine._process_or_vf_reset if quirks.vf_reset else Engine._process_or
+            ),
+            opcodes.AND: (
+                Engine._process_and_vf_reset if quirks.vf_reset else Engine._process_and
+            ),
+            opcodes.XOR: (
+                Engine._process_xor_vf_reset if quirks.vf_reset else Engine._process_xor
+            ),
+            opcodes.ADD: Engine._process_add,
+            opcodes.SUB: Engine._process_sub,
+            opcodes.SHR: (
+                Engine._process_shr_shift_y if quirks.shift_y else Engine._process_shr
+            ),
+            opcodes.SUBN: Engine._process_subn,
+            opcodes.SHL: (
+                Engine._process_shl_shift_y if quirks.shift_y else Engine._process_shl
+            ),
+            opcodes.SNE: Engine._process_sne,
+            opcodes.LDI: Engine._process_ldi,
+            opcodes.JPOFST: (
+                Engine._process_jpofst_jump_vx
+                if quirks.jump_vx
+                else Engine._process_jpofst
+            ),
+            opcodes.RND: Engine._process_rnd,
+            opcodes.DRW: (
+                Engine._process_drw_clipping
+                if quirks.draw_clipping
+                else Engine._process_drw
+            ),
+            opcodes.SDRW: (
+                Engine._process_sdrw_clipping
+                if quirks.draw_clipping
+                else Engine._process_sdrw
+            ),
+            opcodes.SKP: Engine._process_skp,
+            opcodes.SKNP: Engine._process_sknp,
+            opcodes.LDLY: Engine._process_ldly,
+            opcodes.LDK: Engine._process_ldk,
+            opcodes.SDLY: Engine._process_sdly,
+            opcodes.SSND: Engine._process_ssnd,
+            opcodes.ADDI: (
+                Engine._process_addi_carry
+                if quirks.add_i_carry
+                else Engine._process_addi
+            ),
+            opcodes.LDF: Engine._process_ldf,
+            opcodes.SLDF: Engine._process_sldf,
+            opcodes.LDBCD: Engine._process_ldbcd,
+            opcodes.SRG: (
+                Engine._process_srg_index_increment
+                if quirks.index_increment
+                else Engine._process_srg
+            ),
+            opcodes.LRG: (
+                Engine._process_lrg_index_increment
+                if quirks.index_increment
+                else Engine._process_lrg
+            ),
+            opcodes.SRGF: Engine._process_srgf,
+            opcodes.LRGF: Engine._process_lrgf,
+        }
+
     def _process_opcode(self, opcode: opcodes.OpCode) -> None:
-        if isinstance(opcode, opcodes.SYS):
-            print(f"Unsupported SYS opcode: {opcode}")
-            self._registers.increment_pc()
+        self._sync_quirks()
+        self._handlers[type(opcode)](opcode)
+
+    def _process_sys(self, opcode: opcodes.SYS) -> None:
+        logger.warning(f"Unsupported SYS opcode: {opcode}")
+        self._registers.increment_pc()
+
+    def _process_cls(self, opcode: opcodes.CLS) -> None:
+        self._display.clear()
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.CLS):
-            self._display.clear()
-            self._registers.increment_pc()
+    def _process_lores(self, opcode: opcodes.LORES) -> None:
+        self._display.set_mode(Display.Mode.LORES)
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.LORES):
-            self._display.set_mode(Display.Mode.LORES)
-            self._registers.increment_pc()
+    def _process_hires(self, opcode: opcodes.HIRES) -> None:
+        self._display.set_mode(Display.Mode.HIRES)
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.HIRES):
-            self._display.set_mode(Display.Mode.HIRES)
-            self._registers.increment_pc()
+    def _process_scrllft(self, opcode: opcodes.SCRLLFT) -> None:
+        self._display.scroll_left(legacy_mode=False)
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.SCRLLFT):
-            self._display.scroll_left(legacy_mode=self._quirks.legacy_scrolling)
-            self._registers.increment_pc()
+    def _process_scrllft_legacy(self, opcode: opcodes.SCRLLFT) -> None:
+        self._display.scroll_left(legacy_mode=True)
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.SCRLRGHT):
-            self._display.scroll_right(legacy_mode=self._quirks.legacy_scrolling)
-            self._registers.increment_pc()
+    def _process_scrlrght(self, opcode: opcodes.SCRLRGHT) -> None:
+        self._display.scroll_right(legacy_mode=False)
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.SCRLDWN):
-            self._display.scroll_down(
-                opcode.height, legacy_mode=self._quirks.legacy_scrolling
-            )
-            self._registers.increment_pc()
+    def _process_scrlrght_legacy(self, opcode: opcodes.SCRLRGHT) -> None:
+        self._display.scroll_right(legacy_mode=True)
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.SCRLUP):
-            self._display.scroll_up(opcode.height)
+    def _process_scrldwn(self, opcode: opcodes.SCRLDWN) -> None:
+        self._display.scroll_down(opcode.height, legacy_mode=False)
+        self._registers.increment_pc()
+
+    def _process_scrldwn_legacy(self, opcode: opcodes.SCRLDWN) -> None:
+        self._display.scroll_down(opcode.height, legacy_mode=True)
+        self._registers.increment_pc()
+
+    def _process_scrlup(self, opcode: opcodes.SCRLUP) -> None:
+        self._display.scroll_up(opcode.height)
+        self._registers.increment_pc()
+
+    def _process_srgi(self, opcode: opcodes.SRGI) -> None:
+        assert opcode.min_register.value <= opcode.max_register.value
+
+        registers = range(opcode.min_register.value, opcode.max_register.value + 1)
+        self._memory.store_memory(
+            self._registers.i,
+            bytes(self._registers.get_vx(Register(x)) for x in registers),
+        )
+
+        self._registers.increment_pc()
+
+    def _process_lrgi(self, opcode: opcodes.LRGI) -> None:
+        assert opcode.min_register.value <= opcode.max_register.value
+
+        size = opcode.max_register.value - opcode.min_register.value
+        values = self._memory.read_memory(self._registers.i, size + 1)
+        for x in range(size + 1):
+            self._registers.set_vx(opcode.min_register + x, Byte(values[x]))
+
+        self._registers.increment_pc()
+
+    def _process_ldil(self, opcode: opcodes.LDIL) -> None:
+        self._registers.set_i(opcode.address)
+        self._registers.increment_pc()
+
+    def _process_pln(self, opcode: opcodes.PLN) -> None:
+        self._display.set_plane_mask(opcode.mask)
+        self._registers.increment_pc()
+
+    def _process_aud(self, opcode: opcodes.AUD) -> None:
+        buffer = self._memory.read_memory(self._registers.i, 16)
+        self._audio.set_pattern_buffer([Byte(b) for b in buffer])
+        self.on_audio_update.emit(
+            frequency=self._audio.frequency, buffer=self._audio.buffer
+        )
+        self._registers.increment_pc()
+
+    def _process_ptch(self, opcode: opcodes.PTCH) -> None:
+        self._audio.set_pitch(self._registers.get_vx(opcode.register))
+        self.on_audio_update.emit(
+            frequency=self._audio.frequency, buffer=self._audio.buffer
+        )
+        self._registers.increment_pc()
+
+    def _process_ret(self, opcode: opcodes.RET) -> None:
+        addr = self._stack.pop_stack()
+        self._registers.set_pc(addr)
+        self._registers.increment_pc()
+
+    def _process_jp(self, opcode: opcodes.JP) -> None:
+        if opcode.address.value < self._registers.pc.value:
+            self._check_idle_loop(opcode.address.value, self._registers.pc.value)
+        self._registers.set_pc(opcode.address)
+
+    def _process_call(self, opcode: opcodes.CALL) -> None:
+        self._stack.push_stack(self._registers.pc)
+        self._registers.set_pc(opcode.address)
+
+    def _process_seb(self, opcode: opcodes.SEB) -> None:
+        reg_value = self._registers.get_vx(opcode.register)
+        if reg_value == opcode.byte:
             self._registers.increment_pc()
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.SRGI):
-            assert opcode.min_register.value <= opcode.max_register.value
-
-            size = opcode.max_register.value - opcode.min_register.value
-            for x in range(size + 1):
-                self._memory.store_memory(
-                    self._registers.i + x,
-                    [self._registers.get_vx(Register(opcode.min_register.value + x))],
-                )
-
+    def _process_sneb(self, opcode: opcodes.SNEB) -> None:
+        reg_value = self._registers.get_vx(opcode.register)
+        if reg_value != opcode.byte:
             self._registers.increment_pc()
-
-        elif isinstance(opcode, opcodes.LRGI):
-            assert opcode.min_register.value <= opcode.max_register.value
-
-            size = opcode.max_register.value - opcode.min_register.value
-            for x in range(size + 1):
-                value = self._memory.read_memory(self._registers.i + x, 1)
-                self._registers.set_vx(opcode.min_register + x, value[0])
-
+        self._registers.increment_pc()
+
+    def _process_se(self, opcode: opcodes.SE) -> None:
+        reg_value1 = self._registers.get_vx(opcode.register1)
+        reg_value2 = self._registers.get_vx(opcode.register2)
+        if reg_value1 == reg_value2:
             self._registers.increment_pc()
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.LDIL):
-            self._registers.set_i(opcode.address)
-            self._registers.increment_pc()
+    def _process_ldb(self, opcode: opcodes.LDB) -> None:
+        self._registers.set_vx(opcode.register, opcode.byte)
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.PLN):
-            self._display.set_plane_mask(opcode.mask)
-            self._registers.increment_pc()
+    def _process_addb(self, opcode: opcodes.ADDB) -> None:
+        self._registers.set_vx(
+            opcode.register, self._registers.get_vx(opcode.register) + opcode.byte
+        )
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.AUD):
-            buffer = self._memory.read_memory(self._registers.i, 16)
-            self._audio.set_pattern_buffer(buffer)
-            self.on_audio_update.emit(
-                frequency=self._audio.frequency, buffer=self._audio.buffer
-            )
-            self._registers.increment_pc()
+    def _process_ld(self, opcode: opcodes.LD) -> None:
+        self._registers.set_vx(
+            opcode.register1, self._registers.get_vx(opcode.register2)
+        )
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.PTCH):
-            self._audio.set_pitch(self._registers.get_vx(opcode.register))
-            self.on_audio_update.emit(
-                frequency=self._audio.frequency, buffer=self._audio.buffer
-            )
-            self._registers.increment_pc()
+    def _process_or(self, opcode: opcodes.OR) -> None:
+        self._registers.set_vx(
+            opcode.register1,
+            self._registers.get_vx(opcode.register1)
+            | self._registers.get_vx(opcode.register2),
+        )
 
-        elif isinstance(opcode, opcodes.RET):
-            addr = self._stack.pop_stack()
-            self._registers.set_pc(addr)
-            self._registers.increment_pc()
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.JP):
-            self._registers.set_pc(opcode.address)
+    def _process_or_vf_reset(self, opcode: opcodes.OR) -> None:
+        self._process_or(opcode)
+        self._registers.set_carry(False)
 
-        elif isinstance(opcode, opcodes.CALL):
-            self._stack.push_stack(self._registers.pc)
-            self._registers.set_pc(opcode.address)
+    def _process_and(self, opcode: opcodes.AND) -> None:
+        self._registers.set_vx(
+            opcode.register1,
+            self._registers.get_vx(opcode.register1)
+            & self._registers.get_vx(opcode.register2),
+        )
 
-        elif isinstance(opcode, opcodes.SEB):
-            reg_value = self._registers.get_vx(opcode.register)
-            if reg_value == opcode.byte:
-                self._registers.increment_pc()
-            self._registers.increment_pc()
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.SNEB):
-            reg_value = self._registers.get_vx(opcode.register)
-            if reg_value != opcode.byte:
-                self._registers.increment_pc()
-            self._registers.increment_pc()
+    def _process_and_vf_reset(self, opcode: opcodes.AND) -> None:
+        self._process_and(opcode)
+        self._registers.set_carry(False)
 
-        elif isinstance(opcode, opcodes.SE):
-            reg_value1 = self._registers.get_vx(opcode.register1)
-            reg_value2 = self._registers.get_vx(opcode.register2)
-            if reg_value1 == reg_value2:
-                self._registers.increment_pc()
-            self._registers.increment_pc()
+    def _process_xor(self, opcode: opcodes.XOR) -> None:
+        self._registers.set_vx(
+            opcode.register1,
+            self._registers.get_vx(opcode.register1)
+            ^ self._registers.get_vx(opcode.register2),
+        )
 
-        elif isinstance(opcode, opcodes.LDB):
-            self._registers.set_vx(opcode.register, opcode.byte)
-            self._registers.increment_pc()
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.ADDB):
-            self._registers.set_vx(
-                opcode.register, self._registers.get_vx(opcode.register) + opcode.byte
-            )
-            self._registers.increment_pc()
+    def _process_xor_vf_reset(self, opcode: opcodes.XOR) -> None:
+        self._process_xor(opcode)
+        self._registers.set_carry(False)
 
-        elif isinstance(opcode, opcodes.LD):
-            self._registers.set_vx(
-                opcode.register1, self._registers.get_vx(opcode.register2)
-            )
-            self._registers.increment_pc()
+    def _process_add(self, opcode: opcodes.ADD) -> None:
+        # Get inner value to handle overflow
+        added = (
+            self._registers.get_vx(opcode.register1).value
+            + self._registers.get_vx(opcode.register2).value
+        )
 
-        elif isinstance(opcode, opcodes.OR):
-            self._registers.set_vx(
-                opcode.register1,
-                self._registers.get_vx(opcode.register1)
-                | self._registers.get_vx(opcode.register2),
-            )
+        self._registers.set_vx(opcode.register1, Byte(added))
+        self._registers.set_carry(added > 255)
 
-            if self._quirks.vf_reset:
-                self._registers.set_carry(False)
+        self._registers.increment_pc()
 
-            self._registers.increment_pc()
+    def _process_sub(self, opcode: opcodes.SUB) -> None:
+        vx = self._registers.get_vx(opcode.register1)
+        vy = self._registers.get_vx(opcode.register2)
 
-        elif isinstance(opcode, opcodes.AND):
-            self._registers.set_vx(
-                opcode.register1,
-                self._registers.get_vx(opcode.register1)
-                & self._registers.get_vx(opcode.register2),
-            )
+        self._registers.set_vx(opcode.register1, vx - vy)
+        self._registers.set_carry(vx >= vy)
 
-            if self._quirks.vf_reset:
-                self._registers.set_carry(False)
+        self._registers.increment_pc()
 
-            self._registers.increment_pc()
+    def _process_shr(self, opcode: opcodes.SHR) -> None:
+        vx = self._registers.get_vx(opcode.register1)
 
-        elif isinstance(opcode, opcodes.XOR):
-            self._registers.set_vx(
-                opcode.register1,
-                self._registers.get_vx(opcode.register1)
-                ^ self._registers.get_vx(opcode.register2),
-            )
+        self._registers.set_vx(opcode.register1, vx // 2)
+        self._registers.set_carry(vx & 1 == 1)
 
-            if self._quirks.vf_reset:
-                self._registers.set_carry(False)
+        self._registers.increment_pc()
 
-            self._registers.increment_pc()
+    def _process_shr_shift_y(self, opcode: opcodes.SHR) -> None:
+        self._registers.set_vx(
+            opcode.register1, self._registers.get_vx(opcode.register2)
+        )
+        self._process_shr(opcode)
 
-        elif isinstance(opcode, opcodes.ADD):
-            # Get inner value to handle overflow
-            added = (
-                self._registers.get_vx(opcode.register1).value
-                + self._registers.get_vx(opcode.register2).value
-            )
+    def _process_subn(self, opcode: opcodes.SUBN) -> None:
+        vx = self._registers.get_vx(opcode.register1)
+        vy = self._registers.get_vx(opcode.register2)
 
-            self._registers.set_vx(opcode.register1, Byte(added))
-            self._registers.set_carry(added > 255)
+        self._registers.set_vx(opcode.register1, vy - vx)
+        self._registers.set_carry(vx <= vy)
 
-            self._registers.increment_pc()
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.SUB):
-            vx = self._registers.get_vx(opcode.register1)
-            vy = self._registers.get_vx(opcode.register2)
+    def _process_shl(self, opcode: opcodes.SHL) -> None:
+        vx = self._registers.get_vx(opcode.register1)
 
-            self._registers.set_vx(opcode.register1, vx - vy)
-            self._registers.set_carry(vx >= vy)
+        self._registers.set_vx(opcode.register1, vx * 2)
+        self._registers.set_carry(vx & 0b1000_0000 == 0b1000_0000)
 
-            self._registers.increment_pc()
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.SHR):
-            if self._quirks.shift_y:
-                self._registers.set_vx(
-                    opcode.register1, self._registers.get_vx(opcode.register2)
-                )
-            vx = self._registers.get_vx(opcode.register1)
+    def _process_shl_shift_y(self, opcode: opcodes.SHL) -> None:
+        self._registers.set_vx(
+            opcode.register1, self._registers.get_vx(opcode.register2)
+        )
+        self._process_shl(opcode)
 
-            self._registers.set_vx(opcode.register1, vx // 2)
-            self._registers.set_carry(vx & 1 == 1)
+    def _process_sne(self, opcode: opcodes.SNE) -> None:
+        reg_value1 = self._registers.get_vx(opcode.register1)
+        reg_value2 = self._registers.get_vx(opcode.register2)
 
+        if reg_value1 != reg_value2:
             self._registers.increment_pc()
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.SUBN):
-            vx = self._registers.get_vx(opcode.register1)
-            vy = self._registers.get_vx(opcode.register2)
-
-            self._registers.set_vx(opcode.register1, vy - vx)
-            self._registers.set_carry(vx <= vy)
-
-            self._registers.increment_pc()
-
-        elif isinstance(opcode, opcodes.SHL):
-            if self._quirks.shift_y:
-                self._registers.set_vx(
-                    opcode.register1, self._registers.get_vx(opcode.register2)
-                )
-            vx = self._registers.get_vx(opcode.register1)
-
-            self._registers.set_vx(opcode.register1, vx * 2)
-            self._registers.set_carry(vx & 0b1000_0000 == 0b1000_0000)
-
-            self._registers.increment_pc()
+    def _process_ldi(self, opcode: opcodes.LDI) -> None:
+        self._registers.set_i(opcode.address)
 
-        elif isinstance(opcode, opcodes.SNE):
-            reg_value1 = self._registers.get_vx(opcode.register1)
-            reg_value2 = self._registers.get_vx(opcode.register2)
+        self._registers.increment_pc()
 
-            if reg_value1 != reg_value2:
-                self._registers.increment_pc()
-            self._registers.increment_pc()
+    def _process_jpofst(self, opcode: opcodes.JPOFST) -> None:
+        v0 = self._registers.get_vx(Register(0))
+        addr = Address(v0.value) + opcode.address
+        self._registers.set_pc(addr)
 
-        elif isinstance(opcode, opcodes.LDI):
-            self._registers.set_i(opcode.address)
+    def _process_jpofst_jump_vx(self, opcode: opcodes.JPOFST) -> None:
+        vx = self._registers.get_vx(opcode.register)
+        addr = Address(vx.value) + opcode.address
+        self._registers.set_pc(addr)
 
-            self._registers.increment_pc()
+    def _process_rnd(self, opcode: opcodes.RND) -> None:
+        value = opcode.byte & Byte.random(self._rng)
+        self._registers.set_vx(opcode.register, value)
 
-        elif isinstance(opcode, opcodes.JPOFST):
-            if self._quirks.jump_vx:
-                vx = self._registers.get_vx(opcode.register)
-                addr = Address(vx.value) + opcode.address
-            else:
-                v0 = self._registers.get_vx(Register(0))
-                addr = Address(v0.value) + opcode.address
-            self._registers.set_pc(addr)
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.RND):
-            value = opcode.byte & Byte.random(self._rng)
-            self._registers.set_vx(opcode.register, value)
+    def _process_drw(self, opcode: opcodes.DRW) -> None:
+        self._draw(opcode, clip=False)
 
-            self._registers.increment_pc()
+    def _process_drw_clipping(self, opcode: opcodes.DRW) -> None:
+        self._draw(opcode, clip=True)
 
-        elif isinstance(opcode, opcodes.DRW):
-            vx = self._registers.get_vx(opcode.register_x)
-            vy = self._registers.get_vx(opcode.register_y)
-
-            if self._display._plane_mask == 3:
-                mem = self._memory.read_memory(
-                    self._registers.i, opcode.height.value * 2
-                )
-                collision = self._display.draw_multiplane(
-                    vx.value, vy.value, mem, clip=self._quirks.draw_clipping
-                )
-            else:
-                mem = self._memory.read_memory(self._registers.i, opcode.height.value)
-                collision = self._display.draw(
-                    vx.value, vy.value, mem, clip=self._quirks.draw_clipping
-                )
+    def _draw(self, opcode: opcodes.DRW, *, clip: bool) -> None:
+        vx = self._registers.get_vx(opcode.register_x)
+        vy = self._registers.get_vx(opcode.register_y)
 
-            self._registers.set_carry(collision)
-            self._registers.increment_pc()
-
-        elif isinstance(opcode, opcodes.SDRW):
-            vx = self._registers.get_vx(opcode.register_x)
-            vy = self._registers.get_vx(opcode.register_y)
-
-            if self._display._plane_mask == 3:
-                mem = self._memory.read_memory(self._registers.i, 16 * 2 * 2)
-                collision = self._display.super_draw_multiplane(
-                    vx.value, vy.value, mem, clip=self._quirks.draw_clipping
-                )
-            else:
-                mem = self._memory.read_memory(self._registers.i, 16 * 2)
-                collision = self._display.super_draw(
-                    vx.value, vy.value, mem, clip=self._quirks.draw_clipping
-                )
-
-            self._registers.set_carry(collision)
-            self._registers.increment_pc()
+        if self._display._plane_mask == 3:
+            mem = self._memory.read_memory(self._registers.i, opcode.height.value * 2)
+            collision = self._display.draw_multiplane(
+                vx.value, vy.value, mem, clip=clip
+            )
+        else:
+            mem = self._memory.read_memory(self._registers.i, opcode.height.value)
+            collision = self._display.draw(vx.value, vy.value, mem, clip=clip)
 
-        elif isinstance(opcode, opcodes.SKP):
-            vx = self._registers.get_vx(opcode.register)
-            if self._keypad.get_kx(vx):
-                self._registers.increment_pc()
-            self._registers.increment_pc()
+        self._registers.set_carry(collision)
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.SKNP):
-            vx = self._registers.get_vx(opcode.register)
-            if not self._keypad.get_kx(vx):
-                self._registers.increment_pc()
-            self._registers.increment_pc()
+    def _process_sdrw(self, opcode: opcodes.SDRW) -> None:
+        self._super_draw(opcode, clip=False)
 
-        elif isinstance(opcode, opcodes.LDLY):
-            self._registers.set_vx(opcode.register, self._timers.delay_timer)
+    def _process_sdrw_clipping(self, opcode: opcodes.SDRW) -> None:
+        self._super_draw(opcode, clip=True)
 
-            self._registers.increment_pc()
+    def _super_draw(self, opcode: opcodes.SDRW, *, clip: bool) -> None:
+        vx = self._registers.get_vx(opcode.register_x)
+        vy = self._registers.get_vx(opcode.register_y)
 
-        elif isinstance(opcode, opcodes.LDK):
-            if self._keypad._last_released_key:
-                self._registers.set_vx(opcode.register, self._keypad._last_released_key)
-                self._registers.increment_pc()
+        if self._display._plane_mask == 3:
+            mem = self._memory.read_memory(self._registers.i, 16 * 2 * 2)
+            collision = self._display.super_draw_multiplane(
+                vx.value, vy.value, mem, clip=clip
+            )
+        else:
+            mem = self._memory.read_memory(self._registers.i, 16 * 2)
+            collision = self._display.super_draw(vx.value, vy.value, mem, clip=clip)
 
-        elif isinstance(opcode, opcodes.SDLY):
-            self._timers.set_delay_timer(self._registers.get_vx(opcode.register))
+        self._registers.set_carry(collision)
+        self._registers.increment_pc()
 
+    def _process_skp(self, opcode: opcodes.SKP) -> None:
+        vx = self._registers.get_vx(opcode.register)
+        if self._keypad.get_kx(vx):
             self._registers.increment_pc()
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.SSND):
-            self._timers.set_sound_timer(self._registers.get_vx(opcode.register))
-
+    def _process_sknp(self, opcode: opcodes.SKNP) -> None:
+        vx = self._registers.get_vx(opcode.register)
+        if not self._keypad.get_kx(vx):
             self._registers.increment_pc()
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.ADDI):
-            i_value = self._registers.i
-            reg_value = self._registers.get_vx(opcode.register)
-
-            # Look for overflow
-            addition = i_value + reg_value
-            carry = addition >= 0x1000
-            if self._quirks.add_i_carry:
-                self._registers.set_carry(carry)
+    def _process_ldly(self, opcode: opcodes.LDLY) -> None:
+        self._registers.set_vx(opcode.register, self._timers.delay_timer)
 
-            self._registers.set_i(addition)
+        self._registers.increment_pc()
 
+    def _process_ldk(self, opcode: opcodes.LDK) -> None:
+        if self._keypad._last_released_key:
+            self._registers.set_vx(opcode.register, self._keypad._last_released_key)
             self._registers.increment_pc()
+        else:
+            self._idle = True
+            self._waiting_for_key = True
 
-        elif isinstance(opcode, opcodes.LDF):
-            self._registers.set_i(
-                self._memory.FONT_START_LOCATION
-                + Address(opcode.register.value * Font.SPRITE_HEIGHT)
-            )
-
-            self._registers.increment_pc()
-
-        elif isinstance(opcode, opcodes.SLDF):
-            self._registers.set_i(
-                self._memory.SUPER_FONT_START_LOCATION
-                + Address(opcode.register.value * Font.SUPER_SPRITE_HEIGHT)
-            )
-
-            self._registers.increment_pc()
+    def _process_sdly(self, opcode: opcodes.SDLY) -> None:
+        self._timers.set_delay_timer(self._registers.get_vx(opcode.register))
 
-        elif isinstance(opcode, opcodes.LDBCD):
-            value = self._registers.get_vx(opcode.register)
+        self._registers.increment_pc()
 
-            i0 = value // 100
-            i1 = (value % 100) // 10
-            i2 = value % 10
+    def _process_ssnd(self, opcode: opcodes.SSND) -> None:
+        self._timers.set_sound_timer(self._registers.get_vx(opcode.register))
 
-            self._memory.store_memory(self._registers.i, [i0])
-            self._memory.store_memory(self._registers.i + 1, [i1])
-            self._memory.store_memory(self._registers.i + 2, [i2])
+        self._registers.increment_pc()
 
-            self._registers.increment_pc()
+    def _process_addi(self, opcode: opcodes.ADDI) -> None:
+        i_value = self._registers.i
+        reg_value = self._registers.get_vx(opcode.register)
 
-        elif isinstance(opcode, opcodes.SRG):
-            for x in range(opcode.max_register.value + 1):
-                self._memory.store_memory(
-                    self._registers.i + x, [self._registers.get_vx(Register(x))]
-                )
+        self._registers.set_i(i_value + reg_value)
 
-            if self._quirks.index_increment:
-                self._registers.set_i(self._registers.i + opcode.max_register + 1)
+        self._registers.increment_pc()
 
-            self._registers.increment_pc()
+    def _process_addi_carry(self, opcode: opcodes.ADDI) -> None:
+        i_value = self._registers.i
+        reg_value = self._registers.get_vx(opcode.register)
 
-        elif isinstance(opcode, opcodes.LRG):
-            for x in range(opcode.max_register.value + 1):
-                value = self._memory.read_memory(self._registers.i + x, 1)
-                self._registers.set_vx(Register(x), value[0])
+        # Look for overflow
+        addition = i_value + reg_value
+        self._registers.set_carry(addition >= 0x1000)
 
-            if self._quirks.index_increment:
-                self._registers.set_i(self._registers.i + opcode.max_register + 1)
+        self._registers.set_i(addition)
 
-            self._registers.increment_pc()
+        self._registers.increment_pc()
 
-        elif isinstance(opcode, opcodes.SRGF):
-            for x in range(opcode.max_register.value + 1):
-                value = self._memory.store_local_storage(
-                    self._registers.i + x, [self._registers.get_vx(Register(x))]
-                )
+    def _process_ldf(self, opcode: opcodes.LDF) -> None:
+        self._registers.set_i(
+            self._memory.FONT_START_LOCATION
+            + Address(opcode.register.value * Font.SPRITE_HEIGHT)
+        )
 
-            self._registers.increment_pc()
+        self._registers.increment_pc()
+
+    def _process_sldf(self, opcode: opcodes.SLDF) -> None:
+        self._registers.set_i(
+            self._memory.SUPER_FONT_START_LOCATION
+            + Address(opcode.register.value * Font.SUPER_SPRITE_HEIGHT)
+        )
+
+        self._registers.increment_pc()
+
+    def _process_ldbcd(self, opcode: opcodes.LDBCD) -> None:
+        value = self._registers.get_vx(opcode.register)
+
+        i0 = value // 100
+        i1 = (value % 100) // 10
+        i2 = value % 10
+
+        self._memory.store_memory(self._registers.i, [i0, i1, i2])
+
+        self._registers.increment_pc()
+
+    def _process_srg(self, opcode: opcodes.SRG) -> None:
+        registers = range(opcode.max_register.value + 1)
+        self._memory.store_memory(
+            self._registers.i,
+            bytes(self._registers.get_vx(Register(x)) for x in registers),
+        )
+
+        self._registers.increment_pc()
+
+    def _process_srg_index_increment(self, opcode: opcodes.SRG) -> None:
+        self._process_srg(opcode)
+        self._registers.set_i(self._registers.i + opcode.max_register + 1)
+
+    def _process_lrg(self, opcode: opcodes.LRG) -> None:
+        count = opcode.max_register.value + 1
+        values = self._memory.read_memory(self._registers.i, count)
+        for x in range(count):
+            self._registers.set_vx(Register(x), Byte(values[x]))
+
+        self._registers.increment_pc()
+
+    def _process_lrg_index_increment(self, opcode: opcodes.LRG) -> None:
+        self._process_lrg(opcode)
+        self._registers.set_i(self._registers.i + opcode.max_register + 1)
+
+    def _process_srgf(self, opcode: opcodes.SRGF) -> None:
+        registers = range(opcode.max_register.value + 1)
+        self._memory.store_local_storage(
+            self._registers.i,
+            bytes(self._registers.get_vx(Register(x)) for x in registers),
+        )
+
+        self._registers.increment_pc()
+
+    def _process_lrgf(self, opcode: opcodes.LRGF) -> None:
+        count = opcode.max_register.value + 1
+        values = self._memory.read_local_storage(self._registers.i, count)
+        for x in range(count):
+            self._registers.set_vx(Register(x), Byte(values[x]))
+
+        self._registers.increment_pc()
+
+    def _check_idle_loop(self, start: int, end: int) -> None:
+        """Check the loop from start to the jump at end, about to jump back.
+
+        The loop is idle if it only reads registers, keys and the delay
+        timer and only writes registers, and if its next iterations do not
+        exit and leave the registers unchanged: as keys and timers do not
+        change during a step, it would then run until the end of the step.
+        """
+        general = self._run_idle_loop(start, end, self._registers._general)
+        if general is not None and self._run_idle_loop(start, end, general) == general:
+            self._idle = True
+
+    def _run_idle_loop(
+        self, start: int, end: int, general: list[Byte]
+    ) -> list[Byte] | None:
+        """Run a loop iteration on a copy of the registers.
+
+        Returns None if the loop exits, or if it is not an idle loop candidate.
+        """
+        general = list(general)
+        address = start
+        while address < end:
+            code = opcodes.DECODE_TABLE[self._memory.read_opcode(Address(address))]
+            skip = False
+
+            if isinstance(code, opcodes.LDLY):
+                general[code.register.value] = self._timers.delay_timer
+            elif isinstance(code, opcodes.LDB):
+                general[code.register.value] = code.byte
+            elif isinstance(code, opcodes.LD):
+                general[code.register1.value] = general[code.register2.value]
+            elif isinstance(code, opcodes.SEB):
+                skip = general[code.register.value] == code.byte
+            elif isinstance(code, opcodes.SNEB):
+                skip = general[code.register.value] != code.byte
+            elif isinstance(code, opcodes.SE):
+                skip = general[code.register1.value] == general[code.register2.value]
+            elif isinstance(code, opcodes.SNE):
+                skip = general[code.register1.value] != general[code.register2.value]
+            elif isinstance(code, opcodes.SKP):
+                skip = self._keypad.get_kx(general[code.register.value])
+            elif isinstance(code, opcodes.SKNP):
+                skip = not self._keypad.get_kx(general[code.register.value])
+            else:
+                return None
 
-        elif isinstance(opcode, opcodes.LRGF):
-            for x in range(opcode.max_register.value + 1):
-                value = self._memory.read_local_storage(self._registers.i + x, 1)
-                self._registers.set_vx(Register(x), value[0])
+            address += 4 if skip else 2
 
-            self._registers.increment_pc()
+        # Skipping the jump exits the loop
+        return general if address == end else None
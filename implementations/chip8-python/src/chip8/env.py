@@ -0,0 +1,266 @@
+"""Reinforcement-learning environments running cartridges.
+
+Observations are NumPy arrays, so NumPy is needed by this module.
+"""
+
+from typing import Any, Sequence
+
+import numpy as np
+
+from .cartridge import Cartridge
+from .config import EngineConfig
+from .display import Display
+from .engine import Engine, StepResult
+from .fastcore import FastEngine
+from .keypad import Keypad
+from .types import Byte
+
+# Nothing pressed, then one action per key
+DEFAULT_ACTIONS: tuple[tuple[int, ...], ...] = ((),) + tuple(
+    (key,) for key in range(Keypad.KEYS_COUNT)
+)
+
+# Step results ending an episode
+TERMINAL_RESULTS = (StepResult.Loop, StepResult.Exit, StepResult.BadOpCode)
+
+
+class Chip8Env:
+    """Cartridge running as an environment, with `reset()` and `step(action)`.
+
+    - Actions are indices in `actions`, each one being the keys to hold
+      while the step runs; keys are set on the keypad with `Keypad.set_kx`,
+      only when they change.
+    - Each step runs `frame_skip` frames, with the same keys held.
+    - The score is read from memory, from `score_addresses`, as digits in
+      `score_base`, from the most significant one: base 256 reads bytes as
+      a big-endian number, base 10 reads BCD digits stored by LDBCD. The
+      reward of a step is the score difference.
+    - Observations are display frame buffer indices (see
+      `Display.frame_bytes`), cropped to `crop` as (top, bottom, left,
+      right) frame coordinates, then keeping one pixel out of `downsample`
+      in both directions: LORES frames are native with a downsample of 2.
+
+    Episodes end when the program reaches an infinite loop, an EXIT opcode
+    or a bad opcode, and are truncated after `max_steps` steps if given.
+    """
+
+    _cartridge: Cartridge
+    _engine: Engine | FastEngine
+    _actions: tuple[tuple[int, ...], ...]
+    _frame_skip: int
+    _score_addresses: tuple[int, ...]
+    _score_base: int
+    _crop: tuple[slice, slice]
+    _max_steps: int | None
+    _held_keys: frozenset[int]
+    _score: int
+    _steps: int
+
+    def __init__(
+        self,
+        cartridge: Cartridge,
+        *,
+        config: EngineConfig | None = None,
+        actions: Sequence[Sequence[int]] = DEFAULT_ACTIONS,
+        frame_skip: int = 4,
+        score_addresses: Sequence[int] = (),
+        score_base: int = 256,
+        crop: tuple[int, int, int, int] | None = None,
+        downsample: int = 1,
+        max_steps: int | None = None,
+    ) -> None:
+        for keys in actions:
+            for key in keys:
+                if key < 0 or key >= Keypad.KEYS_COUNT:
+                    raise ValueError(f"Unsupported key value in actions: {key}")
+
+        self._cartridge = cartridge
+        self._engine = (config or EngineConfig()).create_engine()
+        self._actions = tuple(tuple(keys) for keys in actions)
+        self._frame_skip = frame_skip
+        self._score_addresses = tuple(score_addresses)
+        self._score_base = score_base
+        top, bottom, left, right = crop or (
+            0,
+            Display.SCREEN_SIZE_Y,
+            0,
+            Display.SCREEN_SIZE_X,
+        )
+        self._crop = (slice(top, bottom, downsample), slice(left, right, downsample))
+        self._max_steps = max_steps
+        self._held_keys = frozenset()
+        self._score = 0
+        self._steps = 0
+
+    @property
+    def engine(self) -> Engine | FastEngine:
+        return self._engine
+
+    @property
+    def action_count(self) -> int:
+        return len(self._actions)
+
+    @property
+    def observation_shape(self) -> tuple[int, int]:
+        frame = np.empty((Display.SCREEN_SIZE_Y, Display.SCREEN_SIZE_X), np.uint8)
+        return frame[self._crop].shape
+
+    def reset(self, *, seed: int | None = None) -> np.ndarray:
+        """Start a new episode, and get its first observation."""
+        observation = np.empty(self.observation_shape, dtype=np.uint8)
+        self.reset_into(observation, seed=seed)
+        return observation
+
+    def reset_into(self, observation: np.ndarray, *, seed: int | None = None) -> None:
+        """Same as `reset`, writing the observation to an existing array."""
+        engine = self._engine
+        engine.reset()
+        engine.load_cartridge(self._cartridge)
+        if seed is not None:
+            engine._rng.seed(seed)
+
+        self._held_keys = frozenset()
+        self._score = self._read_score()
+        self._steps = 0
+        self.observe(observation)
+
+    def step(self, action: int) -> tuple[np.ndarray, float, bool, bool, dict[str, Any]]:
+        """Run a step, holding the keys of an action.
+
+        Returns the observation, the reward, whether the episode ended,
+        whether it was truncated, and information about the step.
+        """
+        observation = np.empty(self.observation_shape, dtype=np.uint8)
+        reward, terminated, truncated = self.step_into(action, observation)
+        return observation, reward, terminated, truncated, {"score": self._score}
+
+    def step_into(
+        self, action: int, observation: np.ndarray
+    ) -> tuple[float, bool, bool]:
+        """Same as `step`, writing the observation to an existing array.
+
+        Returns the reward, whether the episode ended and whether it was
+        truncated.
+        """
+        self._hold_keys(frozenset(self._actions[action]))
+
+        engine = self._engine
+        terminated = False
+        for _ in range(self._frame_skip):
+            if engine.step() in TERMINAL_RESULTS:
+                terminated = True
+                break
+            engine.step_timers()
+
+        score = self._read_score()
+        reward = float(score - self._score)
+        self._score = score
+        self._steps += 1
+
+        truncated = (
+            not terminated
+            and self._max_steps is not None
+            and self._steps >= self._max_steps
+        )
+        self.observe(observation)
+        return reward, terminated, truncated
+
+    @property
+    def score(self) -> int:
+        return self._score
+
+    def observe(self, observation: np.ndarray) -> None:
+        """Write the current observation to an array."""
+        frame = np.frombuffer(self._engine._display.frame_bytes(), dtype=np.uint8)
+        frame = frame.reshape(Display.SCREEN_SIZE_Y, Display.SCREEN_SIZE_X)
+        np.copyto(observation, frame[self._crop])
+
+    def _hold_keys(self, keys: frozenset[int]) -> None:
+        keypad = self._engine._keypad
+        for key in self._held_keys - keys:
+            keypad.set_kx(Byte(key), False)
+        for key in keys - self._held_keys:
+            keypad.set_kx(Byte(key), True)
+        self._held_keys = keys
+
+    def _read_score(self) -> int:
+        engine = self._engine
+        memory = engine._memory._data if isinstance(engine, Engine) else engine._memory
+        score = 0
+        for address in self._score_addresses:
+            score = score * self._score_base + memory[address]
+        return score
+
+
+class VectorEnv:
+    """Environments stepped together, with observations in a single array.
+
+    Environments are reset as soon as their episode ends, so the
+    observation of such an environment is the first one of the next
+    episode. Returned arrays are reused by the next call.
+    """
+
+    _envs: list[Chip8Env]
+    _observations: np.ndarray
+    _rewards: np.ndarray
+    _terminated: np.ndarray
+    _truncated: np.ndarray
+    _scores: np.ndarray
+
+    def __init__(self, envs: Sequence[Chip8Env]) -> None:
+        shapes = {env.observation_shape for env in envs}
+        if len(shapes) != 1:
+            raise ValueError("Environments must have the same observation shape")
+
+        self._envs = list(envs)
+        count = len(self._envs)
+        self._observations = np.zeros((count, *shapes.pop()), dtype=np.uint8)
+        self._rewards = np.zeros(count, dtype=np.float64)
+        self._terminated = np.zeros(count, dtype=bool)
+        self._truncated = np.zeros(count, dtype=bool)
+        self._scores = np.zeros(count, dtype=np.int64)
+
+    @property
+    def envs(self) -> list[Chip8Env]:
+        return self._envs
+
+    def reset(self, *, seed: int | None = None) -> np.ndarray:
+        """Reset every environment, and get their observations.
+
+        With a seed, environments are seeded with successive values.
+        """
+        for idx, env in enumerate(self._envs):
+            env.reset_into(
+                self._observations[idx], seed=None if seed is None else seed + idx
+            )
+            self._scores[idx] = env.score
+        return self._observations
+
+    def step(
+        self, actions: Sequence[int] | np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, dict[str, Any]]:
+        """Run a step on each environment, with an action for each one.
+
+        Returns the observations, rewards, episode ends, truncations, and
+        information about the step: the score of each environment.
+        """
+        observations = self._observations
+        for idx, env in enumerate(self._envs):
+            observation = observations[idx]
+            reward, terminated, truncated = env.step_into(
+                int(actions[idx]), observation
+            )
+            self._rewards[idx] = reward
+            self._terminated[idx] = terminated
+            self._truncated[idx] = truncated
+            self._scores[idx] = env.score
+            if terminated or truncated:
+                env.reset_into(observation)
+
+        return (
+            observations,
+            self._rewards,
+            self._terminated,
+            self._truncated,
+            {"score": self._scores},
+        )
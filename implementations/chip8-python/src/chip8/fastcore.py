@@ -0,0 +1,664 @@
+import logging
+from random import Random
+from typing import Callable
+
+from .mode import EmulationMode
+from .audio import Audio
+from .signal import Signal
+from .display import Display
+from .font import Font
+from .memory import Memory
+from .registers import Registers
+from .stack import Stack
+from .keypad import Keypad
+from .cartridge import Cartridge
+from .quirks import Quirks
+from .types import Byte
+from .engine import (
+    StepResult,
+    SUPER_CHIP_INSTRUCTIONS_COUNT_FACTOR,
+    XO_CHIP_INSTRUCTIONS_COUNT_FACTOR,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class FastEngine:
+    """Engine working on plain integers instead of the `chip8.types` wrappers.
+
+    Registers, stack and memory are stored as integers in `bytearray`
+    and `list` storages, and opcodes are executed straight from their
+    16-bit value, dispatched on their first nibble.
+
+    It follows the same quirks and exposes the same public surface as
+    `Engine`, so both can be used interchangeably.
+    """
+
+    _audio: Audio
+    _display: Display
+    _memory: bytearray
+    _local_storage: bytearray
+    _v: bytearray
+    _i: int
+    _pc: int
+    _stack: list[int]
+    _delay_timer: int
+    _sound_timer: int
+    _rng: Random
+    _quirks: Quirks
+    _keypad: Keypad
+    _ticks: int
+    _idle_steps: int
+    _waiting_for_key: bool
+    _instructions_per_step: int
+    _emulation_mode: EmulationMode
+    _handlers: list[Callable[[int], StepResult | None]]
+
+    on_loop: Signal
+    on_exit: Signal
+    on_audio_update: Signal
+
+    def __init__(self) -> None:
+        self._audio = Audio()
+        self._display = Display()
+        self._memory = bytearray(Memory.MEMORY_SIZE)
+        self._local_storage = bytearray(Memory.LOCAL_STORAGE_SIZE)
+        self._v = bytearray(Registers.GENERAL_REGISTER_COUNT)
+        self._i = 0
+        self._pc = Registers.INITIAL_PC.value
+        self._stack = []
+        self._delay_timer = 0
+        self._sound_timer = 0
+        self._keypad = Keypad()
+        self._rng = Random()
+        self._quirks = Quirks()
+        self._ticks = 0
+        self._idle_steps = 0
+        self._waiting_for_key = False
+        self._instructions_per_step = 10
+        self._emulation_mode = EmulationMode.Chip8
+        self._handlers = [
+            self._process_0,
+            self._process_1,
+            self._process_2,
+            self._process_3,
+            self._process_4,
+            self._process_5,
+            self._process_6,
+            self._process_7,
+            self._process_8,
+            self._process_9,
+            self._process_a,
+            self._process_b,
+            self._process_c,
+            self._process_d,
+            self._process_e,
+            self._process_f,
+        ]
+
+        self.on_exit = Signal()
+        self.on_loop = Signal()
+        self.on_audio_update = Signal()
+
+        self._keypad.on_release.connect(self._on_key_release)
+
+        self.reset()
+
+    def set_emulation_mode(self, mode: EmulationMode) -> None:
+        self._emulation_mode = mode
+
+    def reset(self) -> None:
+        self._audio.reset()
+        self._display.reset()
+        self._memory[:] = bytes(Memory.MEMORY_SIZE)
+        self._v[:] = bytes(Registers.GENERAL_REGISTER_COUNT)
+        self._i = 0
+        self._pc = Registers.INITIAL_PC.value
+        self._stack = []
+        self._keypad.reset()
+        self._delay_timer = 0
+        self._sound_timer = 0
+        self._ticks = 0
+        self._idle_steps = 0
+        self._waiting_for_key = False
+
+        self._store(Memory.FONT_START_LOCATION.value, Font.get_default()._data)
+        self._store(
+            Memory.SUPER_FONT_START_LOCATION.value, Font.get_super_default()._data
+        )
+
+    def load_cartridge(self, cartridge: Cartridge) -> None:
+        self._store(Memory.CARTRIDGE_START_LOCATION.value, cartridge._data)
+
+    def step_timers(self) -> None:
+        self._keypad.step()
+
+        if self._delay_timer > 0:
+            self._delay_timer -= 1
+
+        if self._sound_timer > 0:
+            self._sound_timer -= 1
+
+    def set_instructions_per_step(self, value: int) -> None:
+        self._instructions_per_step = value
+
+    @property
+    def instructions_per_step(self) -> int:
+        return self._instructions_per_step
+
+    @property
+    def beeping(self) -> bool:
+        return self._sound_timer > 0
+
+    @property
+    def quirks(self) -> Quirks:
+        return self._quirks
+
+    @property
+    def idle_steps(self) -> int:
+        """Number of steps which ended early, on an idle loop or a key wait."""
+        return self._idle_steps
+
+    @property
+    def waiting_for_key(self) -> bool:
+        """Whether an LDK is parked until a key is released."""
+        return self._waiting_for_key
+
+    def step(self) -> StepResult:
+        if self._waiting_for_key:
+            self._idle_steps += 1
+            return StepResult.Idle
+
+        memory = self._memory
+        handlers = self._handlers
+        display_wait = self._quirks.display_wait
+
+        for idx in range(self._get_instructions_count_per_step()):
+            pc = self._pc
+            code = (memory[pc] << 8) | memory[pc + 1]
+
+            if display_wait and idx > 0 and code >> 12 == 0xD:
+                # Stop here and wait for next frame
+                break
+
+            res = handlers[code >> 12](code)
+            if res is not None:
+                if res == StepResult.Idle:
+                    self._ticks += 1
+                    self._idle_steps += 1
+                return res
+
+            self._ticks += 1
+
+        return StepResult.Success
+
+    def _get_instructions_count_per_step(self) -> int:
+        if self._emulation_mode == EmulationMode.Chip8:
+            return self._instructions_per_step
+
+        elif self._emulation_mode == EmulationMode.SuperChip:
+            return self._instructions_per_step * SUPER_CHIP_INSTRUCTIONS_COUNT_FACTOR
+
+        else:
+            return self._instructions_per_step * XO_CHIP_INSTRUCTIONS_COUNT_FACTOR
+
+    def _store(self, start: int, data: bytes) -> None:
+        self._memory[start : start + len(data)] = data
+
+    def _read_sprite(self, count: int) -> memoryview:
+        i = self._i
+        return memoryview(self._memory)[i : i + count]
+
+    def _on_key_release(self, key: Byte) -> None:
+        # Run the parked LDK again on next step, to read the released key
+        self._waiting_for_key = False
+
+    def _is_idle_loop(self, start: int, end: int) -> bool:
+        """Check the loop from start to the jump at end, see `Engine`."""
+        v = self._run_idle_loop(start, end, self._v)
+        return v is not None and self._run_idle_loop(start, end, v) == v
+
+    def _run_idle_loop(self, start: int, end: int, v: bytearray) -> bytearray | None:
+        memory = self._memory
+        v = bytearray(v)
+        address = start
+        while address < end:
+            code = (memory[address] << 8) | memory[address + 1]
+            x = (code >> 8) & 0xF
+            y = (code >> 4) & 0xF
+            kind = code >> 12
+            skip = False
+
+            if kind == 0xF and code & 0xFF == 0x07:
+                # LDLY
+                v[x] = self._delay_timer
+            elif kind == 0x6:
+                # LDB
+                v[x] = code & 0xFF
+            elif kind == 0x8 and code & 0xF == 0x0:
+                # LD
+                v[x] = v[y]
+            elif kind == 0x3:
+                # SEB
+                skip = v[x] == code & 0xFF
+            elif kind == 0x4:
+                # SNEB
+                skip = v[x] != code & 0xFF
+            elif kind == 0x5 and code & 0xF == 0x0:
+                # SE
+                skip = v[x] == v[y]
+            elif kind == 0x9 and code & 0xF == 0x0:
+                # SNE
+                skip = v[x] != v[y]
+            elif kind == 0xE and code & 0xFF == 0x9E:
+                # SKP
+                skip = self._keypad.get_kx(Byte(v[x]))
+            elif kind == 0xE and code & 0xFF == 0xA1:
+                # SKNP
+                skip = not self._keypad.get_kx(Byte(v[x]))
+            else:
+                return None
+
+            address += 4 if skip else 2
+
+        # Skipping the jump exits the loop
+        return v if address == end else None
+
+    def _emit_audio_update(self) -> None:
+        self.on_audio_update.emit(
+            frequency=self._audio.frequency, buffer=self._audio.buffer
+        )
+
+    def _process_0(self, code: int) -> StepResult | None:
+        kind = code & 0xFF
+
+        if kind & 0xF0 == 0xC0:
+            # SCRLDWN
+            self._display.scroll_down(
+                Byte(code & 0xF), legacy_mode=self._quirks.legacy_scrolling
+            )
+
+        elif kind & 0xF0 == 0xD0:
+            # SCRLUP
+            self._display.scroll_up(Byte(code & 0xF))
+
+        elif kind == 0xE0:
+            # CLS
+            self._display.clear()
+
+        elif kind == 0xEE:
+            # RET
+            if len(self._stack) == 0:
+                raise RuntimeError("Empty stack")
+            self._pc = self._stack.pop()
+
+        elif kind == 0xFB:
+            # SCRLRGHT
+            self._display.scroll_right(legacy_mode=self._quirks.legacy_scrolling)
+
+        elif kind == 0xFC:
+            # SCRLLFT
+            self._display.scroll_left(legacy_mode=self._quirks.legacy_scrolling)
+
+        elif kind == 0xFD:
+            # EXIT
+            self.on_exit.emit()
+            return StepResult.Exit
+
+        elif kind == 0xFE:
+            # LORES
+            self._display.set_mode(Display.Mode.LORES)
+
+        elif kind == 0xFF:
+            # HIRES
+            self._display.set_mode(Display.Mode.HIRES)
+
+        else:
+            # SYS
+            logger.warning(f"Unsupported SYS opcode: {code:04X}")
+
+        self._pc += 2
+        return None
+
+    def _process_1(self, code: int) -> StepResult | None:
+        # JP
+        address = code & 0xFFF
+        if address == self._pc:
+            # Yep, that's a loop
+            self.on_loop.emit()
+            return StepResult.Loop
+
+        idle = address < self._pc and self._is_idle_loop(address, self._pc)
+        self._pc = address
+        return StepResult.Idle if idle else None
+
+    def _process_2(self, code: int) -> StepResult | None:
+        # CALL
+        if len(self._stack) == Stack.STACK_SIZE:
+            raise RuntimeError("Stack full")
+        self._stack.append(self._pc)
+        self._pc = code & 0xFFF
+        return None
+
+    def _process_3(self, code: int) -> StepResult | None:
+        # SEB
+        if self._v[(code >> 8) & 0xF] == code & 0xFF:
+            self._pc += 2
+        self._pc += 2
+        return None
+
+    def _process_4(self, code: int) -> StepResult | None:
+        # SNEB
+        if self._v[(code >> 8) & 0xF] != code & 0xFF:
+            self._pc += 2
+        self._pc += 2
+        return None
+
+    def _process_5(self, code: int) -> StepResult | None:
+        v = self._v
+        x = (code >> 8) & 0xF
+        y = (code >> 4) & 0xF
+        kind = code & 0xF
+
+        if kind == 0x0:
+            # SE
+            if v[x] == v[y]:
+                self._pc += 2
+
+        elif kind == 0x2:
+            # SRGI
+            assert x <= y
+            memory = self._memory
+            i = self._i
+            for offset in range(y - x + 1):
+                memory[(i + offset) & 0xFFFF] = v[x + offset]
+
+        elif kind == 0x3:
+            # LRGI
+            assert x <= y
+            memory = self._memory
+            i = self._i
+            for offset in range(y - x + 1):
+                v[x + offset] = memory[(i + offset) & 0xFFFF]
+
+        else:
+            return StepResult.BadOpCode
+
+        self._pc += 2
+        return None
+
+    def _process_6(self, code: int) -> StepResult | None:
+        # LDB
+        self._v[(code >> 8) & 0xF] = code & 0xFF
+        self._pc += 2
+        return None
+
+    def _process_7(self, code: int) -> StepResult | None:
+        # ADDB
+        v = self._v
+        x = (code >> 8) & 0xF
+        v[x] = (v[x] + (code & 0xFF)) & 0xFF
+        self._pc += 2
+        return None
+
+    def _process_8(self, code: int) -> StepResult | None:
+        v = self._v
+        x = (code >> 8) & 0xF
+        y = (code >> 4) & 0xF
+        kind = code & 0xF
+
+        if kind == 0x0:
+            # LD
+            v[x] = v[y]
+
+        elif kind == 0x1:
+            # OR
+            v[x] |= v[y]
+            if self._quirks.vf_reset:
+                v[0xF] = 0
+
+        elif kind == 0x2:
+            # AND
+            v[x] &= v[y]
+            if self._quirks.vf_reset:
+                v[0xF] = 0
+
+        elif kind == 0x3:
+            # XOR
+            v[x] ^= v[y]
+            if self._quirks.vf_reset:
+                v[0xF] = 0
+
+        elif kind == 0x4:
+            # ADD
+            added = v[x] + v[y]
+            v[x] = added & 0xFF
+            v[0xF] = added > 0xFF
+
+        elif kind == 0x5:
+            # SUB
+            vx = v[x]
+            vy = v[y]
+            v[x] = (vx - vy) & 0xFF
+            v[0xF] = vx >= vy
+
+        elif kind == 0x6:
+            # SHR
+            if self._quirks.shift_y:
+                v[x] = v[y]
+            vx = v[x]
+            v[x] = vx >> 1
+            v[0xF] = vx & 1
+
+        elif kind == 0x7:
+            # SUBN
+            vx = v[x]
+            vy = v[y]
+            v[x] = (vy - vx) & 0xFF
+            v[0xF] = vx <= vy
+
+        elif kind == 0xE:
+            # SHL
+            if self._quirks.shift_y:
+                v[x] = v[y]
+            vx = v[x]
+            v[x] = (vx << 1) & 0xFF
+            v[0xF] = vx >> 7
+
+        else:
+            return StepResult.BadOpCode
+
+        self._pc += 2
+        return None
+
+    def _process_9(self, code: int) -> StepResult | None:
+        if code & 0xF != 0x0:
+            return StepResult.BadOpCode
+
+        # SNE
+        v = self._v
+        if v[(code >> 8) & 0xF] != v[(code >> 4) & 0xF]:
+            self._pc += 2
+        self._pc += 2
+        return None
+
+    def _process_a(self, code: int) -> StepResult | None:
+        # LDI
+        self._i = code & 0xFFF
+        self._pc += 2
+        return None
+
+    def _process_b(self, code: int) -> StepResult | None:
+        # JPOFST
+        if self._quirks.jump_vx:
+            offset = self._v[(code >> 8) & 0xF]
+        else:
+            offset = self._v[0]
+        self._pc = (offset + (code & 0xFFF)) & 0xFFFF
+        return None
+
+    def _process_c(self, code: int) -> StepResult | None:
+        # RND
+        self._v[(code >> 8) & 0xF] = code & 0xFF & self._rng.randint(0, 256)
+        self._pc += 2
+        return None
+
+    def _process_d(self, code: int) -> StepResult | None:
+        v = self._v
+        vx = v[(code >> 8) & 0xF]
+        vy = v[(code >> 4) & 0xF]
+        height = code & 0xF
+        display = self._display
+        clip = self._quirks.draw_clipping
+
+        if height == 0:
+            # SDRW
+            if display._plane_mask == 3:
+                collision = display.super_draw_multiplane(
+                    vx, vy, self._read_sprite(16 * 2 * 2), clip=clip
+                )
+            else:
+                collision = display.super_draw(
+                    vx, vy, self._read_sprite(16 * 2), clip=clip
+                )
+
+        else:
+            # DRW
+            if display._plane_mask == 3:
+                collision = display.draw_multiplane(
+                    vx, vy, self._read_sprite(height * 2), clip=clip
+                )
+            else:
+                collision = display.draw(vx, vy, self._read_sprite(height), clip=clip)
+
+        v[0xF] = collision
+        self._pc += 2
+        return None
+
+    def _process_e(self, code: int) -> StepResult | None:
+        key = self._v[(code >> 8) & 0xF]
+        kind = code & 0xFF
+
+        if kind == 0x9E:
+            # SKP
+            if self._keypad.get_kx(Byte(key)):
+                self._pc += 2
+
+        elif kind == 0xA1:
+            # SKNP
+            if not self._keypad.get_kx(Byte(key)):
+                self._pc += 2
+
+        else:
+            return StepResult.BadOpCode
+
+        self._pc += 2
+        return None
+
+    def _process_f(self, code: int) -> StepResult | None:
+        v = self._v
+        x = (code >> 8) & 0xF
+        kind = code & 0xFF
+
+        if kind == 0x00:
+            # LDIL
+            self._pc += 2
+            pc = self._pc
+            self._i = (self._memory[pc] << 8) | self._memory[pc + 1]
+
+        elif kind == 0x01:
+            # PLN
+            self._display.set_plane_mask(Byte(x))
+
+        elif kind == 0x02:
+            # AUD
+            buffer = self._read_sprite(Audio.PATTERN_BUFFER_SIZE)
+            self._audio.set_pattern_buffer([Byte(b) for b in buffer])
+            self._emit_audio_update()
+
+        elif kind == 0x07:
+            # LDLY
+            v[x] = self._delay_timer
+
+        elif kind == 0x0A:
+            # LDK
+            key = self._keypad._last_released_key
+            if key is None:
+                self._waiting_for_key = True
+                return StepResult.Idle
+            v[x] = key.value
+
+        elif kind == 0x15:
+            # SDLY
+            self._delay_timer = v[x]
+
+        elif kind == 0x18:
+            # SSND
+            self._sound_timer = v[x]
+
+        elif kind == 0x1E:
+            # ADDI
+            addition = self._i + v[x]
+            if self._quirks.add_i_carry:
+                v[0xF] = addition >= 0x1000
+            self._i = addition & 0xFFFF
+
+        elif kind == 0x29:
+            # LDF
+            self._i = Memory.FONT_START_LOCATION.value + x * Font.SPRITE_HEIGHT
+
+        elif kind == 0x30:
+            # SLDF
+            self._i = (
+                Memory.SUPER_FONT_START_LOCATION.value + x * Font.SUPER_SPRITE_HEIGHT
+            )
+
+        elif kind == 0x33:
+            # LDBCD
+            value = v[x]
+            memory = self._memory
+            i = self._i
+            memory[i] = value // 100
+            memory[(i + 1) & 0xFFFF] = (value % 100) // 10
+            memory[(i + 2) & 0xFFFF] = value % 10
+
+        elif kind == 0x3A:
+            # PTCH
+            self._audio.set_pitch(Byte(v[x]))
+            self._emit_audio_update()
+
+        elif kind == 0x55:
+            # SRG
+            memory = self._memory
+            i = self._i
+            for offset in range(x + 1):
+                memory[(i + offset) & 0xFFFF] = v[offset]
+            if self._quirks.index_increment:
+                self._i = (i + x + 1) & 0xFFFF
+
+        elif kind == 0x65:
+            # LRG
+            memory = self._memory
+            i = self._i
+            for offset in range(x + 1):
+                v[offset] = memory[(i + offset) & 0xFFFF]
+            if self._quirks.index_increment:
+                self._i = (i + x + 1) & 0xFFFF
+
+        elif kind == 0x75:
+            # SRGF
+            i = self._i
+            for offset in range(x + 1):
+                self._local_storage[i + offset] = v[offset]
+
+        elif kind == 0x85:
+            # LRGF
+            i = self._i
+            for offset in range(x + 1):
+                v[offset] = self._local_storage[i + offset]
+
+        else:
+            return StepResult.BadOpCode
+
+        self._pc += 2
+        return None
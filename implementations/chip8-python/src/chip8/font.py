@@ -1,6 +1,3 @@
-from .types import Byte
-
-
 class Font:
     SPRITE_WIDTH = 4
     SPRITE_HEIGHT = 5
@@ -10,14 +7,13 @@ class Font:
     SUPER_SPRITE_HEIGHT = 10
     SUPER_SPRITE_SIZE = SUPER_SPRITE_WIDTH * SUPER_SPRITE_HEIGHT
 
-    _data: list[Byte]
+    _data: bytes
 
     @classmethod
     def get_default(cls):
         font = cls()
-        font._data = [
-            Byte(d)
-            for d in (
+        font._data = bytes(
+            (
                 0xF0,
                 0x90,
                 0x90,
@@ -99,15 +95,14 @@ class Font:
                 0x80,
                 0x80,  # F
             )
-        ]
+        )
         return font
 
     @classmethod
     def get_super_default(cls):
         font = cls()
-        font._data = [
-            Byte(d)
-            for d in (
+        font._data = bytes(
+            (
                 0x3C,
                 0x7E,
                 0xE7,
@@ -269,5 +264,5 @@ class Font:
                 0x00,
                 0x00,
             )
-        ]
+        )
         return font
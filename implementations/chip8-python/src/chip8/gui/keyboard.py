@@ -1,4 +1,5 @@
 from chip8.engine import Engine
+from chip8.fastcore import FastEngine
 from chip8.types import Byte
 import pygame
 
@@ -24,11 +25,20 @@ KEY_MAP = {
 
 
 class Keyboard:
-    def process(self, engine: Engine, event: pygame.event.Event) -> None:
+    def process(self, engine: Engine | FastEngine, event: pygame.event.Event) -> None:
+        key_event = self.key_event(event)
+        if key_event is not None:
+            key, pressed = key_event
+            engine._keypad.set_kx(Byte(key), pressed)
+
+    def key_event(self, event: pygame.event.Event) -> tuple[int, bool] | None:
+        """Get the keypad key and its state changed by an event, if any."""
         if event.type == pygame.KEYDOWN:
             if event.scancode in KEY_MAP.keys():
-                engine._keypad.set_kx(Byte(KEY_MAP[event.scancode]), True)
+                return KEY_MAP[event.scancode], True
 
         if event.type == pygame.KEYUP:
             if event.scancode in KEY_MAP.keys():
-                engine._keypad.set_kx(Byte(KEY_MAP[event.scancode]), False)
+                return KEY_MAP[event.scancode], False
+
+        return None
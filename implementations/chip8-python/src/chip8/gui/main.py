@@ -1,4 +1,5 @@
 import logging
+import queue
 from typing import Annotated, Optional
 from chip8.gui.keyboard import Keyboard
 from chip8.gui.screen import Screen
@@ -8,29 +9,24 @@ import typer
 
 from chip8.gui.sound import Buzzer
 
+from chip8.config import EngineConfig
+from chip8.display import Display
 from chip8.engine import Engine, StepResult
+from chip8.fastcore import FastEngine
 from chip8.mode import EmulationMode
 from chip8.cartridge import Cartridge
 from chip8.quirks import QuirksMode
+from chip8.rewind import Rewind
+from chip8.sharedframe import FrameStatus, SharedFrame
+from chip8.worker import start_worker
 
+# Size of a display pixel in the window
+WINDOW_SCALE = 5
+# Key held to rewind, a snapshot back per frame
+REWIND_KEY = pygame.KSCAN_BACKSPACE
 
-def start_gui(engine: Engine) -> None:
-    pygame.init()
-
-    pygame.mixer.init()
-    pygame.mixer.set_num_channels(1)
-
-    pygame.display.set_caption(f"CHIP-8 (emulation mode: {engine._emulation_mode})")
-    screen = pygame.display.set_mode((640, 320))
-    clock = pygame.time.Clock()
-
-    running = True
-    paused = False
-
-    gui_screen = Screen()
-    gui_keyboard = Keyboard()
 
-    beep_voice = pygame.mixer.Channel(0)
+def _default_buzzer() -> Buzzer:
     buzzer = Buzzer()
     buzzer.generate(
         4000.0,
@@ -53,8 +49,31 @@ def start_gui(engine: Engine) -> None:
             0xFF,
         ],
     )
+    return buzzer
+
+
+def start_gui(engine: Engine | FastEngine) -> None:
+    pygame.init()
+
+    pygame.mixer.init()
+    pygame.mixer.set_num_channels(1)
+
+    pygame.display.set_caption(f"CHIP-8 (emulation mode: {engine._emulation_mode})")
+    size_x, size_y = engine._display.SCREEN_SIZE
+    screen = pygame.display.set_mode((size_x * WINDOW_SCALE, size_y * WINDOW_SCALE))
+    clock = pygame.time.Clock()
+
+    running = True
+    paused = False
+    rewinding = False
+    # Save states are only supported by the reference engine
+    rewind = Rewind(engine) if isinstance(engine, Engine) else None
+
+    gui_screen = Screen(engine._display.SCREEN_SIZE, WINDOW_SCALE)
+    gui_keyboard = Keyboard()
 
-    pixel_surface = pygame.Surface((128, 64))
+    beep_voice = pygame.mixer.Channel(0)
+    buzzer = _default_buzzer()
 
     @engine.on_loop.connect
     def on_loop():
@@ -77,44 +96,160 @@ def start_gui(engine: Engine) -> None:
         beep_voice.stop()
 
     while running:
-        for event in pygame.event.get():
+        # Nothing changes while paused, so sleep until the next event
+        events = [pygame.event.wait()] if paused else pygame.event.get()
+        exposed = False
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
 
             elif event.type == pygame.KEYDOWN:
                 if event.scancode == pygame.KSCAN_ESCAPE:
                     running = False
+                elif event.scancode == REWIND_KEY and rewind is not None:
+                    rewinding = True
+                    paused = False
+
+            elif event.type == pygame.KEYUP:
+                if event.scancode == REWIND_KEY:
+                    rewinding = False
+
+            elif event.type == pygame.WINDOWEXPOSED:
+                exposed = True
 
             gui_keyboard.process(engine, event)
 
-        if not paused:
+        if paused:
+            beep_voice.stop()
+        elif rewinding and rewind is not None:
+            beep_voice.stop()
+            rewind.rewind()
+        else:
             result = engine.step()
             if result == StepResult.BadOpCode:
                 raise RuntimeError("Bad opcode")
 
-        if engine.beeping:
-            if not beep_voice.get_busy():
-                buzzer.play_on_voice(beep_voice)
-        else:
-            beep_voice.stop()
-
-        engine.step_timers()
+            if engine.beeping:
+                if not beep_voice.get_busy():
+                    buzzer.play_on_voice(beep_voice)
+            else:
+                beep_voice.stop()
 
-        gui_screen.process(engine, pixel_surface)
+            engine.step_timers()
+            if rewind is not None:
+                rewind.record()
 
-        pygame.transform.scale(pixel_surface, (640, 320), screen)
-        pygame.display.flip()
+        if gui_screen.process(engine) or exposed:
+            gui_screen.blit(screen)
+            pygame.display.flip()
 
-        clock.tick(60)
+        if not paused:
+            clock.tick(60)
 
     pygame.mixer.quit()
     pygame.quit()
 
 
+def start_gui_worker(config: EngineConfig, cartridge: Cartridge) -> None:
+    """Show a cartridge running in a worker process.
+
+    The worker publishes frames to a shared frame, and this process only
+    renders them, plays its sound and forwards keypad events.
+    """
+    shared_frame = SharedFrame.create()
+    process, key_events, audio_updates, stop = start_worker(
+        config, cartridge, shared_frame
+    )
+    print(f"Shared frame: {shared_frame.name}")
+
+    pygame.init()
+
+    pygame.mixer.init()
+    pygame.mixer.set_num_channels(1)
+
+    pygame.display.set_caption(
+        f"CHIP-8 (emulation mode: {config.emulation_mode}, worker)"
+    )
+    size = (size_x, size_y) = Display.SCREEN_SIZE
+    screen = pygame.display.set_mode((size_x * WINDOW_SCALE, size_y * WINDOW_SCALE))
+    clock = pygame.time.Clock()
+
+    running = True
+    status = FrameStatus.Running
+
+    gui_screen = Screen(size, WINDOW_SCALE)
+    gui_keyboard = Keyboard()
+
+    beep_voice = pygame.mixer.Channel(0)
+    buzzer = _default_buzzer()
+
+    try:
+        while running:
+            exposed = False
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+
+                elif event.type == pygame.KEYDOWN:
+                    if event.scancode == pygame.KSCAN_ESCAPE:
+                        running = False
+
+                elif event.type == pygame.WINDOWEXPOSED:
+                    exposed = True
+
+                key_event = gui_keyboard.key_event(event)
+                if key_event is not None:
+                    key_events.put(key_event)
+
+            while True:
+                try:
+                    frequency, buffer = audio_updates.get_nowait()
+                except queue.Empty:
+                    break
+                buzzer.generate(frequency, buffer)
+                beep_voice.stop()
+
+            if shared_frame.beeping:
+                if not beep_voice.get_busy():
+                    buzzer.play_on_voice(beep_voice)
+            else:
+                beep_voice.stop()
+
+            if gui_screen.process_shared(shared_frame) or exposed:
+                gui_screen.blit(screen)
+                pygame.display.flip()
+
+            if status != shared_frame.status:
+                status = shared_frame.status
+                if status == FrameStatus.Ended:
+                    print("End")
+                elif status == FrameStatus.Failed:
+                    raise RuntimeError("Bad opcode")
+
+            if not process.is_alive():
+                raise RuntimeError("Worker process stopped")
+
+            clock.tick(60)
+
+    finally:
+        stop.set()
+        process.join()
+        shared_frame.close()
+        shared_frame.unlink()
+
+        pygame.mixer.quit()
+        pygame.quit()
+
+
 def main(
     cartridge_path: Path,
     *,
     verbose: bool = False,
+    fast_core: bool = False,
+    worker: bool = False,
+    block_execution: bool = False,
+    aot: bool = False,
+    fusion_stats: bool = False,
     instructions_per_step: Optional[int] = None,
     # Quirks
     quirks_shift_y: Optional[bool] = None,
@@ -137,50 +272,46 @@ def main(
     if verbose:
         logging.basicConfig(level=logging.INFO)
 
-    engine = Engine()
+    quirks = {
+        "shift_y": quirks_shift_y,
+        "add_i_carry": quirks_add_i_carry,
+        "vf_reset": quirks_vf_reset,
+        "jump_vx": quirks_jump_vx,
+        "index_increment": quirks_index_increment,
+        "draw_clipping": quirks_draw_clipping,
+        "legacy_scrolling": quirks_legacy_scrolling,
+        "display_wait": quirks_display_wait,
+    }
+    config = EngineConfig(
+        emulation_mode=emulation_mode or EmulationMode.Chip8,
+        quirks_mode=quirks_mode,
+        quirks={name: value for name, value in quirks.items() if value is not None},
+        instructions_per_step=instructions_per_step,
+        fast_core=fast_core,
+        block_execution=block_execution,
+        aot=aot,
+    )
+
+    try:
+        config.validate()
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
 
     cartridge = Cartridge.from_path(cartridge_path)
-    if emulation_mode is None:
-        emulation_mode = EmulationMode.Chip8
-
-    # Apply mode
-    engine.set_emulation_mode(emulation_mode)
-
-    # Apply quirks
-    if emulation_mode == EmulationMode.Chip8:
-        engine.quirks.apply_mode(QuirksMode.Chip8)
-    elif emulation_mode == EmulationMode.SuperChip:
-        engine.quirks.apply_mode(QuirksMode.SuperChipModern)
-    elif emulation_mode == EmulationMode.XoChip:
-        engine.quirks.apply_mode(QuirksMode.XoChip)
-
-    if quirks_shift_y is not None:
-        engine.quirks.shift_y = quirks_shift_y
-    if quirks_add_i_carry is not None:
-        engine.quirks.add_i_carry = quirks_add_i_carry
-    if quirks_vf_reset is not None:
-        engine.quirks.vf_reset = quirks_vf_reset
-    if quirks_jump_vx is not None:
-        engine.quirks.jump_vx = quirks_jump_vx
-    if quirks_index_increment is not None:
-        engine.quirks.index_increment = quirks_index_increment
-    if quirks_draw_clipping is not None:
-        engine.quirks.draw_clipping = quirks_draw_clipping
-    if quirks_legacy_scrolling is not None:
-        engine.quirks.legacy_scrolling = quirks_legacy_scrolling
-    if quirks_display_wait is not None:
-        engine.quirks.display_wait = quirks_display_wait
-
-    if quirks_mode is not None:
-        engine.quirks.apply_mode(quirks_mode)
-
-    if instructions_per_step is not None:
-        engine.set_instructions_per_step(instructions_per_step)
+    if worker:
+        start_gui_worker(config, cartridge)
+        return
 
+    engine = config.create_engine()
     engine.load_cartridge(cartridge)
 
     start_gui(engine)
 
+    if fusion_stats and isinstance(engine, Engine):
+        stats = engine.fusion_stats()
+        for name, count in sorted(stats.items(), key=lambda item: -item[1]):
+            print(f"{name}: {count}")
+
 
 if __name__ == "__main__":
     typer.run(main)
@@ -1,4 +1,6 @@
 from chip8.engine import Engine
+from chip8.fastcore import FastEngine
+from chip8.sharedframe import SharedFrame
 import pygame
 
 HI_COLOR = "yellow"
@@ -6,23 +8,81 @@ LO_COLOR = "darkgoldenrod4"
 HI2_COLOR = "orange"
 OVERLAP_COLOR = "darkorange4"
 
+# Colors of the frame buffer indices (plane 0 in bit 0, plane 1 in bit 1)
+INDEX_COLORS = (LO_COLOR, HI_COLOR, HI2_COLOR, OVERLAP_COLOR)
+
 
 class Screen:
-    def process(self, engine: Engine, surface: pygame.Surface) -> None:
-        surface.fill(LO_COLOR)
-
-        screen_x = engine._display.SCREEN_SIZE_X
-        for idx, value in enumerate(engine._display.planes[0]):
-            x = idx % screen_x
-            y = idx // screen_x
-            surface.set_at((x, y), HI_COLOR if value == 1 else LO_COLOR)
-
-        for idx, value in enumerate(engine._display.planes[1]):
-            value0 = engine._display.planes[0][idx]
-            x = idx % screen_x
-            y = idx // screen_x
-
-            if value == 1 and value0 == 1:
-                surface.set_at((x, y), OVERLAP_COLOR)
-            elif value == 1 and value0 == 0:
-                surface.set_at((x, y), HI2_COLOR)
+    """Render the display on palettized surfaces.
+
+    The display frame buffer already holds palette indices, so dirty rows
+    are copied to the surface in a single buffer write, and scaled on a
+    surface kept from frame to frame.
+    """
+
+    _version: int | None
+    _sequence: int
+    _surface: pygame.Surface
+    _scaled_surface: pygame.Surface
+
+    def __init__(self, size: tuple[int, int], scale: int) -> None:
+        width, height = size
+        palette = [pygame.Color(color) for color in INDEX_COLORS]
+
+        self._version = None
+        self._sequence = 0
+        self._surface = pygame.Surface(size, depth=8)
+        self._surface.set_palette(palette)
+        self._scaled_surface = pygame.Surface((width * scale, height * scale), depth=8)
+        self._scaled_surface.set_palette(palette)
+
+    def process(self, engine: Engine | FastEngine) -> bool:
+        """Copy the display rows which changed since the last call.
+
+        Returns False if the display did not change, and the surfaces were
+        left untouched.
+        """
+        display = engine._display
+        if display.version == self._version:
+            return False
+
+        self._version = display.version
+        rows = display.take_dirty_rows()
+        if not rows:
+            return False
+
+        self._write_rows(display.frame_bytes(), rows)
+        return True
+
+    def process_shared(self, shared_frame: SharedFrame) -> bool:
+        """Copy the last frame published to a shared frame, if it is new.
+
+        Returns False if no frame was published since the last call.
+        """
+        if shared_frame.sequence == self._sequence:
+            return False
+
+        self._sequence, frame = shared_frame.read()
+        self._write_rows(memoryview(frame), range(self._surface.get_height()))
+        return True
+
+    def blit(self, target: pygame.Surface) -> None:
+        target.blit(self._scaled_surface, (0, 0))
+
+    def _write_rows(self, frame: memoryview, rows: range) -> None:
+        screen_x = self._surface.get_width()
+        pitch = self._surface.get_pitch()
+        buffer = self._surface.get_buffer()
+        if pitch == screen_x:
+            data = frame[rows.start * screen_x : rows.stop * screen_x]
+            buffer.write(data.tobytes(), rows.start * pitch)
+        else:
+            for y in rows:
+                data = frame[y * screen_x : (y + 1) * screen_x]
+                buffer.write(data.tobytes(), y * pitch)
+        # Release the lock held on the surface by its buffer
+        del buffer
+
+        pygame.transform.scale(
+            self._surface, self._scaled_surface.get_size(), self._scaled_surface
+        )
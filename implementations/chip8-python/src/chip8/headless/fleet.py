@@ -0,0 +1,149 @@
+import multiprocessing
+import os
+import time
+import traceback
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from chip8.cartridge import Cartridge
+from chip8.config import EngineConfig
+from chip8.headless.runner import InputEvent, run_headless
+from chip8.mode import EmulationMode
+from chip8.quirks import QuirksMode
+
+
+@dataclass
+class FleetJob:
+    """Cartridge to run for a number of frames, in a fleet."""
+
+    cartridge_path: Path
+    emulation_mode: EmulationMode
+    quirks_mode: QuirksMode | None
+    frames: int
+    inputs: list[InputEvent] = field(default_factory=list)
+    # Seconds of CPU time after which the job is stopped
+    cpu_time_limit: float | None = None
+    fast_core: bool = False
+
+    def describe(self) -> dict[str, object]:
+        return {
+            "cartridge": str(self.cartridge_path),
+            "emulation_mode": str(self.emulation_mode),
+            "quirks_mode": None if self.quirks_mode is None else str(self.quirks_mode),
+            "frames_limit": self.frames,
+        }
+
+
+@dataclass
+class FleetResult:
+    job: FleetJob
+    # Same as HeadlessResult.status, or "error" when the job raised
+    status: str
+    frames: int = 0
+    instructions: int = 0
+    elapsed: float = 0.0
+    cpu_time: float = 0.0
+    frame_hash: str | None = None
+    error: str | None = None
+
+    def to_json(self) -> dict[str, object]:
+        return {
+            **self.job.describe(),
+            "status": self.status,
+            "frames": self.frames,
+            "instructions": self.instructions,
+            "elapsed": self.elapsed,
+            "cpu_time": self.cpu_time,
+            "frame_hash": self.frame_hash,
+            "error": self.error,
+        }
+
+
+def run_job(job: FleetJob) -> FleetResult:
+    """Run a single fleet job, catching its errors in the result."""
+    cpu_start = time.process_time()
+    try:
+        engine = EngineConfig(
+            emulation_mode=job.emulation_mode,
+            quirks_mode=job.quirks_mode,
+            fast_core=job.fast_core,
+        ).create_engine()
+        engine.load_cartridge(Cartridge.from_path(job.cartridge_path))
+        result = run_headless(
+            engine, job.frames, inputs=job.inputs, cpu_time_limit=job.cpu_time_limit
+        )
+    except Exception:
+        return FleetResult(
+            job=job,
+            status="error",
+            cpu_time=time.process_time() - cpu_start,
+            error=traceback.format_exc(),
+        )
+
+    return FleetResult(
+        job=job,
+        status=result.status,
+        frames=result.frames,
+        instructions=result.instructions,
+        elapsed=result.elapsed,
+        cpu_time=time.process_time() - cpu_start,
+        frame_hash=result.frame_hash,
+    )
+
+
+def run_fleet(
+    jobs: Iterable[FleetJob], *, processes: int | None = None
+) -> Iterator[FleetResult]:
+    """Run jobs over a pool of processes, yielding results as jobs finish.
+
+    The pool has one process per core by default. Jobs are handed out one at
+    a time, so a process takes the next job as soon as it is done with one.
+    """
+    processes = processes or os.cpu_count() or 1
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap_unordered(run_job, jobs, chunksize=1)
+
+
+def fleet_jobs(
+    cartridge_paths: Iterable[Path],
+    *,
+    emulation_mode: EmulationMode,
+    quirks_modes: Iterable[QuirksMode | None],
+    frames: int,
+    inputs: list[InputEvent] | None = None,
+    cpu_time_limit: float | None = None,
+    fast_core: bool = False,
+) -> list[FleetJob]:
+    """Get a job for each cartridge and quirks mode.
+
+    Directories are replaced by the .ch8, .sc8 and .xo8 cartridges they
+    contain.
+    """
+    paths: list[Path] = []
+    for path in cartridge_paths:
+        if path.is_dir():
+            paths.extend(
+                sorted(
+                    child
+                    for child in path.rglob("*")
+                    if child.suffix.lower() in (".ch8", ".sc8", ".xo8")
+                )
+            )
+        else:
+            paths.append(path)
+
+    quirks_modes = list(quirks_modes)
+    return [
+        FleetJob(
+            cartridge_path=path,
+            emulation_mode=emulation_mode,
+            quirks_mode=quirks_mode,
+            frames=frames,
+            inputs=list(inputs or []),
+            cpu_time_limit=cpu_time_limit,
+            fast_core=fast_core,
+        )
+        for path in paths
+        for quirks_mode in quirks_modes
+    ]
@@ -0,0 +1,165 @@
+import json
+import logging
+from pathlib import Path
+from typing import Annotated, Optional
+
+import typer
+
+from chip8.cartridge import Cartridge
+from chip8.config import EngineConfig
+from chip8.engine import Engine
+from chip8.headless.fleet import fleet_jobs, run_fleet
+from chip8.headless.runner import (
+    frame_hash,
+    frame_rows,
+    load_input_script,
+    run_headless,
+)
+from chip8.mode import EmulationMode
+from chip8.quirks import QuirksMode
+from chip8.rewind import Rewind
+
+# Characters used to print each frame buffer index
+INDEX_CHARACTERS = " .#@"
+
+app = typer.Typer()
+
+
+@app.command()
+def run(
+    cartridge_path: Path,
+    *,
+    frames: int = 600,
+    input_script: Optional[Path] = None,
+    json_output: Annotated[bool, typer.Option("--json")] = False,
+    rewind_frames: Optional[int] = None,
+    rewind_budget: int = 32,
+    verbose: bool = False,
+    fast_core: bool = False,
+    block_execution: bool = False,
+    aot: bool = False,
+    instructions_per_step: Optional[int] = None,
+    # Quirks
+    quirks_shift_y: Optional[bool] = None,
+    quirks_add_i_carry: Optional[bool] = None,
+    quirks_vf_reset: Optional[bool] = None,
+    quirks_jump_vx: Optional[bool] = None,
+    quirks_index_increment: Optional[bool] = None,
+    quirks_draw_clipping: Optional[bool] = None,
+    quirks_legacy_scrolling: Optional[bool] = None,
+    quirks_display_wait: Optional[bool] = None,
+    # Quirks mode
+    quirks_mode: Annotated[
+        QuirksMode | None, typer.Option(parser=QuirksMode.parse)
+    ] = None,
+    # Emulation mode
+    emulation_mode: Annotated[
+        EmulationMode | None, typer.Option(parser=EmulationMode.parse)
+    ] = None,
+):
+    if verbose:
+        logging.basicConfig(level=logging.INFO)
+
+    quirks = {
+        "shift_y": quirks_shift_y,
+        "add_i_carry": quirks_add_i_carry,
+        "vf_reset": quirks_vf_reset,
+        "jump_vx": quirks_jump_vx,
+        "index_increment": quirks_index_increment,
+        "draw_clipping": quirks_draw_clipping,
+        "legacy_scrolling": quirks_legacy_scrolling,
+        "display_wait": quirks_display_wait,
+    }
+    config = EngineConfig(
+        emulation_mode=emulation_mode or EmulationMode.Chip8,
+        quirks_mode=quirks_mode,
+        quirks={name: value for name, value in quirks.items() if value is not None},
+        instructions_per_step=instructions_per_step,
+        fast_core=fast_core,
+        block_execution=block_execution,
+        aot=aot,
+    )
+
+    try:
+        engine = config.create_engine()
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+
+    rewind = None
+    if rewind_frames is not None:
+        if not isinstance(engine, Engine):
+            raise typer.BadParameter("Rewinding is not supported by the fast core")
+        # Snapshot every frame, the budget being in MiB
+        rewind = Rewind(engine, interval=1, budget=rewind_budget * 1024 * 1024)
+
+    engine.load_cartridge(Cartridge.from_path(cartridge_path))
+    inputs = load_input_script(input_script) if input_script else []
+    result = run_headless(engine, frames, inputs=inputs, rewind=rewind)
+
+    # Go back from the last frame, the latest snapshot being the last frame
+    if rewind is not None and rewind_frames is not None:
+        rewind.rewind(rewind_frames + 1)
+        result.frame_hash = frame_hash(engine)
+        result.frame = frame_rows(engine)
+
+    if json_output:
+        output = result.to_json()
+        if rewind is not None:
+            output["rewind_frame"] = rewind.frame
+        print(json.dumps(output))
+    else:
+        characters = str.maketrans("0123", INDEX_CHARACTERS)
+        for row in result.frame:
+            print(row.translate(characters).rstrip())
+        if rewind is not None:
+            print(f"Rewound to frame: {rewind.frame}")
+        print(f"Status: {result.status}")
+        print(f"Frames: {result.frames} ({result.frames_per_second:,.0f} frames/s)")
+        print(
+            f"Instructions: {result.instructions}"
+            f" ({result.instructions_per_second:,.0f} instructions/s)"
+        )
+        print(f"Frame hash: {result.frame_hash}")
+
+    if result.status == "bad-opcode":
+        raise typer.Exit(code=1)
+
+
+@app.command()
+def fleet(
+    cartridge_paths: list[Path],
+    *,
+    frames: int = 600,
+    input_script: Optional[Path] = None,
+    cpu_time_limit: Optional[float] = None,
+    processes: Optional[int] = None,
+    fast_core: bool = False,
+    # Quirks modes, all of them by default
+    quirks_mode: Annotated[
+        Optional[list[QuirksMode]], typer.Option(parser=QuirksMode.parse)
+    ] = None,
+    # Emulation mode
+    emulation_mode: Annotated[
+        EmulationMode | None, typer.Option(parser=EmulationMode.parse)
+    ] = None,
+):
+    """Run cartridges (or directories of cartridges) under quirks modes.
+
+    Prints a JSON line per job, as soon as it is done.
+    """
+    jobs = fleet_jobs(
+        cartridge_paths,
+        emulation_mode=emulation_mode or EmulationMode.Chip8,
+        quirks_modes=quirks_mode or list(QuirksMode),
+        frames=frames,
+        inputs=load_input_script(input_script) if input_script else [],
+        cpu_time_limit=cpu_time_limit,
+        fast_core=fast_core,
+    )
+
+    for result in run_fleet(jobs, processes=processes):
+        print(json.dumps(result.to_json()), flush=True)
+
+
+if __name__ == "__main__":
+    app()
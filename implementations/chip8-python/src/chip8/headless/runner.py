@@ -0,0 +1,132 @@
+import hashlib
+import json
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Sequence
+
+from chip8.display import Display
+from chip8.engine import Engine, StepResult
+from chip8.fastcore import FastEngine
+from chip8.rewind import Rewind
+from chip8.types import Byte
+
+
+@dataclass(frozen=True)
+class InputEvent:
+    """Keypad key pressed or released before running a frame."""
+
+    frame: int
+    key: int
+    pressed: bool
+
+
+def load_input_script(path: Path) -> list[InputEvent]:
+    """Load keypad inputs from a JSON list of {"frame", "key", "pressed"} objects."""
+    with open(path) as fd:
+        return [
+            InputEvent(frame=item["frame"], key=item["key"], pressed=item["pressed"])
+            for item in json.load(fd)
+        ]
+
+
+@dataclass
+class HeadlessResult:
+    # "completed" if every frame ran, "ended" on an infinite loop or an
+    # EXIT opcode, "bad-opcode" on a bad opcode, "timeout" when the CPU
+    # time limit was reached
+    status: str
+    frames: int
+    instructions: int
+    elapsed: float
+    frame_hash: str
+    # Frame buffer indices, as a string of digits per row
+    frame: list[str]
+
+    @property
+    def frames_per_second(self) -> float:
+        return self.frames / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def instructions_per_second(self) -> float:
+        return self.instructions / self.elapsed if self.elapsed else 0.0
+
+    def to_json(self) -> dict[str, object]:
+        return {
+            **asdict(self),
+            "frames_per_second": self.frames_per_second,
+            "instructions_per_second": self.instructions_per_second,
+        }
+
+
+def frame_hash(engine: Engine | FastEngine) -> str:
+    """Hash the frame buffer of an engine display."""
+    return hashlib.sha256(engine._display.frame_bytes()).hexdigest()
+
+
+def frame_rows(engine: Engine | FastEngine) -> list[str]:
+    """Get the frame buffer indices of an engine display, as rows of digits."""
+    frame = engine._display.frame_bytes().tobytes()
+    size_x = Display.SCREEN_SIZE_X
+    digits = frame.translate(bytes.maketrans(b"\x00\x01\x02\x03", b"0123"))
+    return [
+        digits[offset : offset + size_x].decode()
+        for offset in range(0, len(digits), size_x)
+    ]
+
+
+def run_headless(
+    engine: Engine | FastEngine,
+    frames: int,
+    *,
+    inputs: Sequence[InputEvent] = (),
+    cpu_time_limit: float | None = None,
+    rewind: Rewind | None = None,
+) -> HeadlessResult:
+    """Run a loaded engine for a number of frames, without waiting between them.
+
+    Keypad inputs are applied before the frame they are scheduled for. With a
+    CPU time limit, the run stops once the process used that many seconds.
+    Frames are recorded in the rewind buffer, if any.
+    """
+    status = "completed"
+    frame_count = 0
+
+    inputs_by_frame: dict[int, list[InputEvent]] = {}
+    for event in inputs:
+        inputs_by_frame.setdefault(event.frame, []).append(event)
+
+    start = time.perf_counter()
+    cpu_deadline = None
+    if cpu_time_limit is not None:
+        cpu_deadline = time.process_time() + cpu_time_limit
+
+    for frame in range(frames):
+        for event in inputs_by_frame.get(frame, ()):
+            engine._keypad.set_kx(Byte(event.key), event.pressed)
+
+        result = engine.step()
+        engine.step_timers()
+        frame_count += 1
+        if rewind is not None:
+            rewind.record()
+
+        if result == StepResult.BadOpCode:
+            status = "bad-opcode"
+            break
+        elif result in (StepResult.Loop, StepResult.Exit):
+            status = "ended"
+            break
+        elif cpu_deadline is not None and time.process_time() > cpu_deadline:
+            status = "timeout"
+            break
+    elapsed = time.perf_counter() - start
+
+    return HeadlessResult(
+        status=status,
+        frames=frame_count,
+        instructions=engine._ticks,
+        elapsed=elapsed,
+        frame_hash=frame_hash(engine),
+        frame=frame_rows(engine),
+    )
@@ -1,3 +1,4 @@
+from .signal import Signal
 from .types import Byte
 
 
@@ -10,12 +11,16 @@ class Keypad:
     _last_released_key_ticks: int
     _ticks: int
 
+    on_release: Signal
+
     def __init__(self) -> None:
         self._state = [False for _ in range(self.KEYS_COUNT)]
         self._last_released_key = None
         self._last_released_key_ticks = 0
         self._ticks = 0
 
+        self.on_release = Signal()
+
     def reset(self) -> None:
         for x in range(self.KEYS_COUNT):
             self._state[x] = False
@@ -32,6 +37,7 @@ class Keypad:
         if not value:
             self._last_released_key = key
             self._last_released_key_ticks = self._ticks
+            self.on_release.emit(key=key)
 
     def get_kx(self, key: Byte) -> bool:
         if key < 0 or key > 15:
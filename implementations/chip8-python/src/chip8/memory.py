@@ -1,5 +1,6 @@
 from .font import Font
 from .cartridge import Cartridge
+from .signal import Signal
 from .types import Byte, Address
 
 
@@ -12,30 +13,94 @@ class Memory:
 
     LOCAL_STORAGE_SIZE = 0xF
 
-    _data: list[Byte]
-    _local_storage: list[Byte]
+    # Memory writes are tracked by pages
+    PAGE_SHIFT = 8
+    PAGE_SIZE = 1 << PAGE_SHIFT
+    PAGE_COUNT = MEMORY_SIZE // PAGE_SIZE
 
-    def __init__(self) -> None:
-        self._data = [Byte(0) for _ in range(self.MEMORY_SIZE)]
-        self._local_storage = [Byte(0) for _ in range(self.LOCAL_STORAGE_SIZE)]
+    # Contents of the memory after a reset
+    TEMPLATE = bytes(MEMORY_SIZE)
 
-    def reset(self) -> None:
-        for x in range(len(self._data)):
-            self._data[x] = Byte(0)
+    _data: bytearray
+    _view: memoryview
+    _local_storage: bytearray
+    _local_storage_view: memoryview
+    _generation: int
+    _page_generations: list[int]
 
-    def store_memory(self, start: Address, memory: list[Byte]) -> None:
-        if start + len(memory) > len(self._data):
-            raise RuntimeError("Memory buffer overflow")
+    on_store: Signal
 
-        for i in range(len(memory)):
-            self._data[(start + i).value] = memory[i]
+    def __init__(self) -> None:
+        self._data = bytearray(self.TEMPLATE)
+        self._view = memoryview(self._data)
+        self._local_storage = bytearray(self.LOCAL_STORAGE_SIZE)
+        self._local_storage_view = memoryview(self._local_storage)
+        self._generation = 1
+        self._page_generations = [0] * self.PAGE_COUNT
 
-    def store_local_storage(self, start: Address, memory: list[Byte]) -> None:
-        if start + len(memory) > len(self._data):
-            raise RuntimeError("Memory buffer overflow")
+        self.on_store = Signal()
 
-        for i in range(len(memory)):
-            self._local_storage[(start + i).value] = memory[i]
+    def reset(self) -> None:
+        self._data[:] = self.TEMPLATE
+        self._page_generations = [self._generation] * self.PAGE_COUNT
+
+    def checkpoint(self) -> int:
+        """Get a token to find the pages written from now on.
+
+        Each page keeps the generation of its last write, and a checkpoint
+        starts a new generation, so any number of checkpoints can be used.
+        """
+        self._generation += 1
+        return self._generation
+
+    def dirty_pages_since(self, token: int) -> list[int]:
+        """Get the indices of the pages written since a checkpoint."""
+        return [
+            page
+            for page, generation in enumerate(self._page_generations)
+            if generation >= token
+        ]
+
+    def reset_tracking(self) -> None:
+        """Consider every page as clean, for all checkpoints."""
+        self._page_generations = [0] * self.PAGE_COUNT
+
+    def store_memory(self, start: Address, memory: bytes | list[Byte]) -> None:
+        """Store bytes from an address, wrapping around the end of the memory."""
+        split = self.MEMORY_SIZE - start.value
+        if len(memory) <= split:
+            self._store(start.value, memory)
+        else:
+            self._store(start.value, memory[:split])
+            self._store(0, memory[split:])
+
+    def store_local_storage(self, start: Address, memory: bytes | list[Byte]) -> None:
+        """Store bytes from an address, wrapping around like memory stores."""
+        split = self.MEMORY_SIZE - start.value
+        parts = [(start.value, memory)]
+        if len(memory) > split:
+            parts = [(start.value, memory[:split]), (0, memory[split:])]
+
+        for offset, data in parts:
+            if offset + len(data) > len(self._local_storage):
+                raise RuntimeError("Local storage overflow")
+        for offset, data in parts:
+            self._local_storage[offset : offset + len(data)] = data
+
+    def _store(self, start: int, memory: bytes | list[Byte]) -> None:
+        if not memory:
+            return
+
+        self._data[start : start + len(memory)] = memory
+
+        first_page = start >> self.PAGE_SHIFT
+        last_page = (start + len(memory) - 1) >> self.PAGE_SHIFT
+        self._page_generations[first_page] = self._generation
+        if last_page > first_page:
+            for page in range(first_page + 1, last_page + 1):
+                self._page_generations[page] = self._generation
+
+        self.on_store.emit(start=start, count=len(memory))
 
     def store_font(self, font: Font) -> None:
         self.store_memory(self.FONT_START_LOCATION, font._data)
@@ -43,15 +108,15 @@ class Memory:
     def store_super_font(self, font: Font) -> None:
         self.store_memory(self.SUPER_FONT_START_LOCATION, font._data)
 
-    def read_memory(self, start: Address, count: int) -> list[Byte]:
-        return self._data[start.value : start.value + count]
+    def read_memory(self, start: Address, count: int) -> memoryview:
+        """Read memory without copying it: the view follows later writes."""
+        return self._view[start.value : start.value + count]
 
-    def read_local_storage(self, start: Address, count: int) -> list[Byte]:
-        return self._local_storage[start.value : start.value + count]
+    def read_local_storage(self, start: Address, count: int) -> memoryview:
+        return self._local_storage_view[start.value : start.value + count]
 
-    def read_opcode(self, start: Address) -> Address:
-        code_array = self._data[start.value : start.value + 2]
-        return Address((code_array[0].value << 8) + code_array[1].value)
+    def read_opcode(self, start: Address) -> int:
+        return (self._data[start.value] << 8) | self._data[start.value + 1]
 
     def store_cartridge(self, cartridge: Cartridge) -> None:
         self.store_memory(self.CARTRIDGE_START_LOCATION, cartridge._data)
@@ -7,53 +7,53 @@ class OpCode:
     pass
 
 
-@dataclass
+@dataclass(frozen=True)
 class SYS(OpCode):
     """SYS (0NNN) - Execute a system instruction NNN."""
 
     address: Address
 
 
-@dataclass
+@dataclass(frozen=True)
 class HIRES(OpCode):
     """HIRES (00FF) - Change the display to higher resolution (S-CHIP only)."""
 
 
-@dataclass
+@dataclass(frozen=True)
 class LORES(OpCode):
     """LORES (00FE) - Change the display to lower resolution (S-CHIP only)."""
 
 
-@dataclass
+@dataclass(frozen=True)
 class SCRLDWN(OpCode):
     """SCRLDWN (00CN) - Scroll down N lines (S-CHIP only)."""
 
     height: Byte
 
 
-@dataclass
+@dataclass(frozen=True)
 class SCRLRGHT(OpCode):
     """SCRLRGHT (OOFB) - Scroll right (S-CHIP only)."""
 
 
-@dataclass
+@dataclass(frozen=True)
 class SCRLLFT(OpCode):
     """SCRLLFT (00FC) - Scroll left (S-CHIP only)."""
 
 
-@dataclass
+@dataclass(frozen=True)
 class SCRLUP(OpCode):
     """SCRLUP (00DN) - Scroll up N pixels. (XO-CHIP only)."""
 
     height: Byte
 
 
-@dataclass
+@dataclass(frozen=True)
 class EXIT(OpCode):
     """EXIT (00FD) - Exit interpreter (S-CHIP only)."""
 
 
-@dataclass
+@dataclass(frozen=True)
 class SDRW(OpCode):
     """SDRW (DXY0) - Draw a 16x16 sprite (S-CHIP only)."""
 
@@ -61,31 +61,31 @@ class SDRW(OpCode):
     register_y: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class CLS(OpCode):
     """CLS (00E0) - Clear screen."""
 
 
-@dataclass
+@dataclass(frozen=True)
 class RET(OpCode):
     """RET (00EE) - Return from procedure."""
 
 
-@dataclass
+@dataclass(frozen=True)
 class JP(OpCode):
     """JP (1NNN) - Jump to address NNN."""
 
     address: Address
 
 
-@dataclass
+@dataclass(frozen=True)
 class CALL(OpCode):
     """CALL (2NNN) - Push PC to stack and jump to address NNN."""
 
     address: Address
 
 
-@dataclass
+@dataclass(frozen=True)
 class SEB(OpCode):
     """SEB (3XNN) - Jump if VX == byte NN."""
 
@@ -93,7 +93,7 @@ class SEB(OpCode):
     byte: Byte
 
 
-@dataclass
+@dataclass(frozen=True)
 class SNEB(OpCode):
     """SNEB (4XNN) - Jump if VX != byte NN."""
 
@@ -101,7 +101,7 @@ class SNEB(OpCode):
     byte: Byte
 
 
-@dataclass
+@dataclass(frozen=True)
 class SE(OpCode):
     """SE (5XY0) - Jump if VX == VY."""
 
@@ -109,7 +109,7 @@ class SE(OpCode):
     register2: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class SRGI(OpCode):
     """SRGI (5XY2) - Store VX to VY in (I..I+(Y-X)) (XO-CHIP only)."""
 
@@ -117,7 +117,7 @@ class SRGI(OpCode):
     max_register: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class LRGI(OpCode):
     """LRGI (5XY3) - Load VX to VY from (I..I+(Y-X)) (XO-CHIP only)."""
 
@@ -125,7 +125,7 @@ class LRGI(OpCode):
     max_register: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class LDB(OpCode):
     """LDB (6XNN) - VX = byte NN."""
 
@@ -133,7 +133,7 @@ class LDB(OpCode):
     byte: Byte
 
 
-@dataclass
+@dataclass(frozen=True)
 class ADDB(OpCode):
     """ADDB (7XNN) - VX += byte NN."""
 
@@ -141,7 +141,7 @@ class ADDB(OpCode):
     byte: Byte
 
 
-@dataclass
+@dataclass(frozen=True)
 class LD(OpCode):
     """LD (8XY0) - VX = VY."""
 
@@ -149,7 +149,7 @@ class LD(OpCode):
     register2: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class OR(OpCode):
     """OR (8XY1) - VX = VX | VY."""
 
@@ -157,7 +157,7 @@ class OR(OpCode):
     register2: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class AND(OpCode):
     """AND (8XY2) - VX = VX & VY."""
 
@@ -165,7 +165,7 @@ class AND(OpCode):
     register2: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class XOR(OpCode):
     """XOR (8XY3) - VX = VX ^ VY."""
 
@@ -173,7 +173,7 @@ class XOR(OpCode):
     register2: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class ADD(OpCode):
     """ADD (8XY4) - VX = VX + VY."""
 
@@ -181,7 +181,7 @@ class ADD(OpCode):
     register2: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class SUB(OpCode):
     """SUB (8XY5) - VX = VX - VY."""
 
@@ -189,7 +189,7 @@ class SUB(OpCode):
     register2: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class SHR(OpCode):
     """SHR (8XY6) - VX = VX >> VY."""
 
@@ -197,7 +197,7 @@ class SHR(OpCode):
     register2: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class SUBN(OpCode):
     """SUBN (8XY7) - VX = VY - VX."""
 
@@ -205,7 +205,7 @@ class SUBN(OpCode):
     register2: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class SHL(OpCode):
     """SHL (8XYF) - VX = VX << VY."""
 
@@ -213,7 +213,7 @@ class SHL(OpCode):
     register2: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class SNE(OpCode):
     """SNE (9XY0) - Jump if VX != VY."""
 
@@ -221,14 +221,14 @@ class SNE(OpCode):
     register2: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class LDI(OpCode):
     """LDI (ANNN) - I = address NNN."""
 
     address: Address
 
 
-@dataclass
+@dataclass(frozen=True)
 class JPOFST(OpCode):
     """JPOFST (BNNN) - Jump to address NNN + register V0.
 
@@ -242,7 +242,7 @@ class JPOFST(OpCode):
     register: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class RND(OpCode):
     """RND (CXNN) - VX = (rand() % 256) | byte NN."""
 
@@ -250,7 +250,7 @@ class RND(OpCode):
     byte: Byte
 
 
-@dataclass
+@dataclass(frozen=True)
 class DRW(OpCode):
     """DRW (DXYN) - Draw a sprite of height N at coordinates VX and VY."""
 
@@ -259,47 +259,47 @@ class DRW(OpCode):
     height: Byte
 
 
-@dataclass
+@dataclass(frozen=True)
 class SKP(OpCode):
     """SKP (EX9E) - Skip to next instruction if key KX is pressed."""
 
     register: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class SKNP(OpCode):
     """SKNP (EXA1) - Skip to next instruction if key KX is NOT pressed."""
 
     register: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class LDIL(OpCode):
     """LDIL (F000, NNNN) - I = long address NNNN (XO-CHIP only)."""
 
     address: Address
 
 
-@dataclass
+@dataclass(frozen=True)
 class PLN(OpCode):
     """PLN (FX01) - Select 0 or more drawing planes by bitmask (0 <= N <= 3) (XO-CHIP only)."""
 
     mask: Byte
 
 
-@dataclass
+@dataclass(frozen=True)
 class AUD(OpCode):
     """AUD (F002) - Store 16 bytes from I in the audio buffer (XO-CHIP only)."""
 
 
-@dataclass
+@dataclass(frozen=True)
 class LDLY(OpCode):
     """LDLY (FX07) - VX = Delay timer."""
 
     register: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class LDK(OpCode):
     """LDK (FX0A) - VX = Released key.
 
@@ -309,77 +309,77 @@ class LDK(OpCode):
     register: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class SDLY(OpCode):
     """SDLY (FX15) - Delay timer = VX."""
 
     register: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class SSND(OpCode):
     """SSND (FX18) - Sound timer = VX."""
 
     register: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class ADDI(OpCode):
     """ADDI (FX1E) - I += VX."""
 
     register: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class LDF(OpCode):
     """LDF (FX29) - I = font for hex character X."""
 
     register: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class SLDF(OpCode):
     """SLDF (FX30) - I = super font for hex character X (S-CHIP only)."""
 
     register: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class LDBCD(OpCode):
     """LDBCD (FX33) - (I, I + 1, I + 2) = BCD(VX)."""
 
     register: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class PTCH(OpCode):
     """PTCH (FX3A) - Set audio playback rate to 4000*2^((VX - 64) / 48) (XO-CHIP only)."""
 
     register: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class SRG(OpCode):
     """SRG (FX55) - Store V0 to VX in (I..I+X)."""
 
     max_register: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class LRG(OpCode):
     """LRG (FX65) - Load V0 to VX from (I..I+X)."""
 
     max_register: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class SRGF(OpCode):
     """SRGF (FX75) - Store V0 to VX in flag registers."""
 
     max_register: Register
 
 
-@dataclass
+@dataclass(frozen=True)
 class LRGF(OpCode):
     """LRGF (FX85) - Load V0 to VX from flag registers."""
 
@@ -504,7 +504,7 @@ def parse_opcode(value: Address) -> OpCode | None:
     elif b0 == 0xF:
         if b2 == 0x0:
             if b3 == 0x0:
-                # Address will be filled later in time.
+                # Address is read from the next word, see LONG_ADDRESS_TABLE.
                 return LDIL(Address(0x0))
 
             elif b3 == 0x1:
@@ -558,3 +558,29 @@ def parse_opcode(value: Address) -> OpCode | None:
         elif b2 == 0x8:
             if b3 == 0x5:
                 return LRGF(max_register=Register(b1))
+
+
+class DecodeTable(dict[int, OpCode | None]):
+    """Decoded opcodes, indexed by their 16-bit value.
+
+    Entries are decoded once on first access and shared afterwards,
+    so decoded opcodes are immutable and must never be modified.
+    """
+
+    def __missing__(self, value: int) -> OpCode | None:
+        code = parse_opcode(Address(value))
+        self[value] = code
+        return code
+
+
+class LongAddressTable(dict[int, LDIL]):
+    """Decoded LDIL opcodes, indexed by their trailing 16-bit address."""
+
+    def __missing__(self, value: int) -> LDIL:
+        code = LDIL(address=Address(value))
+        self[value] = code
+        return code
+
+
+DECODE_TABLE = DecodeTable()
+LONG_ADDRESS_TABLE = LongAddressTable()
@@ -32,6 +32,18 @@ class Quirks:
         self.legacy_scrolling = False
         self.display_wait = False
 
+    def as_tuple(self) -> tuple[bool, ...]:
+        return (
+            self.shift_y,
+            self.add_i_carry,
+            self.vf_reset,
+            self.index_increment,
+            self.draw_clipping,
+            self.jump_vx,
+            self.legacy_scrolling,
+            self.display_wait,
+        )
+
     def apply_mode(self, mode: QuirksMode) -> None:
         if mode == QuirksMode.Chip8:
             self.shift_y = True
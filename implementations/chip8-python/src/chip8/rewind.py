@@ -0,0 +1,206 @@
+from collections import deque
+from dataclasses import dataclass, field
+
+from . import savestate
+from .engine import Engine
+from .memory import Memory
+
+
+@dataclass
+class _Snapshot:
+    # Frame count when the snapshot was taken
+    frame: int
+    # Full state of the keyframe this snapshot is relative to
+    keyframe: bytes
+    # Changes to the keyframe, as (state offset, data), empty for keyframes
+    changes: list[tuple[int, bytes]] = field(default_factory=list)
+
+    @property
+    def is_keyframe(self) -> bool:
+        return not self.changes
+
+    @property
+    def size(self) -> int:
+        if self.is_keyframe:
+            return len(self.keyframe)
+        return sum(len(data) for _, data in self.changes)
+
+    def state(self) -> bytes:
+        if self.is_keyframe:
+            return self.keyframe
+
+        state = bytearray(self.keyframe)
+        for offset, data in self.changes:
+            state[offset : offset + len(data)] = data
+        return bytes(state)
+
+
+class Rewind:
+    """Snapshots of an engine taken every few frames, to go back in time.
+
+    Snapshots are engine states (see `Engine.save_state`): a keyframe is
+    stored in full, then the next snapshots only store their changes to
+    it, which are the state fields, the display rows which differ, the
+    memory pages written since the keyframe, and the random generator
+    state if it changed.
+
+    Snapshots are kept until they use more than `budget` bytes, then the
+    oldest keyframe is evicted, along with the snapshots relative to it.
+    The newest keyframe is never evicted, and a new keyframe is taken once
+    the snapshots relative to the current one use half the budget, so
+    older ones can go.
+    """
+
+    _engine: Engine
+    _interval: int
+    _keyframe_interval: int
+    _budget: int
+    _snapshots: deque[_Snapshot]
+    _size: int
+    _frame: int
+    _keyframe_frame: int
+    # Bytes used by the last keyframe and the snapshots relative to it
+    _keyframe_size: int
+    # Memory checkpoint of the last keyframe, None to take a keyframe next
+    _checkpoint: int | None
+
+    def __init__(
+        self,
+        engine: Engine,
+        *,
+        interval: int = 6,
+        keyframe_interval: int = 60,
+        budget: int = 32 * 1024 * 1024,
+    ) -> None:
+        self._engine = engine
+        self._interval = interval
+        self._keyframe_interval = keyframe_interval
+        self._budget = budget
+        self._snapshots = deque()
+        self._size = 0
+        self._frame = 0
+        self._keyframe_frame = 0
+        self._keyframe_size = 0
+        self._checkpoint = None
+
+    def __len__(self) -> int:
+        return len(self._snapshots)
+
+    @property
+    def size(self) -> int:
+        """Bytes used by the snapshots."""
+        return self._size
+
+    @property
+    def frame(self) -> int:
+        """Frames recorded so far, minus the frames rewound."""
+        return self._frame
+
+    @property
+    def oldest_frame(self) -> int | None:
+        """Frame of the oldest snapshot, if any."""
+        return self._snapshots[0].frame if self._snapshots else None
+
+    def record(self) -> None:
+        """Count a frame, taking a snapshot when it is the interval.
+
+        Meant to be called after each frame.
+        """
+        self._frame += 1
+        if self._frame % self._interval == 0:
+            self.snapshot()
+
+    def snapshot(self) -> None:
+        """Take a snapshot of the engine now."""
+        engine = self._engine
+        state = engine.save_state()
+        last = self._snapshots[-1] if self._snapshots else None
+
+        if (
+            last is None
+            or self._checkpoint is None
+            or self._frame - self._keyframe_frame
+            >= self._interval * self._keyframe_interval
+            or self._keyframe_size * 2 > self._budget
+            # Display rows of another size
+            or len(state) != len(last.keyframe)
+        ):
+            snapshot = _Snapshot(frame=self._frame, keyframe=state)
+            self._keyframe_frame = self._frame
+            self._keyframe_size = 0
+            self._checkpoint = engine._memory.checkpoint()
+        else:
+            snapshot = _Snapshot(
+                frame=self._frame,
+                keyframe=last.keyframe,
+                changes=self._changes(state, last.keyframe, self._checkpoint),
+            )
+
+        self._snapshots.append(snapshot)
+        self._size += snapshot.size
+        self._keyframe_size += snapshot.size
+        self._evict()
+
+    def rewind(self, count: int = 1) -> int:
+        """Restore the engine from `count` snapshots back, or the oldest one.
+
+        The restored snapshot and the newer ones are dropped, and recording
+        goes on from the restored frame. Returns the number of snapshots
+        the engine went back, 0 if there was none.
+        """
+        count = min(count, len(self._snapshots))
+        if count == 0:
+            return 0
+
+        for _ in range(count):
+            snapshot = self._snapshots.pop()
+            self._size -= snapshot.size
+
+        self._engine.restore_state(snapshot.state())
+        self._frame = snapshot.frame
+        # Restoring marks all memory pages as written
+        self._checkpoint = None
+        return count
+
+    def clear(self) -> None:
+        self._snapshots.clear()
+        self._size = 0
+        self._checkpoint = None
+
+    def _changes(
+        self, state: bytes, keyframe: bytes, checkpoint: int
+    ) -> list[tuple[int, bytes]]:
+        # Fields, always stored so a change is never empty
+        rows_offset = savestate.ROWS_OFFSET
+        changes = [(0, state[:rows_offset])]
+
+        # Display rows
+        row_size = savestate.row_size(state)
+        memory_offset = savestate.memory_offset(state)
+        for offset in range(rows_offset, memory_offset, row_size):
+            row = state[offset : offset + row_size]
+            if row != keyframe[offset : offset + row_size]:
+                changes.append((offset, row))
+
+        # Memory pages
+        page_size = Memory.PAGE_SIZE
+        for page in self._engine._memory.dirty_pages_since(checkpoint):
+            offset = memory_offset + page * page_size
+            changes.append((offset, state[offset : offset + page_size]))
+
+        # Local storage and random generator
+        offset = memory_offset + Memory.MEMORY_SIZE
+        if state[offset:] != keyframe[offset:]:
+            changes.append((offset, state[offset:]))
+
+        return changes
+
+    def _evict(self) -> None:
+        snapshots = self._snapshots
+        newest = snapshots[-1].keyframe
+        while self._size > self._budget and snapshots[0].keyframe is not newest:
+            evicted = snapshots.popleft()
+            self._size -= evicted.size
+            # Snapshots relative to the evicted keyframe cannot be restored
+            while snapshots and snapshots[0].keyframe is evicted.keyframe:
+                self._size -= snapshots.popleft().size
@@ -0,0 +1,245 @@
+"""Binary snapshots of an engine state.
+
+A state starts with a magic string and a format version, followed by
+fixed-size fields (registers, stack, timers, keypad, quirks, modes,
+audio, display settings), then the display rows, the memory, the local
+storage and the random generator state.
+"""
+
+import struct
+from typing import TYPE_CHECKING
+
+from .display import Display
+from .memory import Memory
+from .mode import EmulationMode
+from .stack import Stack
+from .types import Address, Byte
+
+if TYPE_CHECKING:
+    from .engine import Engine
+
+STATE_MAGIC = b"C8ST"
+STATE_VERSION = 1
+
+_HEADER = struct.Struct("<4sB")
+_FIELDS = struct.Struct(
+    "<"
+    # Emulation mode, quirks, instructions per step
+    "BBI"
+    # PC, I, V registers
+    "HH16s"
+    # Stack size, stack
+    "B16H"
+    # Delay timer, sound timer
+    "BB"
+    # Pressed keys, last released key (-1 if none), its ticks, keypad ticks
+    "HbQQ"
+    # Ticks, idle steps, waiting for key, block execution
+    "QQ??"
+    # Audio pitch, pattern buffer size, pattern buffer
+    "BB16s"
+    # Display mode, plane mask, buffer scale
+    "BBB"
+)
+# Mersenne Twister state words and position, then the next gauss value
+_RNG = struct.Struct("<625I?d")
+_RNG_VERSION = 3
+
+# Same order as Quirks.as_tuple
+QUIRK_NAMES = (
+    "shift_y",
+    "add_i_carry",
+    "vf_reset",
+    "index_increment",
+    "draw_clipping",
+    "jump_vx",
+    "legacy_scrolling",
+    "display_wait",
+)
+EMULATION_MODES = tuple(EmulationMode)
+DISPLAY_MODES = tuple(Display.Mode)
+
+# Offset of the display rows in a state
+ROWS_OFFSET = _HEADER.size + _FIELDS.size
+
+
+def row_size(data: bytes | bytearray) -> int:
+    """Get the size of a display row in a state."""
+    return Display.SCREEN_SIZE_X // _buffer_scale(data) // 8
+
+
+def memory_offset(data: bytes | bytearray) -> int:
+    """Get the offset of the memory in a state, after the display rows."""
+    rows_count = Display.PLANES_COUNT * Display.SCREEN_SIZE_Y // _buffer_scale(data)
+    return ROWS_OFFSET + rows_count * row_size(data)
+
+
+def _buffer_scale(data: bytes | bytearray) -> int:
+    return _FIELDS.unpack_from(data, _HEADER.size)[-1]
+
+
+def save_state(engine: "Engine") -> bytes:
+    """Pack the state of an engine."""
+    registers = engine._registers
+    keypad = engine._keypad
+    audio = engine._audio
+    display = engine._display
+
+    stack = [address.value for address in engine._stack._data]
+    last_released_key = keypad._last_released_key
+    pattern = bytes(value.value for value in audio._pattern_buffer)
+    fields = _FIELDS.pack(
+        EMULATION_MODES.index(engine._emulation_mode),
+        sum(value << bit for bit, value in enumerate(engine._quirks.as_tuple())),
+        engine._instructions_per_step,
+        registers._pc.value,
+        registers._i.value,
+        bytes(value.value for value in registers._general),
+        len(stack),
+        *stack,
+        *[0] * (Stack.STACK_SIZE - len(stack)),
+        engine._timers._delay_timer.value,
+        engine._timers._sound_timer.value,
+        sum(1 << key for key, pressed in enumerate(keypad._state) if pressed),
+        -1 if last_released_key is None else last_released_key.value,
+        keypad._last_released_key_ticks,
+        keypad._ticks,
+        engine._ticks,
+        engine._idle_steps,
+        engine._waiting_for_key,
+        engine._block_cache is not None,
+        audio._pitch.value,
+        len(pattern),
+        pattern,
+        DISPLAY_MODES.index(display._mode),
+        display._plane_mask,
+        display._buffer_scale,
+    )
+
+    row_size = display._buffer_size_x // 8
+    rows = b"".join(
+        row.to_bytes(row_size, "big") for plane in display._rows for row in plane
+    )
+
+    _, words, gauss_next = engine._rng.getstate()
+    rng = _RNG.pack(*words, gauss_next is not None, gauss_next or 0.0)
+
+    return b"".join(
+        (
+            _HEADER.pack(STATE_MAGIC, STATE_VERSION),
+            fields,
+            rows,
+            engine._memory._data,
+            engine._memory._local_storage,
+            rng,
+        )
+    )
+
+
+def restore_state(engine: "Engine", data: bytes) -> None:
+    """Restore the state of an engine, from `save_state`.
+
+    Signal connections and the translation cache of the engine are kept.
+    """
+    view = memoryview(data)
+    magic, version = _HEADER.unpack_from(view)
+    if magic != STATE_MAGIC:
+        raise ValueError("Not an engine state")
+    if version != STATE_VERSION:
+        raise ValueError(f"Unsupported engine state version: {version}")
+
+    offset = _HEADER.size
+    fields = _FIELDS.unpack_from(view, offset)
+    offset += _FIELDS.size
+    (
+        emulation_mode,
+        quirks,
+        instructions_per_step,
+        pc,
+        i,
+        general,
+        stack_size,
+    ) = fields[:7]
+    stack = fields[7 : 7 + Stack.STACK_SIZE]
+    (
+        delay_timer,
+        sound_timer,
+        keys,
+        last_released_key,
+        last_released_key_ticks,
+        keypad_ticks,
+        ticks,
+        idle_steps,
+        waiting_for_key,
+        block_execution,
+        pitch,
+        pattern_size,
+        pattern,
+        display_mode,
+        plane_mask,
+        buffer_scale,
+    ) = fields[7 + Stack.STACK_SIZE :]
+
+    engine.set_emulation_mode(EMULATION_MODES[emulation_mode])
+    for bit, name in enumerate(QUIRK_NAMES):
+        setattr(engine._quirks, name, bool(quirks & (1 << bit)))
+    engine._instructions_per_step = instructions_per_step
+    engine._ticks = ticks
+    engine._idle = False
+    engine._idle_steps = idle_steps
+    engine._waiting_for_key = waiting_for_key
+    if block_execution != (engine._block_cache is not None):
+        engine.set_block_execution(block_execution)
+    elif engine._block_cache is not None:
+        engine._block_cache.clear()
+
+    registers = engine._registers
+    registers._pc = Address(pc)
+    registers._i = Address(i)
+    registers._general = [Byte(value) for value in general]
+    engine._stack._data = [Address(value) for value in stack[:stack_size]]
+    engine._timers._delay_timer = Byte(delay_timer)
+    engine._timers._sound_timer = Byte(sound_timer)
+
+    keypad = engine._keypad
+    keypad._state = [bool(keys & (1 << key)) for key in range(keypad.KEYS_COUNT)]
+    keypad._last_released_key = (
+        None if last_released_key < 0 else Byte(last_released_key)
+    )
+    keypad._last_released_key_ticks = last_released_key_ticks
+    keypad._ticks = keypad_ticks
+
+    engine._audio._pitch = Byte(pitch)
+    engine._audio._pattern_buffer = [Byte(value) for value in pattern[:pattern_size]]
+
+    display = engine._display
+    display._mode = DISPLAY_MODES[display_mode]
+    display._plane_mask = plane_mask
+    display._set_buffer_scale(buffer_scale)
+    row_size = display._buffer_size_x // 8
+    plane_size = row_size * display._buffer_size_y
+    rows = []
+    for _ in range(Display.PLANES_COUNT):
+        plane = bytes(view[offset : offset + plane_size])
+        rows.append(
+            [
+                int.from_bytes(plane[row : row + row_size], "big")
+                for row in range(0, plane_size, row_size)
+            ]
+        )
+        offset += plane_size
+    display._rows = rows
+    display._mark_stale(0, Display.SCREEN_SIZE_Y)
+
+    memory = engine._memory
+    memory.reset()
+    memory._data[:] = view[offset : offset + Memory.MEMORY_SIZE]
+    offset += Memory.MEMORY_SIZE
+    size = Memory.LOCAL_STORAGE_SIZE
+    memory._local_storage[:] = view[offset : offset + size]
+    offset += size
+
+    *words, has_gauss_next, gauss_next = _RNG.unpack_from(view, offset)
+    if not has_gauss_next:
+        gauss_next = None
+    engine._rng.setstate((_RNG_VERSION, tuple(words), gauss_next))
@@ -0,0 +1,131 @@
+import enum
+import struct
+from multiprocessing import shared_memory
+
+from .display import Display
+
+
+class FrameStatus(enum.IntEnum):
+    Running = 0
+    # The program reached an infinite loop or an EXIT opcode
+    Ended = 1
+    # The program met a bad opcode
+    Failed = 2
+
+
+class SharedFrame:
+    """Display frames published by a process, to be read by other processes.
+
+    Frames are display frame buffers (see `Display.frame_bytes`), written in
+    turn to one of two slots of a shared memory block, so a frame can be
+    read while the next one is written. Each frame has a sequence number:
+    readers only have to copy a frame when the sequence changed, and retry
+    if the writer started reusing the slot they were reading.
+
+    A single process publishes frames, either the one which created the
+    block or one attached to it as the writer; any number of readers can
+    attach to it by name.
+    """
+
+    # Published sequence, sequence being written, status, beeping
+    HEADER = struct.Struct("<QQBB")
+    FRAME_SIZE = Display.SCREEN_SIZE_X * Display.SCREEN_SIZE_Y
+    SIZE = HEADER.size + 2 * FRAME_SIZE
+
+    _memory: shared_memory.SharedMemory
+    _writer: bool
+    _sequence: int
+
+    def __init__(self, memory: shared_memory.SharedMemory, *, writer: bool) -> None:
+        self._memory = memory
+        self._writer = writer
+        self._sequence = 0
+
+    @classmethod
+    def create(cls) -> "SharedFrame":
+        """Create a shared frame, to publish frames to."""
+        memory = shared_memory.SharedMemory(create=True, size=cls.SIZE)
+        memory.buf[: cls.SIZE] = bytes(cls.SIZE)
+        return cls(memory, writer=True)
+
+    @classmethod
+    def attach(cls, name: str, *, writer: bool = False) -> "SharedFrame":
+        """Attach to an existing shared frame, to read or publish frames.
+
+        Before Python 3.13, the block is unlinked when a reader exits, unless
+        it shares the resource tracker of the creator (as its child process).
+        """
+        try:
+            memory = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            memory = shared_memory.SharedMemory(name=name)
+        return cls(memory, writer=writer)
+
+    @property
+    def name(self) -> str:
+        return self._memory.name
+
+    @property
+    def sequence(self) -> int:
+        """Sequence number of the last published frame, 0 before the first one."""
+        return self.HEADER.unpack_from(self._memory.buf)[0]
+
+    @property
+    def status(self) -> FrameStatus:
+        return FrameStatus(self.HEADER.unpack_from(self._memory.buf)[2])
+
+    @property
+    def beeping(self) -> bool:
+        return bool(self.HEADER.unpack_from(self._memory.buf)[3])
+
+    def publish(
+        self,
+        frame: bytes | memoryview,
+        *,
+        status: FrameStatus = FrameStatus.Running,
+        beeping: bool = False,
+    ) -> int:
+        """Publish a frame, and get its sequence number."""
+        if not self._writer:
+            raise RuntimeError("Shared frame is read-only")
+
+        buf = self._memory.buf
+        sequence = self._sequence + 1
+        offset = self._slot_offset(sequence)
+        self.HEADER.pack_into(buf, 0, self._sequence, sequence, status, beeping)
+        buf[offset : offset + self.FRAME_SIZE] = frame
+        self.HEADER.pack_into(buf, 0, sequence, sequence, status, beeping)
+        self._sequence = sequence
+        return sequence
+
+    def set_state(self, *, status: FrameStatus, beeping: bool) -> None:
+        """Update the status and beeping flags, without a new frame."""
+        if not self._writer:
+            raise RuntimeError("Shared frame is read-only")
+
+        self.HEADER.pack_into(
+            self._memory.buf, 0, self._sequence, self._sequence, status, beeping
+        )
+
+    def read(self) -> tuple[int, bytes]:
+        """Copy the last published frame, with its sequence number."""
+        buf = self._memory.buf
+        while True:
+            sequence = self.HEADER.unpack_from(buf)[0]
+            offset = self._slot_offset(sequence)
+            frame = bytes(buf[offset : offset + self.FRAME_SIZE])
+
+            # The slot is only reused for the frame after the next one
+            writing = self.HEADER.unpack_from(buf)[1]
+            if writing < sequence + 2:
+                return sequence, frame
+
+    def close(self) -> None:
+        self._memory.close()
+
+    def unlink(self) -> None:
+        """Free the shared memory block, once every process closed it."""
+        self._memory.unlink()
+
+    def _slot_offset(self, sequence: int) -> int:
+        return self.HEADER.size + (sequence & 1) * self.FRAME_SIZE
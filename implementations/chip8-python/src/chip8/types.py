@@ -133,6 +133,9 @@ class Byte:
     def __repr__(self) -> str:
         return f"Byte({self})"
 
+    def __index__(self) -> int:
+        return self.value
+
     def __str__(self) -> str:
         return hex(self.value).upper()
 
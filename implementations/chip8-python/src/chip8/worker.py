@@ -0,0 +1,114 @@
+import multiprocessing
+import queue
+import time
+from multiprocessing.synchronize import Event
+
+from .cartridge import Cartridge
+from .config import EngineConfig
+from .engine import StepResult
+from .sharedframe import FrameStatus, SharedFrame
+from .types import Byte
+
+FRAMES_PER_SECOND = 60
+
+
+def run_worker(
+    config: EngineConfig,
+    cartridge: Cartridge,
+    frame_name: str,
+    key_events: "multiprocessing.Queue[tuple[int, bool]]",
+    audio_updates: "multiprocessing.Queue[tuple[float, list[int]]]",
+    stop: Event,
+) -> None:
+    """Run a cartridge at 60 frames per second, until asked to stop.
+
+    Meant to be the target of a worker process: keypad events are received
+    as (key, pressed) pairs, and each frame which changed the display is
+    published to the shared frame named `frame_name`. XO-CHIP audio pattern
+    and pitch changes are sent as (frequency, pattern) pairs.
+    """
+    engine = config.create_engine()
+    engine.load_cartridge(cartridge)
+
+    shared_frame = SharedFrame.attach(frame_name, writer=True)
+    status = FrameStatus.Running
+
+    @engine.on_loop.connect
+    def on_loop():
+        nonlocal status
+        status = FrameStatus.Ended
+
+    @engine.on_exit.connect
+    def on_exit():
+        nonlocal status
+        status = FrameStatus.Ended
+
+    @engine.on_audio_update.connect
+    def on_audio_update(frequency: float, buffer: list[Byte]):
+        audio_updates.put((frequency, [byte.value for byte in buffer]))
+
+    display = engine._display
+    version = None
+    frame_duration = 1 / FRAMES_PER_SECOND
+    next_frame = time.perf_counter()
+    try:
+        while not stop.is_set():
+            while True:
+                try:
+                    key, pressed = key_events.get_nowait()
+                except queue.Empty:
+                    break
+                engine._keypad.set_kx(Byte(key), pressed)
+
+            if status == FrameStatus.Running:
+                if engine.step() == StepResult.BadOpCode:
+                    status = FrameStatus.Failed
+                engine.step_timers()
+
+            beeping = status == FrameStatus.Running and engine.beeping
+            if display.version != version:
+                version = display.version
+                shared_frame.publish(
+                    display.frame_bytes(), status=status, beeping=beeping
+                )
+            else:
+                shared_frame.set_state(status=status, beeping=beeping)
+
+            next_frame += frame_duration
+            delay = next_frame - time.perf_counter()
+            if delay > 0:
+                stop.wait(delay)
+            else:
+                # Late: do not try to catch up
+                next_frame = time.perf_counter()
+    finally:
+        # Updates left unread when stopping are not needed
+        audio_updates.cancel_join_thread()
+        shared_frame.close()
+
+
+def start_worker(
+    config: EngineConfig, cartridge: Cartridge, shared_frame: SharedFrame
+) -> tuple[
+    multiprocessing.Process,
+    "multiprocessing.Queue[tuple[int, bool]]",
+    "multiprocessing.Queue[tuple[float, list[int]]]",
+    Event,
+]:
+    """Start a worker process running a cartridge, publishing to a shared frame.
+
+    Returns the process, the queue to send keypad events to, the queue to
+    receive audio updates from, and the event to set to stop it.
+    """
+    key_events: "multiprocessing.Queue[tuple[int, bool]]" = multiprocessing.Queue()
+    audio_updates: "multiprocessing.Queue[tuple[float, list[int]]]" = (
+        multiprocessing.Queue()
+    )
+    stop = multiprocessing.Event()
+    process = multiprocessing.Process(
+        target=run_worker,
+        args=(config, cartridge, shared_frame.name, key_events, audio_updates, stop),
+        daemon=True,
+    )
+    process.start()
+    return process, key_events, audio_updates, stop
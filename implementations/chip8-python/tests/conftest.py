@@ -0,0 +1,68 @@
+from typing import Callable
+
+from chip8.cartridge import Cartridge
+from chip8.engine import Engine, StepResult
+from chip8.fastcore import FastEngine
+
+import pytest
+
+# Counts V6 from 0 to 16, exercising ALU, memory and draw opcodes.
+PROGRAM = bytes.fromhex(
+    "00E0"  # 200: CLS
+    "6600"  # 202: LDB V6, 0
+    "6105"  # 204: LDB V1, 5
+    "8164"  # 206: ADD V1, V6
+    "8265"  # 208: SUB V2, V6
+    "8316"  # 20A: SHR V3, V1
+    "841E"  # 20C: SHL V4, V1
+    "8511"  # 20E: OR V5, V1
+    "A300"  # 210: LDI 0x300
+    "F133"  # 212: LDBCD V1
+    "F265"  # 214: LRG V2
+    "F41E"  # 216: ADDI V4
+    "F555"  # 218: SRG V5
+    "F629"  # 21A: LDF V6
+    "D615"  # 21C: DRW V6, V1, 5
+    "7601"  # 21E: ADDB V6, 1
+    "3610"  # 220: SEB V6, 0x10
+    "1206"  # 222: JP 0x206
+    "2228"  # 224: CALL 0x228
+    "1226"  # 226: JP 0x226
+    "00EE"  # 228: RET
+)
+
+# Draws the "0" font glyph, then loops forever.
+DRAW_PROGRAM = bytes.fromhex(
+    "A050"  # 200: LDI 0x050
+    "D005"  # 202: DRW V0, V0, 5
+    "1204"  # 204: JP 0x204
+)
+
+RunProgram = Callable[[Engine | FastEngine, bytes], StepResult]
+
+
+@pytest.fixture
+def program() -> bytes:
+    return PROGRAM
+
+
+@pytest.fixture
+def draw_program() -> bytes:
+    return DRAW_PROGRAM
+
+
+def _run_program(engine: Engine | FastEngine, program: bytes) -> StepResult:
+    engine.load_cartridge(Cartridge(program))
+
+    for _ in range(100):
+        res = engine.step()
+        if res != StepResult.Success:
+            return res
+
+    return StepResult.Success
+
+
+@pytest.fixture
+def run_program() -> RunProgram:
+    """Load a program, and step until it stops or loops, for up to 100 steps."""
+    return _run_program
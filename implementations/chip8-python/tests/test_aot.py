@@ -0,0 +1,148 @@
+import builtins
+from pathlib import Path
+
+from chip8.aot import TranslationCache
+from chip8.blocks import BlockCache
+from chip8.cartridge import Cartridge
+from chip8.engine import Engine, StepResult
+from chip8.quirks import QuirksMode
+
+import pytest
+
+# Calls a subroutine drawing a digit 16 times, then loops forever.
+PROGRAM = bytes.fromhex(
+    "6600"  # 200: LDB V6, 0
+    "220C"  # 202: CALL 0x20C
+    "7601"  # 204: ADDB V6, 1
+    "4610"  # 206: SNEB V6, 0x10
+    "1208"  # 208: JP 0x208
+    "1202"  # 20A: JP 0x202
+    "F629"  # 20C: LDF V6
+    "6105"  # 20E: LDB V1, 5
+    "D615"  # 210: DRW V6, V1, 5
+    "00EE"  # 212: RET
+)
+
+
+def _make_engine(cache: TranslationCache) -> Engine:
+    engine = Engine()
+    engine.quirks.apply_mode(QuirksMode.SuperChipModern)
+    engine.set_translation_cache(cache)
+    return engine
+
+
+def _run(engine: Engine) -> StepResult:
+    for _ in range(100):
+        res = engine.step()
+        if res != StepResult.Success:
+            return res
+
+    return StepResult.Success
+
+
+def test_translation_is_cached(tmp_path: Path):
+    # Arrange
+    cache = TranslationCache(tmp_path)
+    first_engine = _make_engine(cache)
+    second_engine = _make_engine(cache)
+
+    # Act
+    first_engine.load_cartridge(Cartridge(PROGRAM))
+    modules = list(tmp_path.glob("*.py"))
+    second_engine.load_cartridge(Cartridge(PROGRAM))
+
+    # Assert
+    assert len(modules) == 1
+    assert list(tmp_path.glob("*.py")) == modules
+    assert second_engine._block_cache is not None
+    assert sorted(second_engine._block_cache._blocks) == [0x200, 0x204, 0x20C]
+
+
+def test_same_state_as_interpreter(tmp_path: Path):
+    # Arrange
+    engine = Engine()
+    engine.quirks.apply_mode(QuirksMode.SuperChipModern)
+    engine.load_cartridge(Cartridge(PROGRAM))
+    aot_engine = _make_engine(TranslationCache(tmp_path))
+    aot_engine.load_cartridge(Cartridge(PROGRAM))
+
+    # Act
+    res = _run(engine)
+    aot_res = _run(aot_engine)
+
+    # Assert
+    assert res == aot_res == StepResult.Loop
+    assert engine._registers._general == aot_engine._registers._general
+    assert engine._display.planes == aot_engine._display.planes
+
+
+def test_key_depends_on_quirks(tmp_path: Path):
+    # Arrange
+    cache = TranslationCache(tmp_path)
+    engine = _make_engine(cache)
+    other_engine = _make_engine(cache)
+    other_engine.quirks.apply_mode(QuirksMode.Chip8)
+
+    # Act
+    key = cache.key(PROGRAM, engine)
+    other_key = cache.key(PROGRAM, other_engine)
+
+    # Assert
+    assert key != other_key
+
+
+def test_warm_load_does_not_translate(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    # Arrange
+    _make_engine(TranslationCache(tmp_path)).load_cartridge(Cartridge(PROGRAM))
+    engine = _make_engine(TranslationCache(tmp_path))
+    calls = []
+
+    def fail(name: str):
+        return lambda *args, **kwargs: calls.append(name)
+
+    monkeypatch.setattr(BlockCache, "translate", fail("translate"))
+    monkeypatch.setattr(BlockCache, "_compile", fail("_compile"))
+    monkeypatch.setattr(builtins, "compile", fail("compile"))
+
+    # Act
+    engine.load_cartridge(Cartridge(PROGRAM))
+    monkeypatch.undo()
+
+    # Assert
+    assert calls == []
+    assert list(tmp_path.glob("*.pyc"))
+    assert engine._block_cache is not None
+    assert sorted(engine._block_cache._blocks) == [0x200, 0x204, 0x20C]
+    assert _run(engine) == StepResult.Loop
+
+
+def test_blocks_end_with_the_cartridge(tmp_path: Path):
+    # Arrange
+    engine = _make_engine(TranslationCache(tmp_path))
+
+    # Act
+    engine.load_cartridge(Cartridge(bytes.fromhex("6001")))
+
+    # Assert
+    assert engine._block_cache is not None
+    assert [
+        (block.start, block.end)
+        for block in engine._block_cache._blocks.values()
+        if block is not None
+    ] == [(0x200, 0x202)]
+
+
+def test_key_depends_on_block_length_limit(tmp_path: Path):
+    # Arrange
+    cache = TranslationCache(tmp_path)
+    engine = _make_engine(cache)
+    other_engine = _make_engine(cache)
+    assert other_engine._block_cache is not None
+    other_engine._block_cache.set_length_limit(4)
+
+    # Act
+    key = cache.key(PROGRAM, engine)
+    other_key = cache.key(PROGRAM, other_engine)
+
+    # Assert
+    assert key != other_key
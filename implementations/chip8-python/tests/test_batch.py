@@ -0,0 +1,103 @@
+from chip8.cartridge import Cartridge
+from chip8.engine import Engine, StepResult
+from chip8.quirks import QuirksMode
+from chip8.types import Byte
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from chip8.batch import BatchEngine, BatchStatus  # noqa: E402
+from conftest import RunProgram  # noqa: E402
+
+
+def _assert_same_state(engine: Engine, batch: BatchEngine, instance: int):
+    assert [b.value for b in engine._registers._general] == list(batch.v[instance])
+    assert engine._registers.i.value == batch.i[instance]
+    assert engine._registers.pc.value == batch.pc[instance]
+    assert (
+        engine._memory._data[: BatchEngine.MEMORY_SIZE]
+        == batch.memory[instance].tobytes()
+    )
+    assert engine._display.frame_bytes() == batch.frame_bytes()[instance].tobytes()
+
+
+@pytest.mark.parametrize("quirks_mode", list(QuirksMode))
+def test_same_state_as_engine(
+    quirks_mode: QuirksMode, program: bytes, run_program: RunProgram
+):
+    # Arrange
+    engine = Engine()
+    engine.quirks.apply_mode(quirks_mode)
+    batch = BatchEngine(3)
+    batch.quirks.apply_mode(quirks_mode)
+    batch.load_cartridge(Cartridge(program))
+
+    # Act
+    res = run_program(engine, program)
+    for _ in range(100):
+        status = batch.step()
+
+    # Assert
+    assert res == StepResult.Loop
+    assert list(status) == [BatchStatus.Loop] * 3
+    for instance in range(3):
+        _assert_same_state(engine, batch, instance)
+
+
+def test_instances_run_their_own_program():
+    # Arrange
+    batch = BatchEngine(3, instructions_per_step=1)
+    batch.load_cartridge(Cartridge(bytes.fromhex("6001")), np.array([0]))
+    batch.load_cartridge(Cartridge(bytes.fromhex("5001")), np.array([1]))
+    batch.load_cartridge(Cartridge(bytes.fromhex("00FF")), np.array([2]))
+
+    # Act
+    status = batch.step()
+
+    # Assert
+    assert list(status) == [
+        BatchStatus.Running,
+        BatchStatus.BadOpCode,
+        BatchStatus.Unsupported,
+    ]
+    assert batch.v[0, 0] == 1
+    assert list(batch.pc) == [0x202, 0x200, 0x200]
+
+
+def test_ldk_waits_for_a_release():
+    # Arrange
+    batch = BatchEngine(2)
+    batch.load_cartridge(Cartridge(bytes.fromhex("F50A1202")))
+
+    # Act
+    batch.step()
+    waiting = batch.waiting_for_key
+    batch.set_kx(7, True)
+    batch.set_kx(7, False, np.array([1]))
+    batch.step()
+
+    # Assert
+    assert list(waiting) == [True, True]
+    assert list(batch.waiting_for_key) == [True, False]
+    assert list(batch.v[:, 5]) == [0, 7]
+    assert list(batch.status) == [BatchStatus.Running, BatchStatus.Loop]
+
+
+def test_skp_follows_the_keypad():
+    # Arrange
+    program = bytes.fromhex("E19E" "1202" "6201" "1206")
+    engine = Engine()
+    engine.load_cartridge(Cartridge(program))
+    batch = BatchEngine(2)
+    batch.load_cartridge(Cartridge(program))
+
+    # Act
+    engine._keypad.set_kx(Byte(0), True)
+    batch.set_kx(0, True, np.array([1]))
+    engine.step()
+    batch.step()
+
+    # Assert
+    assert list(batch.v[:, 2]) == [0, 1]
+    _assert_same_state(engine, batch, 1)
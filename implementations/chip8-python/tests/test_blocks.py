@@ -0,0 +1,207 @@
+from chip8.blocks import FUSIONS
+from chip8.cartridge import Cartridge
+from chip8.engine import Engine, StepResult
+from chip8.quirks import QuirksMode
+from chip8.types import Register
+
+import pytest
+
+from conftest import RunProgram
+
+# Runs a loop twice, then rewrites its first instruction and runs it again.
+SELF_MODIFYING_PROGRAM = bytes.fromhex(
+    "6000"  # 200: LDB V0, 0
+    "7101"  # 202: ADDB V1, 1 (rewritten to ADDB V1, 2)
+    "7001"  # 204: ADDB V0, 1
+    "3002"  # 206: SEB V0, 2
+    "1202"  # 208: JP 0x202
+    "3401"  # 20A: SEB V4, 1
+    "1210"  # 20C: JP 0x210
+    "121E"  # 20E: JP 0x21E
+    "6401"  # 210: LDB V4, 1
+    "6271"  # 212: LDB V2, 0x71
+    "6302"  # 214: LDB V3, 0x02
+    "A202"  # 216: LDI 0x202
+    "5232"  # 218: SRGI V2, V3
+    "6000"  # 21A: LDB V0, 0
+    "1202"  # 21C: JP 0x202
+    "121E"  # 21E: JP 0x21E
+)
+
+
+# Exercises every superinstruction, taking and skipping each jump.
+FUSION_PROGRAM = bytes.fromhex(
+    "6000"  # 200: LDB V0, 0
+    "6105"  # 202: LDB V1, 5
+    "A300"  # 204: LDI 0x300
+    "D015"  # 206: DRW V0, V1, 5
+    "7001"  # 208: ADDB V0, 1
+    "3003"  # 20A: SEB V0, 3
+    "1204"  # 20C: JP 0x204
+    "7001"  # 20E: ADDB V0, 1
+    "4006"  # 210: SNEB V0, 6
+    "1216"  # 212: JP 0x216
+    "120E"  # 214: JP 0x20E
+    "7201"  # 216: ADDB V2, 1
+    "5210"  # 218: SE V2, V1
+    "1216"  # 21A: JP 0x216
+    "7301"  # 21C: ADDB V3, 1
+    "9310"  # 21E: SNE V3, V1
+    "1224"  # 220: JP 0x224
+    "121C"  # 222: JP 0x21C
+    "3404"  # 224: SEB V4, 4
+    "122C"  # 226: JP 0x22C
+    "1234"  # 228: JP 0x234
+    "0000"  # 22A
+    "7402"  # 22C: ADDB V4, 2
+    "4404"  # 22E: SNEB V4, 4
+    "1224"  # 230: JP 0x224
+    "1224"  # 232: JP 0x224
+    "5450"  # 234: SE V4, V5
+    "1238"  # 236: JP 0x238
+    "9450"  # 238: SNE V4, V5
+    "123E"  # 23A: JP 0x23E
+    "123C"  # 23C: JP 0x23C
+    "123E"  # 23E: JP 0x23E
+)
+
+
+@pytest.mark.parametrize("quirks_mode", list(QuirksMode))
+@pytest.mark.parametrize("instructions_per_step", [1, 10])
+def test_same_state_as_step_by_step(
+    quirks_mode: QuirksMode,
+    instructions_per_step: int,
+    program: bytes,
+    run_program: RunProgram,
+):
+    # Arrange
+    engine = Engine()
+    block_engine = Engine()
+    block_engine.set_block_execution(True)
+    for e in (engine, block_engine):
+        e.quirks.apply_mode(quirks_mode)
+        e.set_instructions_per_step(instructions_per_step)
+
+    # Act
+    res = run_program(engine, program)
+    block_res = run_program(block_engine, program)
+
+    # Assert
+    assert res == block_res
+    assert len(block_engine._block_cache) > 0
+    assert engine._ticks == block_engine._ticks
+    assert engine._registers._general == block_engine._registers._general
+    assert engine._registers.i == block_engine._registers.i
+    assert engine._registers.pc == block_engine._registers.pc
+    assert engine._memory._data == block_engine._memory._data
+    assert engine._display.planes == block_engine._display.planes
+
+
+def test_self_modifying_code(run_program: RunProgram):
+    # Arrange
+    engine = Engine()
+    engine.set_block_execution(True)
+
+    # Act
+    res = run_program(engine, SELF_MODIFYING_PROGRAM)
+
+    # Assert
+    assert res == StepResult.Loop
+    assert engine._registers.get_vx(Register(0x1)) == 6
+
+
+@pytest.mark.parametrize("instructions_per_step", [1, 3, 10])
+def test_fusions_same_state_as_step_by_step(
+    instructions_per_step: int, run_program: RunProgram
+):
+    # Arrange
+    engine = Engine()
+    block_engine = Engine()
+    block_engine.set_block_execution(True)
+    for e in (engine, block_engine):
+        e.set_instructions_per_step(instructions_per_step)
+
+    # Act
+    res = run_program(engine, FUSION_PROGRAM)
+    block_res = run_program(block_engine, FUSION_PROGRAM)
+
+    # Assert
+    assert res == block_res == StepResult.Loop
+    assert engine._ticks == block_engine._ticks
+    assert engine._registers._general == block_engine._registers._general
+    assert engine._registers.i == block_engine._registers.i
+    assert engine._registers.pc == block_engine._registers.pc
+    assert engine._display.planes == block_engine._display.planes
+
+
+def test_fusion_stats(run_program: RunProgram):
+    # Arrange
+    engine = Engine()
+    engine.set_block_execution(True)
+    engine.set_instructions_per_step(10)
+
+    # Act
+    run_program(engine, FUSION_PROGRAM)
+
+    # Assert
+    stats = engine.fusion_stats()
+    assert sorted(stats) == sorted(fusion.name for fusion in FUSIONS)
+    assert all(count > 0 for count in stats.values())
+
+
+def test_superinstructions_are_generated_combined():
+    # Arrange
+    engine = Engine()
+    engine.set_block_execution(True)
+    engine.load_cartridge(Cartridge(FUSION_PROGRAM))
+    block_cache = engine._block_cache
+    assert block_cache is not None
+
+    # Act
+    source = block_cache.generate(0x200, block_cache.translate(0x200))
+
+    # Assert
+    assert "v[0], v[1] = b00, b05" in source
+    assert "handlers[DRW]" not in source
+    assert "view[0x0300:0x0305]" in source
+
+
+def test_alu_opcodes_are_generated_inline(program: bytes):
+    # Arrange
+    engine = Engine()
+    engine.set_block_execution(True)
+    engine.load_cartridge(Cartridge(program))
+    block_cache = engine._block_cache
+    assert block_cache is not None
+
+    # Act
+    source = block_cache.generate(0x206, block_cache.translate(0x206))
+
+    # Assert
+    assert "handlers[LDBCD]" in source
+    assert "handlers[ADD]" not in source
+    assert "handlers[SHR]" not in source
+    assert "handlers[LDI]" not in source
+
+
+def test_blocks_fit_in_a_step():
+    # Arrange
+    engine = Engine()
+    engine.set_block_execution(True)
+    engine.set_instructions_per_step(10)
+    # Zeroed memory after the cartridge decodes as SYS, which does not branch
+    engine.load_cartridge(Cartridge(bytes.fromhex("6001")))
+
+    # Act
+    for _ in range(10):
+        engine.step()
+
+    # Assert
+    block_cache = engine._block_cache
+    assert block_cache is not None
+    assert 0 < len(block_cache) <= 10
+    assert all(
+        block.length <= 10
+        for block in block_cache._blocks.values()
+        if block is not None
+    )
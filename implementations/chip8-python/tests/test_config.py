@@ -0,0 +1,23 @@
+from chip8.config import EngineConfig
+
+import pytest
+
+
+def test_validate_unknown_quirk():
+    # Arrange
+    config = EngineConfig(quirks={"shift_y": True, "wrap_around": True})
+
+    # Act / Assert
+    with pytest.raises(ValueError, match="Unknown quirk: wrap_around"):
+        config.validate()
+
+
+def test_validate_fast_core_without_blocks():
+    # Arrange
+    config = EngineConfig(fast_core=True, block_execution=True)
+
+    # Act / Assert
+    with pytest.raises(ValueError, match="not supported by the fast core"):
+        config.validate()
+    with pytest.raises(ValueError, match="not supported by the fast core"):
+        config.create_engine()
@@ -0,0 +1,262 @@
+from chip8.display import Display
+from chip8.types import Byte
+
+
+def _pixels(display: Display, plane_idx: int = 0) -> set[tuple[int, int]]:
+    size_x = Display.SCREEN_SIZE_X
+    return {
+        (idx % size_x, idx // size_x)
+        for idx, value in enumerate(display.planes[plane_idx])
+        if value
+    }
+
+
+def test_draw_hires():
+    # Arrange
+    display = Display()
+    display.set_mode(Display.Mode.HIRES)
+
+    # Act
+    collision = display.draw(10, 20, [0b10000001])
+
+    # Assert
+    assert not collision
+    assert _pixels(display) == {(10, 20), (17, 20)}
+
+
+def test_draw_lores_doubles_pixels():
+    # Arrange
+    display = Display()
+
+    # Act
+    display.draw(1, 2, [0b10000000])
+
+    # Assert
+    assert _pixels(display) == {(2, 4), (3, 4), (2, 5), (3, 5)}
+
+
+def test_draw_collision():
+    # Arrange
+    display = Display()
+    display.set_mode(Display.Mode.HIRES)
+    display.draw(0, 0, [0b11000000])
+
+    # Act
+    collision = display.draw(1, 0, [0b10000000])
+
+    # Assert
+    assert collision
+    assert _pixels(display) == {(0, 0)}
+
+
+def test_draw_clips_at_edges():
+    # Arrange
+    display = Display()
+    display.set_mode(Display.Mode.HIRES)
+
+    # Act
+    display.draw(124, 63, [0xFF, 0xFF], clip=True)
+
+    # Assert
+    assert _pixels(display) == {(x, 63) for x in range(124, 128)}
+
+
+def test_draw_wraps_without_clipping():
+    # Arrange
+    display = Display()
+    display.set_mode(Display.Mode.HIRES)
+
+    # Act
+    display.draw(124, 63, [0xFF, 0xFF], clip=False)
+
+    # Assert
+    assert _pixels(display) == {
+        (x % 128, y % 64) for x in range(124, 132) for y in range(63, 65)
+    }
+
+
+def test_draw_wraps_when_starting_out_of_screen():
+    # Arrange
+    display = Display()
+    display.set_mode(Display.Mode.HIRES)
+
+    # Act
+    display.draw(130, 70, [0b10000000], clip=True)
+
+    # Assert
+    assert _pixels(display) == {(2, 6)}
+
+
+def test_super_draw_multiplane():
+    # Arrange
+    display = Display()
+    display.set_mode(Display.Mode.HIRES)
+    display.set_plane_mask(Byte(3))
+
+    # Act
+    display.super_draw_multiplane(0, 0, [0x80, 0x01] + [0] * 30 + [0] * 31 + [0x01])
+
+    # Assert
+    assert _pixels(display, 0) == {(0, 0), (15, 0)}
+    assert _pixels(display, 1) == {(15, 15)}
+
+
+def test_lores_stored_natively():
+    # Arrange
+    display = Display()
+    display.draw(1, 2, [0b10000000])
+
+    # Act
+    display.set_mode(Display.Mode.HIRES)
+    hires_rows = len(display._rows[0])
+    display.set_mode(Display.Mode.LORES)
+    lores_rows = len(display._rows[0])
+
+    # Assert
+    assert (hires_rows, lores_rows) == (64, 32)
+    assert _pixels(display) == {(2, 4), (3, 4), (2, 5), (3, 5)}
+
+
+def test_lores_keeps_hires_pixels():
+    # Arrange
+    display = Display()
+    display.set_mode(Display.Mode.HIRES)
+    display.draw(1, 1, [0b10000000])
+
+    # Act
+    display.set_mode(Display.Mode.LORES)
+    display.draw(0, 0, [0b10000000])
+
+    # Assert
+    assert _pixels(display) == {(0, 0), (1, 0), (0, 1)}
+    display.clear()
+    assert len(display._rows[0]) == 32
+
+
+def test_legacy_scroll_down_half_pixel():
+    # Arrange
+    display = Display()
+    display.draw(0, 0, [0b10000000])
+
+    # Act
+    display.scroll_down(Byte(1), legacy_mode=True)
+
+    # Assert
+    assert _pixels(display) == {(0, 1), (1, 1), (0, 2), (1, 2)}
+
+
+def test_scroll_right_stays_on_row():
+    # Arrange
+    display = Display()
+    display.set_mode(Display.Mode.HIRES)
+    display.draw(120, 0, [0xFF])
+
+    # Act
+    display.scroll_right(legacy_mode=False)
+
+    # Assert
+    assert _pixels(display) == {(x, 0) for x in range(124, 128)}
+
+
+def test_scroll_left_lores():
+    # Arrange
+    display = Display()
+    display.draw(8, 0, [0b10000000])
+
+    # Act
+    display.scroll_left(legacy_mode=False)
+
+    # Assert
+    assert _pixels(display) == {(8, 0), (9, 0), (8, 1), (9, 1)}
+
+
+def test_scroll_down_both_planes_same_amount():
+    # Arrange
+    display = Display()
+    display.set_plane_mask(Byte(3))
+    display.draw_multiplane(0, 0, [0b10000000, 0b10000000])
+
+    # Act
+    display.scroll_down(Byte(1), legacy_mode=False)
+
+    # Assert
+    expected = {(0, 2), (1, 2), (0, 3), (1, 3)}
+    assert _pixels(display, 0) == _pixels(display, 1) == expected
+
+
+def test_mask_cache():
+    # Arrange
+    display = Display()
+    sprite = bytearray([0b10000000])
+
+    # Act
+    display.draw(0, 0, sprite)
+    display.draw(0, 0, sprite)
+    sprite[0] = 0b01000000
+    display.draw(0, 0, sprite)
+
+    # Assert
+    assert _pixels(display) == {(2, 0), (3, 0), (2, 1), (3, 1)}
+    assert display.mask_cache_stats() == {"hits": 1, "misses": 2, "size": 2}
+
+
+def test_mask_cache_is_bounded():
+    # Arrange
+    display = Display()
+
+    # Act
+    for x in range(Display.MASK_CACHE_SIZE + 10):
+        display.draw(0, 0, x.to_bytes(2, "big"))
+
+    # Assert
+    assert display.mask_cache_stats()["size"] == Display.MASK_CACHE_SIZE
+
+
+def test_frame_bytes():
+    # Arrange
+    display = Display()
+    display.set_mode(Display.Mode.HIRES)
+    display.set_plane_mask(Byte(3))
+    display.draw_multiplane(0, 1, [0b11000000, 0b01100000])
+
+    # Act
+    frame = display.frame_bytes()
+
+    # Assert
+    assert len(frame) == Display.SCREEN_SIZE_X * Display.SCREEN_SIZE_Y
+    assert bytes(frame[128:131]) == bytes([1, 3, 2])
+    assert sum(frame) == 6
+
+
+def test_frame_bytes_follow_updates():
+    # Arrange
+    display = Display()
+    display.draw(0, 0, [0b10000000])
+    display.frame_bytes()
+
+    # Act
+    display.scroll_down(Byte(1), legacy_mode=False)
+    frame = display.frame_bytes()
+
+    # Assert
+    assert bytes(frame[256:258]) == bytes(frame[384:386]) == bytes([1, 1])
+    assert sum(frame) == 4
+
+
+def test_version_and_dirty_rows():
+    # Arrange
+    display = Display()
+    initial_rows = display.take_dirty_rows()
+    version = display.version
+
+    # Act
+    unchanged_rows = display.take_dirty_rows()
+    display.draw(0, 3, [0xFF, 0xFF])
+    display.set_mode(Display.Mode.HIRES)
+    display.draw(0, 20, [0xFF])
+
+    # Assert
+    assert initial_rows == range(0, 64)
+    assert unchanged_rows == range(0)
+    assert display.version == version + 2
+    assert display.take_dirty_rows() == range(6, 21)
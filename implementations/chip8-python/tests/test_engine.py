@@ -1,7 +1,20 @@
+from chip8.cartridge import Cartridge
 from chip8.engine import Engine, StepResult
 from chip8.types import Address, Byte, Register
 from chip8 import opcodes
 
+import pytest
+
+# Waits for the delay timer to reach zero, then loops forever.
+DELAY_WAIT_PROGRAM = bytes.fromhex(
+    "6005"  # 200: LDB V0, 5
+    "F015"  # 202: SDLY V0
+    "F107"  # 204: LDLY V1
+    "3100"  # 206: SEB V1, 0
+    "1204"  # 208: JP 0x204
+    "120A"  # 20A: JP 0x20A
+)
+
 
 def test_srgi():
     # Arrange
@@ -20,7 +33,7 @@ def test_srgi():
 
     # Assert
     assert engine._registers.i == Address(0x200)
-    assert engine._memory.read_memory(Address(0x200), 4) == [
+    assert list(engine._memory.read_memory(Address(0x200), 4)) == [
         Byte(0xA),
         Byte(0xB),
         Byte(0xC),
@@ -97,3 +110,112 @@ def test_ldil_complete():
     # Assert
     assert res1 == res2 == StepResult.Success
     assert engine._registers.i == Address(0xDABC)
+
+
+def test_handlers_cover_opcodes():
+    # Arrange
+    engine = Engine()
+
+    # Act
+    missing = {
+        cls for cls in opcodes.OpCode.__subclasses__() if cls not in engine._handlers
+    }
+
+    # Assert
+    # EXIT is handled when stepping, before dispatch
+    assert missing == {opcodes.EXIT}
+
+
+def test_handlers_follow_quirks():
+    # Arrange
+    engine = Engine()
+    engine._registers.set_vx(Register(0xF), Byte(0x1))
+    opcode = opcodes.OR(register1=Register(0x1), register2=Register(0x2))
+
+    # Act
+    engine.quirks.vf_reset = False
+    engine._process_opcode(opcode)
+    carry_without_reset = engine._registers.get_vx(Register(0xF))
+    engine.quirks.vf_reset = True
+    engine._process_opcode(opcode)
+    carry_with_reset = engine._registers.get_vx(Register(0xF))
+
+    # Assert
+    assert carry_without_reset == Byte(0x1)
+    assert carry_with_reset == Byte(0x0)
+    assert engine._handlers[opcodes.OR].__func__ is Engine._process_or_vf_reset
+    assert engine.quirks.as_tuple() in Engine._handler_sets
+
+
+def test_blocks_follow_quirks():
+    # Arrange
+    engine = Engine()
+    engine.set_block_execution(True)
+    engine.set_instructions_per_step(3)
+    engine._memory.store_memory(
+        Address(0x200),
+        [
+            # LDB VF, 1
+            Byte(0x6F),
+            Byte(0x01),
+            # OR V1, V2
+            Byte(0x81),
+            Byte(0x21),
+            # JP 0x200
+            Byte(0x12),
+            Byte(0x00),
+        ],
+    )
+
+    # Act
+    engine.step()
+    carry_without_reset = engine._registers.get_vx(Register(0xF))
+    engine.quirks.vf_reset = True
+    engine.step()
+    carry_with_reset = engine._registers.get_vx(Register(0xF))
+
+    # Assert
+    assert carry_without_reset == Byte(0x1)
+    assert carry_with_reset == Byte(0x0)
+
+
+@pytest.mark.parametrize("block_execution", [False, True])
+def test_idle_loop(block_execution: bool):
+    # Arrange
+    engine = Engine()
+    engine.set_block_execution(block_execution)
+    engine.load_cartridge(Cartridge(DELAY_WAIT_PROGRAM))
+
+    # Act
+    results = []
+    for _ in range(10):
+        results.append(engine.step())
+        engine.step_timers()
+
+    # Assert
+    assert results[:6] == [StepResult.Idle] * 5 + [StepResult.Loop]
+    assert engine.idle_steps == 5
+    assert engine._ticks == 5 + 4 * 3 + 2
+
+
+def test_key_wait_is_idle():
+    # Arrange
+    engine = Engine()
+    engine.load_cartridge(Cartridge(bytes.fromhex("F00A" "1202")))
+
+    # Act
+    waiting = engine.step()
+    parked = engine.step()
+    parked_ticks = engine._ticks
+    engine._keypad.set_kx(Byte(0x5), True)
+    still_parked = engine.waiting_for_key
+    engine._keypad.set_kx(Byte(0x5), False)
+    released = engine.step()
+
+    # Assert
+    assert waiting == parked == StepResult.Idle
+    assert parked_ticks == 1
+    assert still_parked
+    assert not engine.waiting_for_key
+    assert released == StepResult.Loop
+    assert engine._registers.get_vx(Register(0x0)) == Byte(0x5)
@@ -0,0 +1,99 @@
+from chip8.cartridge import Cartridge
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from chip8.env import Chip8Env, VectorEnv  # noqa: E402
+
+# Draws a "0" at (5, 5), then counts in BCD at 0x300 while key 5 is held.
+PROGRAM = bytes.fromhex(
+    "6105"  # 200: LDB V1, 5
+    "A050"  # 202: LDI 0x050
+    "D115"  # 204: DRW V1, V1, 5
+    "E19E"  # 206: SKP V1
+    "1206"  # 208: JP 0x206
+    "7001"  # 20A: ADDB V0, 1
+    "A300"  # 20C: LDI 0x300
+    "F033"  # 20E: LDBCD V0
+    "1206"  # 210: JP 0x206
+)
+
+# Action holding key 5, with the default actions
+HOLD_KEY_5 = 6
+
+
+def _env(**kwargs) -> Chip8Env:
+    return Chip8Env(
+        Cartridge(PROGRAM),
+        score_addresses=(0x300, 0x301, 0x302),
+        score_base=10,
+        **kwargs,
+    )
+
+
+def test_reward_follows_the_score():
+    # Arrange
+    env = _env(frame_skip=2)
+    env.reset()
+
+    # Act
+    _, idle_reward, _, _, _ = env.step(0)
+    _, reward, terminated, truncated, info = env.step(HOLD_KEY_5)
+
+    # Assert
+    assert idle_reward == 0
+    assert reward == info["score"] == 4
+    assert not terminated
+    assert not truncated
+
+
+def test_observation_is_cropped_and_downsampled():
+    # Arrange
+    env = _env(crop=(10, 20, 10, 20), downsample=2)
+    first = env.reset()
+
+    # Act
+    observation, _, _, _, _ = env.step(0)
+
+    # Assert
+    assert env.observation_shape == first.shape == (5, 5)
+    assert not first.any()
+    assert observation[0].tolist() == [1, 1, 1, 1, 0]
+    assert observation[:, 0].tolist() == [1, 1, 1, 1, 1]
+
+
+def test_episode_ends_on_infinite_loop():
+    # Arrange
+    env = Chip8Env(Cartridge(bytes.fromhex("1200")), max_steps=10)
+    env.reset()
+
+    # Act
+    _, _, terminated, truncated, _ = env.step(0)
+
+    # Assert
+    assert terminated
+    assert not truncated
+
+
+def test_vector_env_steps_into_shared_buffers():
+    # Arrange
+    envs = VectorEnv([_env(max_steps=2), _env(max_steps=2)])
+    first = envs.reset()
+
+    # Act
+    observations, rewards, _, truncated, info = envs.step([0, HOLD_KEY_5])
+    rewards = rewards.tolist()
+    scores = info["score"].tolist()
+    truncated = truncated.tolist()
+    observations, _, _, truncated_after, _ = envs.step([0, 0])
+
+    # Assert
+    assert observations is first
+    assert observations.shape == (2, 64, 128)
+    assert rewards == [0, 6]
+    assert scores == [0, 6]
+    assert truncated == [False, False]
+    assert truncated_after.tolist() == [True, True]
+    # Reset after truncation
+    assert not observations.any()
@@ -0,0 +1,128 @@
+from chip8.cartridge import Cartridge
+from chip8.engine import Engine, StepResult
+from chip8.fastcore import FastEngine
+from chip8.quirks import QuirksMode
+from chip8.types import Byte
+
+import pytest
+
+from conftest import RunProgram
+
+
+@pytest.mark.parametrize("quirks_mode", list(QuirksMode))
+def test_same_state_as_engine(
+    quirks_mode: QuirksMode, program: bytes, run_program: RunProgram
+):
+    # Arrange
+    engine = Engine()
+    fast_engine = FastEngine()
+    for e in (engine, fast_engine):
+        e.quirks.apply_mode(quirks_mode)
+
+    # Act
+    res = run_program(engine, program)
+    fast_res = run_program(fast_engine, program)
+
+    # Assert
+    assert res == fast_res == StepResult.Loop
+    assert [b.value for b in engine._registers._general] == list(fast_engine._v)
+    assert engine._registers.i == fast_engine._i
+    assert engine._registers.pc == fast_engine._pc
+    assert engine._memory._data == fast_engine._memory
+    assert engine._display.planes == fast_engine._display.planes
+
+
+def test_ldil():
+    # Arrange
+    engine = FastEngine()
+    engine.set_instructions_per_step(1)
+    engine.load_cartridge(Cartridge(bytes.fromhex("F000DABC5003")))
+
+    # Act
+    res1 = engine.step()
+    res2 = engine.step()
+
+    # Assert
+    assert res1 == res2 == StepResult.Success
+    assert engine._i == 0xDABC
+    assert engine._pc == 0x206
+
+
+def test_bad_opcode():
+    # Arrange
+    engine = FastEngine()
+    engine.load_cartridge(Cartridge(bytes.fromhex("5121")))
+
+    # Act
+    res = engine.step()
+
+    # Assert
+    assert res == StepResult.BadOpCode
+
+
+def test_idle_loop_same_as_engine():
+    # Arrange
+    program = bytes.fromhex("6005" "F015" "F107" "3100" "1204" "120A")
+    engine = Engine()
+    fast_engine = FastEngine()
+
+    # Act
+    results: list[list[StepResult]] = [[], []]
+    for e, e_results in zip((engine, fast_engine), results):
+        e.load_cartridge(Cartridge(program))
+        for _ in range(8):
+            e_results.append(e.step())
+            e.step_timers()
+
+    # Assert
+    assert results[0] == results[1]
+    assert results[0][:6] == [StepResult.Idle] * 5 + [StepResult.Loop]
+    assert engine.idle_steps == fast_engine.idle_steps
+    assert engine._ticks == fast_engine._ticks
+
+
+def test_key_wait_is_parked():
+    # Arrange
+    engine = FastEngine()
+    engine.load_cartridge(Cartridge(bytes.fromhex("F00A" "1202")))
+
+    # Act
+    waiting = [engine.step(), engine.step()]
+    engine._keypad.set_kx(Byte(0x5), True)
+    engine._keypad.set_kx(Byte(0x5), False)
+    released = engine.step()
+
+    # Assert
+    assert waiting == [StepResult.Idle, StepResult.Idle]
+    assert engine._ticks == 2
+    assert released == StepResult.Loop
+    assert engine._v[0] == 0x5
+
+
+@pytest.mark.parametrize("address", ["FFFE", "FFFF"])
+def test_stores_wrap_around_memory_as_engine(address: str):
+    # Arrange
+    program = bytes.fromhex(
+        f"F000{address}"  # 200: LDIL address
+        "60FF"  # 204: LDB V0, 0xFF
+        "6102"  # 206: LDB V1, 2
+        "F033"  # 208: LDBCD V0
+        "5012"  # 20A: SRGI V0, V1
+        "F255"  # 20C: SRG V2
+        "120E"  # 20E: JP 0x20E
+    )
+    engine = Engine()
+    fast_engine = FastEngine()
+    for current in (engine, fast_engine):
+        current.quirks.apply_mode(QuirksMode.XoChip)
+        current.load_cartridge(Cartridge(program))
+
+    # Act
+    res = engine.step()
+    fast_res = fast_engine.step()
+
+    # Assert
+    assert res == fast_res == StepResult.Loop
+    assert engine._memory._data == fast_engine._memory
+    # V1 stored by SRG, after wrapping or right before
+    assert engine._memory._data[(int(address, 16) + 1) & 0xFFFF] == 0x02
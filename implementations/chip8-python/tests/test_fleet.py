@@ -0,0 +1,117 @@
+from pathlib import Path
+
+import pytest
+
+from chip8.headless.fleet import FleetJob, fleet_jobs, run_fleet, run_job
+from chip8.headless.runner import InputEvent
+from chip8.mode import EmulationMode
+from chip8.quirks import QuirksMode
+
+# Counts forever.
+BUSY_PROGRAM = bytes.fromhex(
+    "7001"  # 200: ADDB V0, 1
+    "1200"  # 202: JP 0x200
+)
+
+# Waits for a key, then meets a bad opcode.
+BAD_OPCODE_PROGRAM = bytes.fromhex(
+    "F00A"  # 200: LDK V0
+    "E000"  # 202: (bad opcode)
+)
+
+# Calls a machine code routine, then loops forever.
+SYS_PROGRAM = bytes.fromhex(
+    "0300"  # 200: SYS 0x300
+    "1202"  # 202: JP 0x202
+)
+
+
+def test_fleet_jobs(tmp_path: Path, draw_program: bytes):
+    # Arrange
+    (tmp_path / "roms").mkdir()
+    (tmp_path / "roms" / "a.ch8").write_bytes(draw_program)
+    (tmp_path / "roms" / "notes.txt").write_text("")
+    (tmp_path / "b.xo8").write_bytes(draw_program)
+
+    # Act
+    jobs = fleet_jobs(
+        [tmp_path / "roms", tmp_path / "b.xo8"],
+        emulation_mode=EmulationMode.XoChip,
+        quirks_modes=[QuirksMode.Chip8, QuirksMode.XoChip],
+        frames=10,
+    )
+
+    # Assert
+    assert [(job.cartridge_path.name, job.quirks_mode) for job in jobs] == [
+        ("a.ch8", QuirksMode.Chip8),
+        ("a.ch8", QuirksMode.XoChip),
+        ("b.xo8", QuirksMode.Chip8),
+        ("b.xo8", QuirksMode.XoChip),
+    ]
+
+
+def test_run_fleet(tmp_path: Path, draw_program: bytes):
+    # Arrange
+    paths = []
+    for name, program in (
+        ("draw.ch8", draw_program),
+        ("busy.ch8", BUSY_PROGRAM),
+        ("bad.ch8", BAD_OPCODE_PROGRAM),
+        ("missing.ch8", None),
+    ):
+        path = tmp_path / name
+        if program is not None:
+            path.write_bytes(program)
+        paths.append(path)
+
+    jobs = fleet_jobs(
+        paths,
+        emulation_mode=EmulationMode.Chip8,
+        quirks_modes=[None],
+        frames=1_000_000,
+        inputs=[
+            InputEvent(frame=2, key=5, pressed=True),
+            InputEvent(frame=3, key=5, pressed=False),
+        ],
+        cpu_time_limit=0.2,
+    )
+
+    # Act
+    results = {
+        result.job.cartridge_path.name: result
+        for result in run_fleet(jobs, processes=2)
+    }
+
+    # Assert
+    assert {name: result.status for name, result in results.items()} == {
+        "draw.ch8": "ended",
+        "busy.ch8": "timeout",
+        "bad.ch8": "bad-opcode",
+        "missing.ch8": "error",
+    }
+    assert results["bad.ch8"].frames == 4
+    assert "FileNotFoundError" in results["missing.ch8"].error
+    assert results["draw.ch8"].to_json()["cartridge"] == str(paths[0])
+
+
+@pytest.mark.parametrize("fast_core", [False, True])
+def test_run_job_keeps_stdout_clean(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str], fast_core: bool
+):
+    # Arrange
+    path = tmp_path / "sys.ch8"
+    path.write_bytes(SYS_PROGRAM)
+    job = FleetJob(
+        cartridge_path=path,
+        emulation_mode=EmulationMode.Chip8,
+        quirks_mode=None,
+        frames=10,
+        fast_core=fast_core,
+    )
+
+    # Act
+    result = run_job(job)
+
+    # Assert
+    assert result.status == "ended"
+    assert capsys.readouterr().out == ""
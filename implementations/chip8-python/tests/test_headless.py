@@ -0,0 +1,54 @@
+from chip8.cartridge import Cartridge
+from chip8.config import EngineConfig
+from chip8.headless.runner import frame_hash, run_headless
+from chip8.rewind import Rewind
+
+
+def test_run_headless(draw_program: bytes):
+    # Arrange
+    engine = EngineConfig().create_engine()
+    engine.load_cartridge(Cartridge(draw_program))
+
+    # Act
+    result = run_headless(engine, 100)
+
+    # Assert
+    assert result.status == "ended"
+    assert result.frames < 100
+    assert result.instructions == engine._ticks
+    assert result.frame[0].startswith("11111111000")
+    assert result.frame[2].startswith("11000011000")
+    assert len(result.frame_hash) == 64
+
+
+def test_run_headless_same_hash_on_fast_core(draw_program: bytes):
+    # Arrange
+    engine = EngineConfig().create_engine()
+    fast_engine = EngineConfig(fast_core=True).create_engine()
+    for current in (engine, fast_engine):
+        current.load_cartridge(Cartridge(draw_program))
+
+    # Act
+    result = run_headless(engine, 10)
+    fast_result = run_headless(fast_engine, 10)
+
+    # Assert
+    assert result.frame_hash == fast_result.frame_hash
+    assert fast_result.to_json()["frames"] == fast_result.frames
+
+
+def test_run_headless_records_rewind_snapshots(draw_program: bytes):
+    # Arrange
+    engine = EngineConfig().create_engine()
+    engine.load_cartridge(Cartridge(draw_program))
+    rewind = Rewind(engine, interval=1)
+
+    # Act
+    result = run_headless(engine, 1, rewind=rewind)
+    run_headless(engine, 1, rewind=rewind)
+    rewind.rewind(2)
+
+    # Assert
+    assert len(rewind) == 0
+    assert rewind.frame == 1
+    assert frame_hash(engine) == result.frame_hash
@@ -0,0 +1,98 @@
+from chip8.memory import Memory
+from chip8.types import Address, Byte
+
+import pytest
+
+
+def test_read_memory_is_a_view():
+    # Arrange
+    memory = Memory()
+    view = memory.read_memory(Address(0x300), 2)
+
+    # Act
+    memory.store_memory(Address(0x300), bytes([0x12, 0x34]))
+
+    # Assert
+    assert bytes(view) == bytes([0x12, 0x34])
+    assert memory.read_opcode(Address(0x300)) == 0x1234
+
+
+def test_store_bytes_list():
+    # Arrange
+    memory = Memory()
+
+    # Act
+    memory.store_memory(Address(0x300), [Byte(0xAB), Byte(0xCD)])
+
+    # Assert
+    assert memory.read_opcode(Address(0x300)) == 0xABCD
+
+
+def test_local_storage_overflow():
+    # Arrange
+    memory = Memory()
+
+    # Act / Assert
+    with pytest.raises(RuntimeError):
+        memory.store_local_storage(Address(Memory.LOCAL_STORAGE_SIZE), bytes(1))
+
+
+def test_reset():
+    # Arrange
+    memory = Memory()
+    view = memory.read_memory(Address(0x0), Memory.MEMORY_SIZE)
+    memory.store_memory(Address(0x200), bytes([0xFF] * 16))
+
+    # Act
+    memory.reset()
+
+    # Assert
+    assert bytes(view) == Memory.TEMPLATE
+
+
+def test_dirty_pages_since():
+    # Arrange
+    memory = Memory()
+    memory.store_memory(Address(0x200), bytes(4))
+    first = memory.checkpoint()
+    memory.store_memory(Address(0x3FF), bytes(2))
+    second = memory.checkpoint()
+    memory.store_memory(Address(0x800), bytes(1))
+
+    # Act
+    since_first = memory.dirty_pages_since(first)
+    since_second = memory.dirty_pages_since(second)
+    memory.reset_tracking()
+    after_reset = memory.dirty_pages_since(first)
+
+    # Assert
+    assert since_first == [0x3, 0x4, 0x8]
+    assert since_second == [0x8]
+    assert after_reset == []
+
+
+def test_reset_dirties_all_pages():
+    # Arrange
+    memory = Memory()
+    token = memory.checkpoint()
+
+    # Act
+    memory.reset()
+
+    # Assert
+    assert len(memory.dirty_pages_since(token)) == Memory.PAGE_COUNT
+
+
+def test_store_wraps_around_the_end():
+    # Arrange
+    memory = Memory()
+    token = memory.checkpoint()
+
+    # Act
+    memory.store_memory(Address(0xFFFF), bytes([1, 2, 3]))
+
+    # Assert
+    assert memory._data[0xFFFF] == 1
+    assert memory._data[:2] == bytes([2, 3])
+    assert len(memory._data) == Memory.MEMORY_SIZE
+    assert memory.dirty_pages_since(token) == [0x0, 0xFF]
@@ -73,3 +73,19 @@ import pytest
 )
 def test_opcode(byte, code) -> None:
     assert opcodes.parse_opcode(Address(int(byte, base=16))) == code
+
+
+def test_decode_table() -> None:
+    code = opcodes.DECODE_TABLE[0xD123]
+
+    assert code == opcodes.parse_opcode(Address(0xD123))
+    assert opcodes.DECODE_TABLE[0xD123] is code
+    assert opcodes.DECODE_TABLE[0x5121] is None
+
+
+def test_long_address_table() -> None:
+    code = opcodes.LONG_ADDRESS_TABLE[0xDABC]
+
+    assert code == opcodes.LDIL(address=Address(0xDABC))
+    assert opcodes.LONG_ADDRESS_TABLE[0xDABC] is code
+    assert opcodes.DECODE_TABLE[0xF000] == opcodes.LDIL(address=Address(0x0))
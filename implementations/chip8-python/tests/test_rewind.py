@@ -0,0 +1,135 @@
+from chip8.cartridge import Cartridge
+from chip8.engine import Engine
+from chip8.mode import EmulationMode
+from chip8.quirks import QuirksMode
+from chip8.rewind import Rewind
+
+# Draws random sprites in HIRES, counting in BCD at 0x300.
+PROGRAM = bytes.fromhex(
+    "00FF"  # 200: HIRES
+    "C0FF"  # 202: RND V0, 0xFF
+    "C17F"  # 204: RND V1, 0x7F
+    "7201"  # 206: ADDB V2, 1
+    "A300"  # 208: LDI 0x300
+    "F233"  # 20A: LDBCD V2
+    "A050"  # 20C: LDI 0x050
+    "D015"  # 20E: DRW V0, V1, 5
+    "1202"  # 210: JP 0x202
+)
+
+
+def _engine() -> Engine:
+    engine = Engine()
+    engine.set_emulation_mode(EmulationMode.SuperChip)
+    engine.quirks.apply_mode(QuirksMode.SuperChipModern)
+    engine.set_instructions_per_step(8)
+    engine.load_cartridge(Cartridge(PROGRAM))
+    return engine
+
+
+def _run(engine: Engine, rewind: Rewind, frames: int) -> None:
+    for _ in range(frames):
+        engine.step()
+        engine.step_timers()
+        rewind.record()
+
+
+def test_rewind_restores_a_past_state():
+    # Arrange
+    engine = _engine()
+    rewind = Rewind(engine, interval=6, keyframe_interval=4)
+    _run(engine, rewind, 30)
+    state = engine.save_state()
+    _run(engine, rewind, 30)
+
+    # Act
+    count = rewind.rewind(6)
+
+    # Assert
+    assert count == 6
+    assert rewind.frame == 30
+    assert len(rewind) == 4
+    assert engine.save_state() == state
+
+
+def test_snapshots_store_changes_to_keyframes():
+    # Arrange
+    engine = _engine()
+    rewind = Rewind(engine, interval=1)
+
+    # Act
+    _run(engine, rewind, 10)
+
+    # Assert
+    state_size = len(engine.save_state())
+    assert len(rewind) == 10
+    assert rewind.size < 2 * state_size
+
+
+def test_rewind_recording_goes_on_from_the_restored_frame():
+    # Arrange
+    engine = _engine()
+    rewind = Rewind(engine, interval=1)
+    _run(engine, rewind, 10)
+    rewind.rewind(3)
+
+    # Act
+    _run(engine, rewind, 2)
+    state = engine.save_state()
+    _run(engine, rewind, 2)
+    rewind.rewind(3)
+
+    # Assert
+    assert rewind.frame == 10
+    assert engine.save_state() == state
+
+
+def test_budget_evicts_oldest_snapshots():
+    # Arrange
+    engine = _engine()
+    state_size = len(engine.save_state())
+    rewind = Rewind(engine, interval=1, keyframe_interval=5, budget=3 * state_size)
+
+    # Act
+    _run(engine, rewind, 100)
+
+    # Assert
+    assert rewind.size <= 3 * state_size
+    assert rewind.oldest_frame is not None and rewind.oldest_frame > 1
+    assert rewind.rewind(len(rewind)) > 0
+    assert engine._ticks > 0
+
+
+def test_budget_below_a_keyframe_keeps_the_newest_snapshot():
+    # Arrange
+    engine = _engine()
+    state_size = len(engine.save_state())
+    rewind = Rewind(engine, interval=1, keyframe_interval=100, budget=state_size // 2)
+    _run(engine, rewind, 10)
+    state = engine.save_state()
+    engine.step()
+
+    # Act
+    count = rewind.rewind(5)
+
+    # Assert
+    assert count == 1
+    assert rewind.frame == 10
+    assert engine.save_state() == state
+
+
+def test_keyframe_is_taken_early_to_stay_in_budget():
+    # Arrange
+    engine = _engine()
+    state_size = len(engine.save_state())
+    rewind = Rewind(engine, interval=1, keyframe_interval=100, budget=3 * state_size)
+
+    # Act
+    _run(engine, rewind, 100)
+    count = len(rewind)
+
+    # Assert
+    assert rewind.size <= 3 * state_size
+    assert count > 1
+    assert rewind.rewind(count) == count
+    assert rewind.frame == 100 - count + 1
@@ -0,0 +1,104 @@
+import pickle
+
+from chip8.cartridge import Cartridge
+from chip8.engine import Engine
+from chip8.mode import EmulationMode
+from chip8.quirks import QuirksMode
+from chip8.types import Byte
+
+import pytest
+
+# Draws random sprites in HIRES from a subroutine, forever.
+PROGRAM = bytes.fromhex(
+    "00FF"  # 200: HIRES
+    "6A20"  # 202: LDB VA, 0x20
+    "FA15"  # 204: SDLY VA
+    "220A"  # 206: CALL 0x20A
+    "1206"  # 208: JP 0x206
+    "C0FF"  # 20A: RND V0, 0xFF
+    "C17F"  # 20C: RND V1, 0x7F
+    "A300"  # 20E: LDI 0x300
+    "F033"  # 210: LDBCD V0
+    "D015"  # 212: DRW V0, V1, 5
+    "00EE"  # 214: RET
+)
+
+
+def _engine() -> Engine:
+    engine = Engine()
+    engine.set_emulation_mode(EmulationMode.SuperChip)
+    engine.quirks.apply_mode(QuirksMode.SuperChipModern)
+    engine.load_cartridge(Cartridge(PROGRAM))
+    return engine
+
+
+def _run(engine: Engine, frames: int) -> None:
+    for _ in range(frames):
+        engine.step()
+        engine.step_timers()
+
+
+def test_restored_engine_runs_the_same():
+    # Arrange
+    engine = _engine()
+    engine._rng.seed(4)
+    _run(engine, 10)
+    engine._keypad.set_kx(Byte(3), True)
+    engine._keypad.set_kx(Byte(5), False)
+
+    # Act
+    restored = Engine.load_state(engine.save_state())
+    released_key = restored._keypad._last_released_key
+    _run(engine, 10)
+    _run(restored, 10)
+
+    # Assert
+    assert restored.save_state() == engine.save_state()
+    assert restored._display.frame_bytes() == engine._display.frame_bytes()
+    assert restored._keypad.get_kx(Byte(3))
+    assert released_key == Byte(5)
+    assert restored._emulation_mode == EmulationMode.SuperChip
+    assert restored.quirks.as_tuple() == engine.quirks.as_tuple()
+
+
+def test_restore_state_in_place():
+    # Arrange
+    engine = _engine()
+    state = engine.save_state()
+    _run(engine, 10)
+
+    # Act
+    engine.restore_state(state)
+
+    # Assert
+    assert engine.save_state() == state
+    assert not any(engine._display.frame_bytes())
+
+
+def test_engine_is_pickled_as_a_state():
+    # Arrange
+    engine = _engine()
+    engine.set_block_execution(True)
+    _run(engine, 10)
+
+    # Act
+    data = pickle.dumps(engine)
+    unpickled = pickle.loads(data)
+
+    # Assert
+    assert len(data) < len(engine.save_state()) + 100
+    assert unpickled._block_cache is not None
+    assert unpickled.save_state() == engine.save_state()
+
+
+def test_bad_state_is_rejected():
+    # Arrange
+    engine = Engine()
+    state = bytearray(engine.save_state())
+    state[4] = 0xFF
+
+    # Act / Assert
+    with pytest.raises(ValueError, match="Unsupported engine state version"):
+        engine.restore_state(bytes(state))
+    with pytest.raises(ValueError, match="Not an engine state"):
+        engine.restore_state(b"ROM!" + bytes(state[4:]))
@@ -0,0 +1,102 @@
+import time
+
+import pytest
+
+from chip8.cartridge import Cartridge
+from chip8.config import EngineConfig
+from chip8.mode import EmulationMode
+from chip8.sharedframe import FrameStatus, SharedFrame
+from chip8.worker import start_worker
+
+# Sets an audio pattern and pitch, then loops forever.
+AUDIO_PROGRAM = bytes.fromhex(
+    "A20C"  # 200: LDI 0x20C
+    "F002"  # 202: AUD
+    "6070"  # 204: LDB V0, 0x70
+    "F03A"  # 206: PTCH V0
+    "1208"  # 208: JP 0x208
+    "0000"  # 20A
+    "00FF00FF00FF00FF"  # 20C: Pattern
+    "00FF00FF00FF00FF"  # 214
+)
+
+
+@pytest.fixture
+def shared_frame():
+    shared_frame = SharedFrame.create()
+    yield shared_frame
+    shared_frame.close()
+    shared_frame.unlink()
+
+
+def test_publish_and_read(shared_frame: SharedFrame):
+    # Arrange
+    reader = SharedFrame.attach(shared_frame.name)
+    frames = [bytes([value]) * SharedFrame.FRAME_SIZE for value in (1, 2, 3)]
+
+    # Act
+    initial = reader.read()
+    sequences = [shared_frame.publish(frame, beeping=True) for frame in frames]
+    last = reader.read()
+    reader.close()
+
+    # Assert
+    assert initial == (0, bytes(SharedFrame.FRAME_SIZE))
+    assert sequences == [1, 2, 3]
+    assert last == (3, frames[-1])
+    assert shared_frame.beeping
+
+
+def test_readers_cannot_publish(shared_frame: SharedFrame):
+    # Arrange
+    reader = SharedFrame.attach(shared_frame.name)
+
+    # Act
+    with pytest.raises(RuntimeError):
+        reader.publish(bytes(SharedFrame.FRAME_SIZE))
+    reader.close()
+
+
+def test_worker_publishes_frames(shared_frame: SharedFrame, draw_program: bytes):
+    # Arrange
+    config = EngineConfig()
+    engine = config.create_engine()
+    engine.load_cartridge(Cartridge(draw_program))
+    for _ in range(3):
+        engine.step()
+        engine.step_timers()
+
+    # Act
+    process, _, _, stop = start_worker(config, Cartridge(draw_program), shared_frame)
+    deadline = time.monotonic() + 10
+    while shared_frame.status != FrameStatus.Ended and time.monotonic() < deadline:
+        time.sleep(0.01)
+    stop.set()
+    process.join()
+
+    # Assert
+    sequence, frame = shared_frame.read()
+    assert shared_frame.status == FrameStatus.Ended
+    assert sequence > 0
+    assert any(frame)
+    assert frame == bytes(engine._display.frame_bytes())
+
+
+def test_worker_sends_audio_updates(shared_frame: SharedFrame):
+    # Arrange
+    config = EngineConfig(emulation_mode=EmulationMode.XoChip)
+    pattern = [0x00, 0xFF] * 8
+
+    # Act
+    process, _, audio_updates, stop = start_worker(
+        config, Cartridge(AUDIO_PROGRAM), shared_frame
+    )
+    updates = [audio_updates.get(timeout=10) for _ in range(2)]
+    stop.set()
+    process.join()
+
+    # Assert
+    assert updates == [
+        (4000.0, pattern),
+        (4000 * 2 ** ((0x70 - 64) / 48), pattern),
+    ]